@@ -1,13 +1,32 @@
 """Analytics endpoints"""
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from datetime import datetime
+from typing import Optional
+import hashlib
+import json
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.services.analytics_service import AnalyticsService
+from app.services.heatmap_service import HeatmapService
+from app.tasks.analytics_tasks import backfill_rollups, refresh_materialized_views
 
 router = APIRouter()
 
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison) or is *"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
 @router.get("/dashboard")
 async def get_dashboard_stats(
     db: AsyncSession = Depends(get_db)
@@ -31,10 +50,191 @@ async def get_supplier_scorecard(
     
     - **supplier_id**: UUID of supplier
     - **days**: Number of days to analyze (default: 30)
+    
+    Computed from daily buckets in supplier_daily_metrics, which are as
+    fresh as `data_as_of`.
     """
-    scorecard = await AnalyticsService.get_supplier_scorecard(
-        db=db,
-        supplier_id=supplier_id,
-        days=days
-    )
+    try:
+        scorecard = await AnalyticsService.get_supplier_scorecard(
+            db=db,
+            supplier_id=supplier_id,
+            days=days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return scorecard
+
+@router.get("/suppliers/scorecards")
+async def get_supplier_rankings(
+    days: int = 30,
+    sort_by: str = "damage_rate",
+    descending: bool = True,
+    active_only: bool = True,
+    limit: int = 50,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rank all suppliers by a scorecard metric
+    
+    - **days**: Number of days to analyze (default: 30)
+    - **sort_by**: damage_rate, late_delivery_rate, avg_packaging_damage_rate,
+      damaged_parcels, parcels, shipments, violations, claims or
+      approved_claim_value (default: damage_rate)
+    - **descending**: Worst first (default: true)
+    - **active_only**: Skip inactive suppliers (default: true)
+    - **limit** / **offset**: Page of the ranking (limit max 500)
+    """
+    try:
+        return await AnalyticsService.get_supplier_rankings(
+            db=db,
+            days=days,
+            sort_by=sort_by,
+            descending=descending,
+            active_only=active_only,
+            limit=limit,
+            offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/breakdown")
+async def get_damage_breakdown(
+    group_by: str = "supplier",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    warehouse_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Damage and auto-resolution rates from the inspection rollups
+    
+    - **group_by**: supplier, warehouse, damage_type or total (default: supplier)
+    - **since** / **until**: Window of inspection completion times
+      (default: the last 30 days)
+    - **warehouse_id** / **supplier_id**: Optional filters
+    """
+    try:
+        return await AnalyticsService.get_damage_breakdown(
+            db=db,
+            group_by=group_by,
+            since=since,
+            until=until,
+            warehouse_id=warehouse_id,
+            supplier_id=supplier_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/timeseries")
+async def get_damage_timeseries(
+    request: Request,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    max_points: int = 300,
+    warehouse_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Damage rate, detections per type and inspection latency over time
+    
+    - **since** / **until**: Window of inspection completion times
+      (default: the last 30 days)
+    - **max_points**: Upper bound on buckets (default: 300, max 2000); the
+      bucket width (`bucket_seconds`) is the smallest that fits
+    - **warehouse_id** / **supplier_id**: Optional filters
+    
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while the series is unchanged.
+    """
+    try:
+        series = await AnalyticsService.get_damage_timeseries(
+            db=db,
+            since=since,
+            until=until,
+            max_points=max_points,
+            warehouse_id=warehouse_id,
+            supplier_id=supplier_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    content = jsonable_encoder(series)
+    body = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.TIMESERIES_CACHE_TTL}"}
+    
+    if _etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+@router.get("/heatmap")
+async def get_damage_heatmap(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    angle: Optional[str] = None,
+    packaging_type_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Where on a carton damage concentrates, per image angle
+    
+    - **since** / **until**: Window of detection times, widened to whole
+      UTC days (default: the last 30 days, max 366)
+    - **angle**: Only this angle (front, back, left, right, top, bottom)
+    - **packaging_type_id** / **supplier_id**: Optional filters
+    
+    Each angle's grid counts the detection boxes covering each cell of the
+    normalized image (rows top to bottom, columns left to right).
+    """
+    try:
+        return await HeatmapService.get_heatmap(
+            db=db,
+            since=since,
+            until=until,
+            angle=angle,
+            packaging_type_id=packaging_type_id,
+            supplier_id=supplier_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/rollups/backfill")
+async def backfill_inspection_rollups(
+    days: int = 30
+):
+    """
+    Queue a rebuild of the inspection rollups
+    
+    - **days**: Rebuild the last N days (default: 30)
+    
+    Progress is reported by `/jobs/{job_id}`.
+    """
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be at least 1")
+    job = backfill_rollups.delay(days=days)
+    return {"job_id": job.id}
+
+@router.get("/materialized-views")
+async def get_materialized_view_status(
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Refresh status of the analytics materialized views
+    
+    Returns the latest refresh per view and 7-day duration statistics
+    """
+    return {"views": await AnalyticsService.get_materialized_view_status(db)}
+
+@router.post("/materialized-views/refresh")
+async def refresh_materialized_views_now():
+    """
+    Queue an immediate refresh of the analytics materialized views
+    
+    Progress is reported by `/jobs/{job_id}`.
+    """
+    job = refresh_materialized_views.delay()
+    return {"job_id": job.id}
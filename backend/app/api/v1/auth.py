@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -7,7 +7,9 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import Token
 from app.schemas.user import UserResponse
-from app.core.security import verify_password, create_access_token, decode_access_token
+from app.core.security import verify_password, create_access_token
+from app.services.audit_ledger import audit_ledger
+from app.services.user_cache import user_cache
 import logging
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -23,6 +25,8 @@ async def get_current_user(
     Get current authenticated user from JWT token
     
     This dependency can be used in any endpoint that requires authentication.
+    Decoded tokens and active users are cached (see app.services.user_cache),
+    so repeat callers cost no users query.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,15 +35,12 @@ async def get_current_user(
     )
     
     # Decode token
-    token_data = decode_access_token(token)
+    token_data = user_cache.decode_token(token)
     if token_data is None:
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.username == token_data.username)
-    )
-    user = result.scalar_one_or_none()
+    # Get user from the cache or database
+    user = await user_cache.get_user(db, token_data.username)
     
     if user is None:
         raise credentials_exception
@@ -54,6 +55,7 @@ async def get_current_user(
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
@@ -69,9 +71,20 @@ async def login(
     )
     user = result.scalar_one_or_none()
     
+    client = {
+        "ip_address": request.client.host if request.client else None,
+        "user_agent": request.headers.get("user-agent")
+    }
+    
     # Verify credentials
     if not user or not verify_password(form_data.password, user.password_hash):
         logger.warning(f"Failed login attempt for username: {form_data.username}")
+        await audit_ledger.record(
+            "LOGIN_FAILED",
+            {"username": form_data.username},
+            user_id=user.user_id if user else None,
+            **client
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -94,6 +107,12 @@ async def login(
     )
     
     logger.info(f"✅ User logged in: {user.username} ({user.role})")
+    await audit_ledger.record(
+        "LOGIN",
+        {"username": user.username, "role": user.role},
+        user_id=user.user_id,
+        **client
+    )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -118,3 +137,12 @@ async def logout(current_user: User = Depends(get_current_user)):
     """
     logger.info(f"User logged out: {current_user.username}")
     return {"message": "Successfully logged out"}
+
+@router.get("/cache")
+async def get_user_cache_info(current_user: User = Depends(get_current_user)):
+    """
+    Authenticated-user cache state and hit ratios
+    
+    Requires: Valid JWT token in Authorization header
+    """
+    return user_cache.info()
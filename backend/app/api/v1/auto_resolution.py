@@ -6,6 +6,12 @@ from typing import Dict
 
 from app.db.session import get_db
 from app.services.auto_resolution_service import AutoResolutionService
+from app.services.bulk_resolution_service import BulkResolutionService
+from app.services.settings_cache import auto_resolution_settings_cache
+from app.services.reference_data import reference_data_cache
+from app.services.replay_service import ReplayService, replay_window
+from app.services.audit_ledger import audit_ledger, build_event
+from app.schemas.auto_resolution import BulkEvaluationRequest, ReplayRequest
 
 router = APIRouter()
 
@@ -28,6 +34,81 @@ async def evaluate_parcel_for_auto_resolution(
     
     return decision
 
+@router.post("/evaluate-bulk")
+async def evaluate_bulk_auto_resolution(
+    request: BulkEvaluationRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Evaluate every parcel in a shipment or ID list at once
+    
+    - **shipment_id**: Evaluate all parcels of this shipment
+    - **parcel_ids**: Or evaluate these parcels (max 10000)
+    - **apply**: Write the resulting parcel statuses (default true)
+    
+    Uses each parcel's latest completed inspection; parcels without one are
+    skipped.
+    """
+    result = await BulkResolutionService.evaluate(
+        db=db,
+        shipment_id=request.shipment_id,
+        parcel_ids=request.parcel_ids,
+        apply=request.apply
+    )
+    
+    if result['applied']:
+        await audit_ledger.record_many([
+            build_event(
+                'AUTO_RESOLVE',
+                {
+                    'inspection_id': decision['inspection_id'],
+                    'action': decision['action'],
+                    'can_auto_resolve': decision['can_auto_resolve'],
+                    'rule_triggered': decision['rule_triggered'],
+                    'shipment_id': request.shipment_id
+                },
+                parcel_id=decision['parcel_id']
+            )
+            for decision in result['decisions']
+        ])
+    
+    return result
+
+@router.post("/replay")
+async def replay_auto_resolution(
+    request: ReplayRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    What-if replay of candidate settings over historical inspections
+    
+    - **candidates**: Named setting overrides, e.g.
+      `{"name": "strict", "settings": {"auto_approve_confidence_threshold": 0.98}}`
+    - **since** / **until**: Window of inspection completion times
+      (default: the last `days` days)
+    - **days**: Window length when since is omitted (default 90)
+    - **warehouse_id**: Only replay parcels in this warehouse
+    - **rules**: Optional rule set for the candidates instead of the current one
+    
+    Returns decision counts under the live rules and settings and for each
+    candidate, with how many inspections would flip. Read-only.
+    """
+    since, until = replay_window(request.days, request.since, request.until)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    
+    try:
+        return await ReplayService.replay(
+            db=db,
+            candidates=[candidate.model_dump() for candidate in request.candidates],
+            since=since,
+            until=until,
+            warehouse_id=request.warehouse_id,
+            rules=request.rules
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/apply/{parcel_id}")
 async def apply_auto_resolution(
     parcel_id: UUID,
@@ -43,6 +124,18 @@ async def apply_auto_resolution(
     service = AutoResolutionService(db)
     parcel = await service.apply_decision(parcel_id, decision)
     
+    await audit_ledger.record(
+        'AUTO_RESOLVE',
+        {
+            'action': decision.get('action'),
+            'can_auto_resolve': decision.get('can_auto_resolve'),
+            'rule_triggered': decision.get('rule_triggered'),
+            'parcel_status': parcel.status
+        },
+        parcel_id=parcel.parcel_id,
+        warehouse_id=parcel.current_warehouse_id
+    )
+    
     return {
         "parcel_id": parcel.parcel_id,
         "status": parcel.status,
@@ -74,3 +167,23 @@ async def get_auto_resolution_settings(
         }
         for setting in settings
     }
+
+@router.get("/settings/cache")
+async def get_auto_resolution_settings_cache(
+    db: AsyncSession = Depends(get_db)
+):
+    """Version and age of the settings snapshot decisions are made with"""
+    await auto_resolution_settings_cache.get(db)
+    
+    return {"cache": auto_resolution_settings_cache.info()}
+
+@router.post("/settings/reload")
+async def reload_auto_resolution_settings(
+    db: AsyncSession = Depends(get_db)
+):
+    """Invalidate the settings and supplier/SKU caches and load the current settings"""
+    auto_resolution_settings_cache.invalidate()
+    reference_data_cache.invalidate()
+    await auto_resolution_settings_cache.get(db)
+    
+    return {"cache": auto_resolution_settings_cache.info()}
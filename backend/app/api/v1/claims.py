@@ -1,16 +1,52 @@
 """Claims endpoints"""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from typing import Optional
+import os
 
 from app.db.session import get_db
+from app.db.pagination import DEFAULT_PAGE_SIZE
+from app.schemas.claim import ClaimGenerationRequest, ClaimListResponse
+from app.services.audit_ledger import audit_ledger
+from app.services.claim_service import CLAIM_TYPES, ClaimService
+from app.tasks.claim_tasks import build_claim_evidence, generate_claims
 
 router = APIRouter()
 
+@router.post("/generate")
+async def generate_damage_claims(
+    request: ClaimGenerationRequest
+):
+    """
+    Queue claim generation for a shipment or parcel ID list
+    
+    - **shipment_id**: Claim the damaged parcels of this shipment
+    - **parcel_ids**: Or these parcels (max 10000)
+    - **claim_type**: supplier_damage (default), transit_damage,
+      handling_damage or missing_items
+    - **filed_by_user_id**: Optional filing user
+    
+    Each parcel's latest completed inspection is claimed if it found damage
+    and the parcel's SKU has a unit value; parcels already claimed for that
+    inspection are skipped. Progress is reported by `/jobs/{job_id}`.
+    """
+    if request.claim_type not in CLAIM_TYPES:
+        raise HTTPException(status_code=400, detail=f"claim_type must be one of: {', '.join(CLAIM_TYPES)}")
+    job = generate_claims.delay(
+        shipment_id=str(request.shipment_id) if request.shipment_id else None,
+        parcel_ids=[str(parcel_id) for parcel_id in request.parcel_ids] if request.parcel_ids else None,
+        claim_type=request.claim_type,
+        filed_by_user_id=str(request.filed_by_user_id) if request.filed_by_user_id else None
+    )
+    return {"job_id": job.id}
+
 @router.post("/auto-generate/{parcel_id}/{inspection_id}")
 async def auto_generate_damage_claim(
     parcel_id: UUID,
     inspection_id: UUID,
+    claim_type: str = 'supplier_damage',
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -18,17 +54,85 @@ async def auto_generate_damage_claim(
     
     - **parcel_id**: UUID of parcel
     - **inspection_id**: UUID of completed inspection
+    - **claim_type**: supplier_damage (default), transit_damage,
+      handling_damage or missing_items
     
     Returns generated claim
     """
-    # For now, return a placeholder
-    # We'll implement the full logic when we have actual data
-    return {
-        "message": "Claims generation endpoint",
-        "parcel_id": str(parcel_id),
-        "inspection_id": str(inspection_id),
-        "status": "not_implemented_yet"
-    }
+    try:
+        result = await ClaimService.generate_claims(
+            db=db,
+            parcel_ids=[parcel_id],
+            inspection_id=inspection_id,
+            claim_type=claim_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not result['evaluated']:
+        raise HTTPException(status_code=404, detail="Completed inspection not found for parcel")
+    if not result['created']:
+        reason = next(reason for reason, count in result['skipped'].items() if count)
+        status_code = 409 if reason == 'already_claimed' else 400
+        raise HTTPException(status_code=status_code, detail=f"No claim generated: {reason}")
+    
+    claim = result['claims'][0]
+    await audit_ledger.record(
+        'CLAIM',
+        {
+            'claim_id': claim['claim_id'],
+            'claim_number': claim['claim_number'],
+            'inspection_id': inspection_id,
+            'claim_type': claim_type,
+            'claimed_value': claim['claimed_value']
+        },
+        parcel_id=parcel_id
+    )
+    return claim
+
+@router.post("/{claim_id}/evidence")
+async def queue_evidence_package(
+    claim_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue (re)building a claim's evidence package
+    
+    - **claim_id**: UUID of claim
+    
+    The package is a zip of claim.json, evidence.pdf and the inspection
+    images annotated with their detections. Annotated images are cached per
+    model version, so rebuilding only re-assembles the zip. Progress and the
+    package path are reported by `/jobs/{job_id}`.
+    """
+    if await ClaimService.get_evidence_package(db, claim_id) is None:
+        raise HTTPException(status_code=404, detail="Claim not found")
+    
+    job = build_claim_evidence.delay(str(claim_id))
+    return {"job_id": job.id}
+
+@router.get("/{claim_id}/evidence")
+async def download_evidence_package(
+    claim_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a claim's evidence package (zip)
+    
+    - **claim_id**: UUID of claim
+    """
+    package = await ClaimService.get_evidence_package(db, claim_id)
+    if package is None:
+        raise HTTPException(status_code=404, detail="Claim not found")
+    path = package['evidence_package_url']
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Evidence package not built yet")
+    
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{package['claim_number']}_evidence.zip"
+    )
 
 @router.get("/{claim_id}")
 async def get_claim(
@@ -41,13 +145,38 @@ async def get_claim(
         "status": "not_implemented_yet"
     }
 
-@router.get("/")
+@router.get("/", response_model=ClaimListResponse)
 async def list_claims(
+    status: Optional[str] = None,
+    warehouse_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    claim_type: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """List all claims"""
-    return {
-        "claims": [],
-        "total": 0,
-        "message": "Claims listing endpoint ready"
-    }
+    """
+    List claims, newest first
+    
+    - **status**: Filter on claim status
+    - **warehouse_id**: Filter on the claimed parcel's warehouse
+    - **supplier_id**: Filter on the claimed supplier
+    - **claim_type**: supplier_damage, transit_damage, handling_damage or missing_items
+    - **limit**: Page size (default: 50, max 200)
+    - **cursor**: `next_cursor` from the previous page
+    - **include_total**: Add `total_estimate` (planner estimate, not an exact count)
+    """
+    try:
+        return await ClaimService.list_claims(
+            db=db,
+            status=status,
+            warehouse_id=warehouse_id,
+            supplier_id=supplier_id,
+            claim_type=claim_type,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
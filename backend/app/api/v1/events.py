@@ -0,0 +1,68 @@
+"""Server-Sent Events endpoints for inspection progress"""
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from uuid import UUID
+import asyncio
+import json
+
+from app.core.config import settings
+from app.services.event_bus import event_bus, inspection_channel, warehouse_channel
+
+router = APIRouter()
+
+async def _event_stream(request: Request, channel: str):
+    """Yield SSE frames for a channel until the client disconnects"""
+    queue = event_bus.subscribe(channel)
+    try:
+        yield ": connected\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=settings.SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        event_bus.unsubscribe(channel, queue)
+
+def _sse_response(request: Request, channel: str) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, channel),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.get("/inspections/{inspection_id}")
+async def stream_inspection_events(
+    inspection_id: UUID,
+    request: Request
+):
+    """
+    Stream progress events for one inspection (Server-Sent Events)
+
+    - **inspection_id**: UUID of inspection
+
+    Event types: image_stored, detections_written, inspection_finalized
+    """
+    return _sse_response(request, inspection_channel(inspection_id))
+
+@router.get("/warehouses/{warehouse_id}")
+async def stream_warehouse_events(
+    warehouse_id: UUID,
+    request: Request
+):
+    """
+    Stream progress events for every inspection in a warehouse (Server-Sent Events)
+
+    - **warehouse_id**: UUID of warehouse
+    """
+    return _sse_response(request, warehouse_channel(warehouse_id))
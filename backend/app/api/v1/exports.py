@@ -0,0 +1,75 @@
+"""Columnar export endpoints"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.services.export_service import EXPORT_FORMATS, stream_export, storage_export_path
+from app.services.ledger_verifier import sync_dsn
+from app.tasks.export_tasks import export_dataset
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+def download_export(
+    dataset: str,
+    format: str = "parquet",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """
+    Stream a dataset as Parquet or an Arrow IPC stream
+    
+    - **dataset**: inspections (with parcel and supplier columns) or detections
+    - **format**: parquet or arrow (default: parquet)
+    - **since** / **until**: Window of inspection start times (default: all)
+    
+    Rows are read and encoded in batches while the response is sent.
+    """
+    try:
+        chunks = stream_export(
+            dsn=sync_dsn(settings.DATABASE_URL),
+            dataset=dataset,
+            fmt=format,
+            since=since,
+            until=until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    extension, media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
+
+@router.post("/{dataset}")
+def queue_export(
+    dataset: str,
+    format: str = "parquet",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """
+    Queue an export to the storage backend
+    
+    - **dataset**: inspections or detections
+    - **format**: parquet or arrow (default: parquet)
+    - **since** / **until**: Window of inspection start times (default: all)
+    
+    Progress (rows written) and the file path are reported by `/jobs/{job_id}`.
+    """
+    try:
+        storage_export_path(dataset, format, since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = export_dataset.delay(
+        dataset,
+        format,
+        since.isoformat() if since else None,
+        until.isoformat() if until else None
+    )
+    return {"job_id": job.id}
@@ -1,23 +1,109 @@
 """Inspection endpoints"""
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from sqlalchemy.exc import NoResultFound
+from typing import List, Optional
 from uuid import UUID
+import asyncio
 import uuid
 from pathlib import Path
 from PIL import Image as PILImage
+import aiofiles
 
 from app.db.session import get_db
+from app.models.parcel import Parcel
 from app.schemas.inspection import (
     InspectionCreate,
     InspectionResponse,
-    InspectionUpdate
+    InspectionUpdate,
+    InspectionFinalizeBatch,
+    InspectionBatchRequest,
+    InspectionListResponse
 )
 from app.services.inspection_service import InspectionService
+from app.db.pagination import DEFAULT_PAGE_SIZE
+from app.services.ml_service import get_damage_detection_service
+from app.api.v1.images import validate_image
+from app.services.event_bus import event_bus
+from app.services.audit_ledger import audit_ledger, finalized_inspection_events
+from app.tasks.inspection_tasks import process_inspection_image
 from app.core.config import settings
 
 router = APIRouter()
 
+VALID_ANGLES = {"front", "back", "left", "right", "top", "bottom"}
+
+def _finalize_summary(result: dict) -> dict:
+    """Response payload for a finalized inspection"""
+    inspection = result["inspection"]
+    return {
+        "inspection_id": inspection.inspection_id,
+        "overall_status": inspection.overall_status,
+        "has_damage": inspection.has_damage,
+        "damage_count": inspection.damage_count,
+        "overall_confidence": inspection.overall_confidence,
+        "parcel_id": result["parcel_id"],
+        "parcel_status": result["parcel_status"],
+        "auto_resolution": result["auto_resolution"]
+    }
+
+async def _announce_finalized(results: List[dict]) -> None:
+    """Publish inspection_finalized events and record them in the audit ledger"""
+    audit_events = []
+    for result in results:
+        summary = _finalize_summary(result)
+        await event_bus.publish(
+            "inspection_finalized",
+            summary["inspection_id"],
+            summary,
+            warehouse_id=result["warehouse_id"]
+        )
+        audit_events.extend(finalized_inspection_events(result))
+    
+    await audit_ledger.record_many(audit_events)
+
+async def _save_upload(file_path: Path, contents: bytes) -> None:
+    """Write uploaded bytes to disk without blocking the event loop"""
+    async with aiofiles.open(file_path, "wb") as f:
+        await f.write(contents)
+
+@router.get("/", response_model=InspectionListResponse)
+async def list_inspections(
+    status: Optional[str] = None,
+    warehouse_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    has_damage: Optional[bool] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List inspections, most recently started first
+    
+    - **status**: Filter on overall_status
+    - **warehouse_id** / **supplier_id**: Filter on the inspected parcel
+    - **has_damage**: Filter on the damage flag
+    - **limit**: Page size (default: 50, max 200)
+    - **cursor**: `next_cursor` from the previous page
+    - **include_total**: Add `total_estimate` (planner estimate, not an exact count)
+    """
+    try:
+        return await InspectionService.list_inspections(
+            db=db,
+            status=status,
+            warehouse_id=warehouse_id,
+            supplier_id=supplier_id,
+            has_damage=has_damage,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=InspectionResponse)
 async def create_inspection(
     inspection_data: InspectionCreate,
@@ -35,8 +121,182 @@ async def create_inspection(
         inspection_type=inspection_data.inspection_type
     )
     
+    await audit_ledger.record(
+        "INSPECT_START",
+        {
+            "inspection_id": inspection.inspection_id,
+            "inspection_type": inspection.inspection_type
+        },
+        parcel_id=inspection.parcel_id
+    )
+    
     return inspection
 
+@router.post("/submit")
+async def submit_inspection(
+    parcel_id: UUID = Form(...),
+    angles: List[str] = Form(...),
+    files: List[UploadFile] = File(...),
+    inspection_type: str = Form("automated"),
+    finalize: bool = Form(True),
+    weight_kg: Optional[float] = Form(None),
+    length_cm: Optional[float] = Form(None),
+    width_cm: Optional[float] = Form(None),
+    height_cm: Optional[float] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Submit a complete multi-angle inspection in one request
+    
+    - **parcel_id**: UUID of parcel to inspect
+    - **angles**: Angle of each file, in the same order as files
+    - **files**: Image files, one per angle
+    - **inspection_type**: Type of inspection (automated, manual)
+    - **finalize**: Complete the inspection and apply auto-resolution
+    - **weight_kg / length_cm / width_cm / height_cm**: Optional parcel measurements
+    
+    Images are stored concurrently, analyzed in a single batched ML call and
+    written with their detections in one transaction.
+    """
+    if len(angles) != len(files):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Got {len(files)} files but {len(angles)} angles"
+        )
+    
+    if len(files) > settings.IMAGES_PER_INSPECTION:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Max: {settings.IMAGES_PER_INSPECTION}"
+        )
+    
+    invalid_angles = set(angles) - VALID_ANGLES
+    if invalid_angles:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid angles: {', '.join(sorted(invalid_angles))}"
+        )
+    
+    if len(set(angles)) != len(angles):
+        raise HTTPException(status_code=400, detail="Duplicate angles")
+    
+    # Before storing or analyzing anything; the insert would fail on the FK
+    result = await db.execute(select(Parcel.parcel_id).where(Parcel.parcel_id == parcel_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Parcel not found")
+    
+    inspection_id = uuid.uuid4()
+    upload_dir = Path(settings.UPLOAD_DIR) / "inspections" / str(inspection_id)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Read and verify every image before storing anything
+    images = []
+    contents_list = []
+    
+    for sequence_number, (angle, file) in enumerate(zip(angles, files), start=1):
+        validate_image(file)
+        contents = await file.read()
+        
+        try:
+            img = PILImage.open(io.BytesIO(contents))
+            width, height = img.size
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"Invalid image: {file.filename}")
+        
+        file_ext = file.filename.split('.')[-1].lower()
+        file_path = upload_dir / f"{angle}_{sequence_number}.{file_ext}"
+        
+        images.append({
+            "image_id": uuid.uuid4(),
+            "angle": angle,
+            "sequence_number": sequence_number,
+            "file_path": str(file_path),
+            "file_size": len(contents),
+            "width": width,
+            "height": height
+        })
+        contents_list.append(contents)
+    
+    # Store all images concurrently
+    await asyncio.gather(*(
+        _save_upload(Path(image["file_path"]), contents)
+        for image, contents in zip(images, contents_list)
+    ))
+    
+    # Run all angles through the detector as one batch
+    ml_service = get_damage_detection_service()
+    ml_results = await run_in_threadpool(
+        ml_service.analyze_damage_batch,
+        [image["file_path"] for image in images]
+    )
+    
+    parcel_updates = {
+        key: value
+        for key, value in {
+            "weight_kg": weight_kg,
+            "length_cm": length_cm,
+            "width_cm": width_cm,
+            "height_cm": height_cm
+        }.items()
+        if value is not None
+    }
+    
+    created = await InspectionService.create_inspection_with_images(
+        db=db,
+        inspection_id=inspection_id,
+        parcel_id=parcel_id,
+        images=images,
+        ml_results=ml_results,
+        inspection_type=inspection_type,
+        parcel_updates=parcel_updates
+    )
+    
+    detections_per_image = {}
+    for detection in created["detections"]:
+        image_id = detection["image_id"]
+        detections_per_image[image_id] = detections_per_image.get(image_id, 0) + 1
+    
+    for image in images:
+        await event_bus.publish(
+            "detections_written",
+            inspection_id,
+            {
+                "image_id": str(image["image_id"]),
+                "angle": image["angle"],
+                "detections_found": detections_per_image.get(image["image_id"], 0)
+            },
+            warehouse_id=created["warehouse_id"]
+        )
+    
+    response = {
+        "inspection_id": inspection_id,
+        "parcel_id": parcel_id,
+        "images": [
+            {
+                "image_id": image["image_id"],
+                "angle": image["angle"],
+                "file_path": image["file_path"],
+                "detections_found": detections_per_image.get(image["image_id"], 0)
+            }
+            for image in images
+        ],
+        "detections_found": len(created["detections"]),
+        "finalized": False
+    }
+    
+    if finalize:
+        result = await InspectionService.complete_inspection_with_auto_resolution(
+            db=db,
+            inspection_id=inspection_id
+        )
+        await _announce_finalized([result])
+        response["finalized"] = True
+        response["overall_status"] = result["inspection"].overall_status
+        response["auto_resolution"] = result["auto_resolution"]
+        response["parcel_status"] = result["parcel_status"]
+    
+    return response
+
 @router.post("/{inspection_id}/upload-image")
 async def upload_inspection_image(
     inspection_id: UUID,
@@ -52,6 +312,9 @@ async def upload_inspection_image(
     - **angle**: Image angle (front, back, left, right, top, bottom)
     - **sequence_number**: Order of image (1-6)
     - **file**: Image file
+    
+    With async processing enabled, returns as soon as the image is stored;
+    ML runs on a worker and progress is reported by `/jobs/{job_id}`.
     """
     # Save file
     upload_dir = Path(settings.UPLOAD_DIR) / "inspections" / str(inspection_id)
@@ -75,7 +338,7 @@ async def upload_inspection_image(
         f.write(contents)
     
     # Add to database
-    inspection_image = await InspectionService.add_inspection_image(
+    stored = await InspectionService.add_inspection_image(
         db=db,
         inspection_id=inspection_id,
         file_path=str(file_path),
@@ -85,12 +348,50 @@ async def upload_inspection_image(
         height=height,
         file_size=len(contents)
     )
+    inspection_image = stored["image"]
+    
+    await event_bus.publish(
+        "image_stored",
+        inspection_id,
+        {
+            "image_id": str(inspection_image.image_id),
+            "angle": angle,
+            "images_received": stored["images_received"],
+            "images_expected": stored["images_expected"]
+        },
+        warehouse_id=stored["warehouse_id"]
+    )
+    
+    if settings.INSPECTION_ASYNC_PROCESSING:
+        job = process_inspection_image.delay(
+            str(inspection_id),
+            str(inspection_image.image_id)
+        )
+        
+        return {
+            "image_id": inspection_image.image_id,
+            "file_path": str(file_path),
+            "processed": False,
+            "job_id": job.id
+        }
     
     # Process with ML
     detections = await InspectionService.process_image_with_ml(
         db=db,
         image_id=inspection_image.image_id
     )
+    if detections is None:
+        raise HTTPException(status_code=409, detail="Image was already processed")
+    
+    await event_bus.publish(
+        "detections_written",
+        inspection_id,
+        {
+            "image_id": str(inspection_image.image_id),
+            "detections_found": len(detections)
+        },
+        warehouse_id=stored["warehouse_id"]
+    )
     
     return {
         "image_id": inspection_image.image_id,
@@ -116,19 +417,124 @@ async def complete_inspection(
     
     return inspection
 
+@router.post("/{inspection_id}/finalize")
+async def finalize_inspection(
+    inspection_id: UUID,
+    reevaluate: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Complete inspection and apply auto-resolution in one transaction
+    
+    - **inspection_id**: UUID of inspection to finalize
+    - **reevaluate**: Re-apply auto-resolution to an already completed inspection
+    """
+    try:
+        result = await InspectionService.finalize_inspection(
+            db=db,
+            inspection_id=inspection_id,
+            reevaluate=reevaluate
+        )
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    await _announce_finalized([result])
+    
+    return _finalize_summary(result)
+
+@router.post("/finalize-batch")
+async def finalize_inspections(
+    batch: InspectionFinalizeBatch,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Complete many inspections and apply auto-resolution in one transaction
+    
+    - **inspection_ids**: UUIDs of inspections to finalize (max 1000)
+    - **reevaluate**: Also re-apply auto-resolution to completed inspections
+    
+    Unknown and failed inspection IDs are skipped, as are completed ones
+    unless reevaluate is set.
+    """
+    results = await InspectionService.finalize_inspections(
+        db=db,
+        inspection_ids=batch.inspection_ids,
+        reevaluate=batch.reevaluate
+    )
+    
+    await _announce_finalized(results)
+    
+    return {
+        "count": len(results),
+        "results": [_finalize_summary(result) for result in results]
+    }
+
+@router.post("/{inspection_id}/recompute-aggregates")
+async def recompute_inspection_aggregates(
+    inspection_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Rebuild an inspection's running detection aggregates from its detections
+    
+    - **inspection_id**: UUID of inspection
+    """
+    await InspectionService.recompute_inspection_aggregates(
+        db=db,
+        inspection_id=inspection_id
+    )
+    
+    return {"inspection_id": inspection_id, "recomputed": True}
+
+@router.get("/{inspection_id}/progress")
+async def get_inspection_progress(
+    inspection_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get image processing progress for an inspection
+    
+    - **inspection_id**: UUID of inspection
+    """
+    progress = await InspectionService.get_processing_progress(
+        db=db,
+        inspection_id=inspection_id
+    )
+    
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Inspection not found")
+    
+    return progress
+
+@router.post("/batch", response_model=List[InspectionResponse])
+async def get_inspections_batch(
+    request: InspectionBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get details for many inspections in one request
+    
+    - **inspection_ids**: Inspection UUIDs (max 500)
+    
+    Results follow the requested order; unknown ids are omitted.
+    """
+    return await InspectionService.get_inspection_details(
+        db=db,
+        inspection_ids=request.inspection_ids
+    )
+
 @router.get("/{inspection_id}", response_model=InspectionResponse)
 async def get_inspection(
     inspection_id: UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Get inspection details"""
-    from sqlalchemy import select
-    from app.models.inspection import Inspection
-    
-    result = await db.execute(
-        select(Inspection).where(Inspection.inspection_id == inspection_id)
+    inspection = await InspectionService.get_inspection_detail(
+        db=db,
+        inspection_id=inspection_id
     )
-    inspection = result.scalar_one_or_none()
     
     if not inspection:
         raise HTTPException(status_code=404, detail="Inspection not found")
@@ -0,0 +1,32 @@
+"""Background job endpoints"""
+from fastapi import APIRouter
+from celery.result import AsyncResult
+
+from app.core.celery_app import celery_app
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+def get_job_status(job_id: str):
+    """
+    Get status of a background job
+
+    - **job_id**: ID returned when the job was queued
+
+    State is one of PENDING, STARTED, PROGRESS, RETRY, SUCCESS, FAILURE
+    """
+    result = AsyncResult(job_id, app=celery_app)
+
+    response = {
+        "job_id": job_id,
+        "state": result.state
+    }
+
+    if result.state == "PROGRESS":
+        response["progress"] = result.info
+    elif result.successful():
+        response["result"] = result.result
+    elif result.failed():
+        response["error"] = str(result.result)
+
+    return response
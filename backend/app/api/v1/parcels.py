@@ -0,0 +1,48 @@
+"""Parcel endpoints"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import Optional
+
+from app.db.session import get_db
+from app.db.pagination import DEFAULT_PAGE_SIZE
+from app.schemas.parcel import ParcelListResponse
+from app.services.parcel_service import ParcelService
+
+router = APIRouter()
+
+@router.get("/", response_model=ParcelListResponse)
+async def list_parcels(
+    status: Optional[str] = None,
+    warehouse_id: Optional[UUID] = None,
+    supplier_id: Optional[UUID] = None,
+    has_damage: Optional[bool] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List parcels, newest first
+    
+    - **status**: Filter on parcel status
+    - **warehouse_id**: Filter on the current warehouse
+    - **supplier_id**: Filter on the shipment's supplier
+    - **has_damage**: Filter on the damage flag
+    - **limit**: Page size (default: 50, max 200)
+    - **cursor**: `next_cursor` from the previous page
+    - **include_total**: Add `total_estimate` (planner estimate, not an exact count)
+    """
+    try:
+        return await ParcelService.list_parcels(
+            db=db,
+            status=status,
+            warehouse_id=warehouse_id,
+            supplier_id=supplier_id,
+            has_damage=has_damage,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,198 @@
+"""Two-tier (in-process + Redis) cache with request coalescing
+
+A lookup checks this process's memory first, then Redis, and only then
+runs the loader. Concurrent misses for the same key share one load: within
+a process they await the same future, and across processes the first one
+takes a short Redis lock while the others poll Redis for its result.
+
+Values must be JSON-serializable; they are round-tripped through JSON
+before being cached so both tiers return the same shape. Redis errors
+degrade to the in-process tier, which holds at most max_entries keys
+(least recently used evicted first).
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# How long a cross-process loader may hold the lock before others give up
+LOCK_TIMEOUT_SECONDS = 10
+
+# Poll interval while another process is loading
+LOCK_POLL_SECONDS = 0.05
+
+
+class TwoTierCache:
+    """Cache for expensive, shared read results"""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int,
+        local_ttl_seconds: Optional[float] = None,
+        redis_url: Optional[str] = None,
+        max_entries: int = 1000
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        # Short local TTL keeps processes close to the shared Redis copy
+        self.local_ttl_seconds = min(local_ttl_seconds or ttl_seconds, ttl_seconds)
+        self.redis_url = redis_url
+        self.max_entries = max_entries
+        # key -> (expires at, value), least recently used first
+        self._local: OrderedDict = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_loop = None
+        self.hits = {'local': 0, 'redis': 0}
+        self.loads = 0
+        self.coalesced = 0
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _client(self) -> Optional[aioredis.Redis]:
+        if self.redis_url is None:
+            return None
+        # redis.asyncio connections are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._redis_loop = loop
+        return self._redis
+
+    def _get_local(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        self.hits['local'] += 1
+        return entry[1]
+
+    def _set_local(self, key: str, value: Any):
+        self._local[key] = (time.monotonic() + self.local_ttl_seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, client: aioredis.Redis, key: str):
+        try:
+            raw = await client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache {self.namespace}: Redis read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        self.hits['redis'] += 1
+        return json.loads(raw)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for key, running loader at most once per miss
+
+        Args:
+            key: Cache key within this namespace
+            loader: Coroutine function producing a JSON-serializable value
+        """
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        future.set_result(value)
+        return value
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        client = self._client()
+        lock_key = self._key(key) + ":lock"
+        locked = False
+
+        if client is not None:
+            value = await self._get_redis(client, key)
+            if value is not None:
+                self._set_local(key, value)
+                return value
+
+            try:
+                locked = bool(await client.set(lock_key, "1", nx=True, ex=LOCK_TIMEOUT_SECONDS))
+            except Exception as e:
+                logger.warning(f"Cache {self.namespace}: Redis lock failed: {e}")
+                client = None
+
+            if client is not None and not locked:
+                # Another process is loading; wait for its result
+                deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(LOCK_POLL_SECONDS)
+                    value = await self._get_redis(client, key)
+                    if value is not None:
+                        self._set_local(key, value)
+                        return value
+
+        try:
+            self.loads += 1
+            value = json.loads(json.dumps(await loader(), default=str))
+            self._set_local(key, value)
+
+            if client is not None:
+                try:
+                    await client.set(self._key(key), json.dumps(value), ex=self.ttl_seconds)
+                except Exception as e:
+                    logger.warning(f"Cache {self.namespace}: Redis write failed: {e}")
+        finally:
+            # Release only a lock this process took, also when the loader
+            # failed, so other processes do not wait out the timeout
+            if locked:
+                try:
+                    await client.delete(lock_key)
+                except Exception as e:
+                    logger.warning(f"Cache {self.namespace}: Redis unlock failed: {e}")
+
+        return value
+
+    async def invalidate(self, key: str):
+        """Drop key from this process and Redis"""
+        self._local.pop(key, None)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.delete(self._key(key))
+            except Exception as e:
+                logger.warning(f"Cache {self.namespace}: Redis delete failed: {e}")
+
+    def info(self) -> Dict:
+        return {
+            'namespace': self.namespace,
+            'ttl_seconds': self.ttl_seconds,
+            'local_ttl_seconds': self.local_ttl_seconds,
+            'local_entries': len(self._local),
+            'max_entries': self.max_entries,
+            'hits': dict(self.hits),
+            'loads': self.loads,
+            'coalesced': self.coalesced,
+        }
@@ -0,0 +1,35 @@
+"""Celery application for background processing"""
+from celery import Celery
+from app.core.config import settings
+
+celery_app = Celery(
+    "parcel_inspection",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.inspection_tasks", "app.tasks.analytics_tasks", "app.tasks.export_tasks", "app.tasks.claim_tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    # Re-deliver a task if the worker dies mid-inference
+    task_acks_late=True,
+    # YOLO inference is long-running; don't let one worker hoard the queue
+    worker_prefetch_multiplier=1,
+    result_expires=86400,
+    timezone="UTC",
+    # Run with `celery -A app.core.celery_app beat`
+    beat_schedule={
+        "refresh-materialized-views": {
+            "task": "analytics.refresh_materialized_views",
+            "schedule": settings.MATVIEW_REFRESH_INTERVAL_MINUTES * 60,
+        },
+        # Settle yesterday's heatmap grids so reads never recompute them
+        "materialize-heatmaps": {
+            "task": "analytics.materialize_heatmaps",
+            "schedule": 3600,
+        },
+    },
+)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
@@ -12,6 +12,27 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str
     REDIS_CACHE_TTL: int = 300
+    DASHBOARD_LOCAL_CACHE_TTL: int = 10  # In-process copy in front of the Redis-cached dashboard
+    TIMESERIES_CACHE_TTL: int = 60  # Damage time series (served from the inspection rollups)
+    LOCAL_CACHE_MAX_ENTRIES: int = 1000  # Keys per in-process tier of the two-tier caches (LRU)
+    MATVIEW_REFRESH_INTERVAL_MINUTES: int = 60  # Beat schedule for analytics materialized views
+    
+    # Inspection progress events
+    EVENT_BUS_BACKEND: str = "redis"  # redis, memory
+    SSE_KEEPALIVE_SECONDS: int = 15
+    
+    # Settings cache (invalidated by NOTIFY; TTL is the fallback)
+    SETTINGS_CACHE_TTL: int = 300
+    REFERENCE_DATA_CACHE_TTL: int = 600  # Supplier damage rates and SKU values used by rules
+    REPLAY_CACHE_TTL: int = 300  # Inspection history kept for what-if threshold replays
+    USER_CACHE_TTL: int = 60  # Authenticated users and decoded tokens (users invalidated by NOTIFY)
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Audit ledger (event_log)
+    AUDIT_LEDGER_DURABILITY: str = "commit"  # commit: wait for the batch to commit; interval: buffered
+    AUDIT_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_FLUSH_MAX_EVENTS: int = 1000
+    AUDIT_BUFFER_MAX_EVENTS: int = 100000  # Unwritten events kept for retry; oldest dropped beyond this
     
     # JWT
     JWT_SECRET_KEY: str
@@ -28,16 +49,20 @@ class Settings(BaseSettings):
     # Storage
     STORAGE_BACKEND: str = "local"
     LOCAL_STORAGE_PATH: str = "/tmp/parcel_images"
+    EVIDENCE_WORKERS: int = 4  # Processes rendering annotated images for evidence packages
     
     # ML
     ML_MODEL_PATH: str = "../ml/models/yolov8n.pt"
     OCR_ENABLED: bool = True
     OCR_LANGUAGE: str = "en"
     GPU_ENABLED: bool = False
+    DETECTION_WRITE_METHOD: Literal["copy", "executemany"] = "copy"  # copy: asyncpg COPY; executemany: batched INSERT
     
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    INSPECTION_ASYNC_PROCESSING: bool = True  # Queue ML work instead of running it in the request
+    AUTO_FINALIZE_INSPECTIONS: bool = True  # Finalize once every expected image is processed
     
     # Logging
     LOG_LEVEL: str = "INFO"
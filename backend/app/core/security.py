@@ -1,6 +1,6 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from app.core.config import settings
 from app.schemas.auth import TokenData
@@ -67,7 +67,12 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         if username is None:
             return None
         
-        return TokenData(username=username, role=role)
+        expires_at = payload.get("exp")
+        return TokenData(
+            username=username,
+            role=role,
+            expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc) if expires_at else None
+        )
     
     except JWTError:
         return None
@@ -0,0 +1,49 @@
+"""Database round-trip instrumentation"""
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+
+class QueryCounter:
+    """Counts statements sent to the database"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+
+    def __repr__(self):
+        return f"<QueryCounter {self.count} statements>"
+
+
+@contextmanager
+def count_queries(bind) -> Iterator[QueryCounter]:
+    """
+    Count statements executed on an engine or session's engine
+
+    Counts every cursor execution (BEGIN/COMMIT are not included).
+    The listener is engine-wide, so use it in scripts and tests rather
+    than under concurrent traffic.
+
+    Usage:
+        with count_queries(db) as counter:
+            await InspectionService.add_inspection_image(db, ...)
+        print(counter.count)
+    """
+    if isinstance(bind, AsyncSession):
+        bind = bind.bind
+    if isinstance(bind, AsyncEngine):
+        bind = bind.sync_engine
+
+    counter = QueryCounter()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.count += 1
+        counter.statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", _before_cursor_execute)
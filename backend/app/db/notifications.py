@@ -0,0 +1,101 @@
+"""PostgreSQL LISTEN/NOTIFY listener
+
+Holds one dedicated asyncpg connection per process (outside the session
+pool) and dispatches notifications to registered callbacks. Callbacks run
+on the event loop and must not block.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NotificationCallback = Callable[[str, str], None]
+
+
+class PgNotificationListener:
+    """Dispatches PostgreSQL notifications to in-process callbacks"""
+
+    def __init__(self, dsn: str):
+        # asyncpg takes a plain libpq URL, not a SQLAlchemy dialect URL
+        self.dsn = dsn.replace('postgresql+asyncpg://', 'postgresql://')
+        self._callbacks: Dict[str, List[NotificationCallback]] = {}
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, channel: str, callback: NotificationCallback):
+        """
+        Register a callback for a channel
+
+        Callbacks are called with (channel, payload). They are also called
+        with an empty payload after a reconnect, since notifications sent
+        while disconnected are lost.
+        """
+        self._callbacks.setdefault(channel, []).append(callback)
+
+    async def start(self):
+        """Connect and keep listening until stopped"""
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop listening and close the connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self._close()
+
+    def _notify(self, connection, pid, channel: str, payload: str):
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(channel, payload)
+            except Exception as e:
+                logger.warning(f"Notification callback for {channel} failed: {e}")
+
+    async def _close(self):
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    async def _run(self):
+        """Listen on every registered channel, reconnecting on errors"""
+        connected_before = False
+
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                for channel in self._callbacks:
+                    await self._connection.add_listener(channel, self._notify)
+
+                if connected_before:
+                    # Anything sent while we were away was missed
+                    for channel in self._callbacks:
+                        self._notify(self._connection, None, channel, "")
+                connected_before = True
+                logger.info(f"👂 Listening for notifications on {', '.join(self._callbacks)}")
+
+                while not self._connection.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Notification listener connection failed: {e}; retrying")
+
+            await self._close()
+            await asyncio.sleep(1)
+
+
+# Singleton instance
+pg_listener = PgNotificationListener(dsn=settings.DATABASE_URL)
@@ -0,0 +1,131 @@
+"""Keyset (cursor) pagination
+
+Listings are ordered by (sort column, primary key), newest first. A page
+asks for the rows strictly after the previous page's last pair, which is a
+single range scan of an index on (sort column, primary key) that stops
+after limit + 1 rows. Page 10,000 costs the same as page 1, whereas OFFSET
+reads and discards every earlier row.
+
+Cursors are opaque to clients: URL-safe base64 of the last row's sort value
+and key. Rows whose sort value is NULL cannot be addressed by a cursor and
+are not listed.
+
+Totals are optional and come from the planner's row estimate (EXPLAIN)
+rather than COUNT(*), which would scan every matching row.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Same convention as the models: naive datetimes are UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(sort_value: datetime, key: UUID) -> str:
+    """Opaque cursor pointing just past (sort_value, key)"""
+    raw = json.dumps([_naive_utc(sort_value).isoformat(), str(key)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    (sort_value, key) from a cursor
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, key = json.loads(raw)
+        return _naive_utc(datetime.fromisoformat(sort_value)), UUID(key)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain, 'postgresql')
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_count(db: AsyncSession, query: Select) -> int:
+    """Planner's estimate of the rows query returns (no scan)"""
+    plan = (await db.execute(_Explain(query.order_by(None).limit(None)))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    sort_column,
+    key_column,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> Dict:
+    """
+    One page of query, newest first
+
+    Args:
+        query: Filtered select of entities or rows exposing the sort and
+            key attributes
+        sort_column / key_column: Ordering columns, e.g. created_at and the
+            primary key (index them together)
+        cursor: next_cursor of the previous page
+        include_total: Add the planner's total_estimate for the filters
+
+    Returns:
+        {'items', 'next_cursor' (None on the last page), 'limit'[, 'total_estimate']}
+
+    Raises:
+        ValueError: On an invalid limit or cursor
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be 1-{MAX_PAGE_SIZE}")
+
+    query = query.where(sort_column.isnot(None))
+    page_query = query
+    if cursor is not None:
+        page_query = page_query.where(tuple_(sort_column, key_column) < decode_cursor(cursor))
+    page_query = page_query.order_by(sort_column.desc(), key_column.desc()).limit(limit + 1)
+
+    result = await db.execute(page_query)
+    rows: List = result.scalars().all() if _selects_entity(query) else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, key_column.key))
+
+    page = {'items': rows, 'next_cursor': next_cursor, 'limit': limit}
+    if include_total:
+        page['total_estimate'] = await estimate_count(db, query)
+    return page
+
+
+def _selects_entity(query: Select) -> bool:
+    descriptions = query.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]['expr'] is descriptions[0]['entity']
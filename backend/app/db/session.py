@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 import logging
 
@@ -30,6 +31,22 @@ async_session = async_sessionmaker(
     autoflush=False,
 )
 
+# Engine for Celery workers: each task runs in its own event loop, so
+# connections must not be pooled across tasks
+worker_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    poolclass=NullPool,
+)
+
+worker_session = async_sessionmaker(
+    worker_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 # Create base class for models
 Base = declarative_base()
 
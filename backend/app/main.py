@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.services.event_bus import event_bus
+from app.services.audit_ledger import audit_ledger
+from app.db.notifications import pg_listener
+from app.services.settings_cache import SETTINGS_CHANNEL, auto_resolution_settings_cache
+from app.services.user_cache import USERS_CHANNEL, user_cache
 import logging
 
 # Configure logging
@@ -34,11 +39,19 @@ async def startup_event():
     logger.info(f"📍 Environment: {'Development' if settings.API_DEBUG else 'Production'}")
     logger.info(f"🗄️  Database: Connected to PostgreSQL")
     logger.info(f"💾 Redis: Connected at {settings.REDIS_URL}")
+    await event_bus.start()
+    pg_listener.add_listener(SETTINGS_CHANNEL, auto_resolution_settings_cache.on_notification)
+    pg_listener.add_listener(USERS_CHANNEL, user_cache.on_notification)
+    await pg_listener.start()
+    await audit_ledger.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info("👋 Shutting down Parcel Inspection System API...")
+    await audit_ledger.stop()
+    await event_bus.stop()
+    await pg_listener.stop()
 
 @app.get("/")
 async def root():
@@ -91,6 +104,10 @@ app.include_router(images_router, prefix="/api/v1/images", tags=["images"])
 from app.api.v1.ml import router as ml_router
 app.include_router(ml_router, prefix="/api/v1/ml", tags=["machine-learning"])
 
+# Parcels Router
+from app.api.v1.parcels import router as parcels_router
+app.include_router(parcels_router, prefix="/api/v1/parcels", tags=["parcels"])
+
 # Inspections Router
 from app.api.v1.inspections import router as inspections_router
 app.include_router(inspections_router, prefix="/api/v1/inspections", tags=["inspections"])
@@ -111,6 +128,18 @@ app.include_router(ocr_router, prefix="/api/v1/ocr", tags=["ocr"])
 from app.api.v1.claims import router as claims_router
 app.include_router(claims_router, prefix="/api/v1/claims", tags=["claims"])
 
+# Jobs Router
+from app.api.v1.jobs import router as jobs_router
+app.include_router(jobs_router, prefix="/api/v1/jobs", tags=["jobs"])
+
+# Exports Router
+from app.api.v1.exports import router as exports_router
+app.include_router(exports_router, prefix="/api/v1/exports", tags=["exports"])
+
+# Events Router
+from app.api.v1.events import router as events_router
+app.include_router(events_router, prefix="/api/v1/events", tags=["events"])
+
 # ========================================
 # MAIN - For direct execution
 # ========================================
@@ -4,6 +4,11 @@ from app.models.inspection import Inspection
 from app.models.inspection_image import InspectionImage
 from app.models.damage_detection import DamageDetection
 from app.models.system_setting import SystemSetting
+from app.models.supplier import Supplier
+from app.models.shipment import Shipment
+from app.models.sku import Sku
+from app.models.event_log import EventLog
+from app.models.damage_claim import DamageClaim
 
 __all__ = [
     "User",
@@ -12,4 +17,9 @@ __all__ = [
     "InspectionImage",
     "DamageDetection",
     "SystemSetting",
+    "Supplier",
+    "Shipment",
+    "Sku",
+    "EventLog",
+    "DamageClaim",
 ]
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""Damage Claim model"""
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Date, Numeric, Text
+from datetime import datetime
+import uuid
+from app.db.session import Base
+
+class DamageClaim(Base):
+    __tablename__ = "damage_claims"
+    
+    claim_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    claim_number = Column(String(100), unique=True, nullable=False)
+    
+    # Foreign keys
+    parcel_id = Column(UUID(as_uuid=True), ForeignKey('parcels.parcel_id'), index=True)
+    inspection_id = Column(UUID(as_uuid=True), ForeignKey('inspections.inspection_id'))
+    supplier_id = Column(UUID(as_uuid=True), ForeignKey('suppliers.supplier_id'), index=True)
+    
+    # Claim details
+    claim_type = Column(String(50))  # supplier_damage, transit_damage, handling_damage, missing_items
+    claimed_value = Column(Numeric(12, 2), nullable=False)
+    currency = Column(String(3), default='USD')
+    
+    # Status
+    status = Column(String(50), default='submitted', index=True)  # submitted, under_review, approved, rejected, settled, disputed
+    
+    # Evidence package
+    evidence_package_url = Column(String(500))
+    
+    # Resolution
+    approved_amount = Column(Numeric(12, 2))
+    rejection_reason = Column(Text)
+    settlement_date = Column(Date)
+    
+    filed_by_user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'))
+    reviewed_by_user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'))
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<DamageClaim {self.claim_number}>"
@@ -0,0 +1,31 @@
+"""Event Log model (append-only, hash-chained audit ledger)"""
+from sqlalchemy import Column, String, UUID, BigInteger, DateTime, Text
+from sqlalchemy.dialects.postgresql import JSONB, INET
+from datetime import datetime
+from app.db.session import Base
+
+class EventLog(Base):
+    __tablename__ = "event_log"
+    
+    event_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False, index=True)  # LOGIN, INSPECT, AUTO_RESOLVE, ...
+    
+    # Related entities
+    parcel_id = Column(UUID(as_uuid=True), index=True)
+    user_id = Column(UUID(as_uuid=True), index=True)
+    warehouse_id = Column(UUID(as_uuid=True))
+    
+    # Event details
+    event_data = Column(JSONB, nullable=False)
+    
+    # Metadata
+    device_id = Column(String(100))
+    ip_address = Column(INET)
+    user_agent = Column(Text)
+    
+    # Immutability
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    event_hash = Column(String(64), nullable=False)  # SHA-256 of previous hash + event
+    
+    def __repr__(self):
+        return f"<EventLog {self.event_id} {self.event_type}>"
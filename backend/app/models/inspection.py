@@ -23,7 +23,11 @@ class Inspection(Base):
     # Damage assessment
     has_damage = Column(Boolean, default=False)
     damage_count = Column(Integer, default=0)
-    damage_types = Column(JSONB)  # List of detected damage types
+    damage_types = Column(JSONB)  # Histogram of detected damage types {type: count}
+    
+    # Running detection aggregates, updated as each image's detections are written
+    detection_confidence_sum = Column(Float, default=0.0)
+    max_severity = Column(String(20))  # minor, moderate, severe
     
     # AI/ML results
     ml_model_version = Column(String(50))
@@ -0,0 +1,34 @@
+"""Shipment model"""
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Integer
+from datetime import datetime
+import uuid
+from app.db.session import Base
+
+class Shipment(Base):
+    __tablename__ = "shipments"
+    
+    shipment_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    shipment_number = Column(String(100), unique=True, nullable=False)
+    
+    # Foreign keys
+    supplier_id = Column(UUID(as_uuid=True), ForeignKey('suppliers.supplier_id'), index=True)
+    origin_warehouse_id = Column(UUID(as_uuid=True))
+    destination_warehouse_id = Column(UUID(as_uuid=True))
+    
+    # Timeline
+    expected_arrival = Column(DateTime)
+    actual_arrival = Column(DateTime)
+    is_late = Column(Boolean, default=False)
+    
+    # Manifest
+    total_parcels = Column(Integer, default=0)
+    
+    # Status
+    status = Column(String(50), default='pending')  # pending, in_transit, arrived, inspecting, completed, disputed
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Shipment {self.shipment_number}>"
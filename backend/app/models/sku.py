@@ -0,0 +1,27 @@
+"""SKU model"""
+from sqlalchemy import Column, String, UUID, DateTime, Boolean, Numeric, Text
+from datetime import datetime
+import uuid
+from app.db.session import Base
+
+class Sku(Base):
+    __tablename__ = "skus"
+    
+    sku_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sku_code = Column(String(100), unique=True, nullable=False)
+    name = Column(String(300), nullable=False)
+    description = Column(Text)
+    category = Column(String(100))
+    
+    # Value & handling
+    unit_value = Column(Numeric(12, 2))
+    currency = Column(String(3), default='USD')
+    is_fragile = Column(Boolean, default=False)
+    is_hazardous = Column(Boolean, default=False)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Sku {self.sku_code}>"
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 class Token(BaseModel):
@@ -9,3 +12,4 @@ class TokenData(BaseModel):
     """Token payload data"""
     username: str
     role: str
+    expires_at: Optional[datetime] = None
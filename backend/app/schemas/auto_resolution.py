@@ -0,0 +1,28 @@
+"""Auto-resolution schemas"""
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from uuid import UUID
+
+class BulkEvaluationRequest(BaseModel):
+    shipment_id: Optional[UUID] = None
+    parcel_ids: Optional[List[UUID]] = Field(None, max_length=10000)
+    apply: bool = True
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.shipment_id is None and not self.parcel_ids:
+            raise ValueError("shipment_id or parcel_ids is required")
+        return self
+
+class ReplayCandidate(BaseModel):
+    name: str
+    settings: Dict[str, Any] = Field(default_factory=dict)
+
+class ReplayRequest(BaseModel):
+    candidates: List[ReplayCandidate] = Field(..., min_length=1, max_length=200)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    days: int = Field(90, ge=1, le=730)
+    warehouse_id: Optional[UUID] = None
+    rules: Optional[Dict[str, Any]] = None
@@ -0,0 +1,40 @@
+"""Claim schemas"""
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
+
+class ClaimResponse(BaseModel):
+    claim_id: UUID
+    claim_number: str
+    parcel_id: Optional[UUID]
+    inspection_id: Optional[UUID]
+    supplier_id: Optional[UUID]
+    claim_type: Optional[str]
+    claimed_value: float
+    currency: Optional[str]
+    status: Optional[str]
+    approved_amount: Optional[float]
+    evidence_package_url: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ClaimListResponse(BaseModel):
+    items: List[ClaimResponse]
+    next_cursor: Optional[str]
+    limit: int
+    total_estimate: Optional[int] = None
+
+class ClaimGenerationRequest(BaseModel):
+    shipment_id: Optional[UUID] = None
+    parcel_ids: Optional[List[UUID]] = Field(None, max_length=10000)
+    claim_type: str = 'supplier_damage'
+    filed_by_user_id: Optional[UUID] = None
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.shipment_id is None and not self.parcel_ids:
+            raise ValueError("shipment_id or parcel_ids is required")
+        return self
@@ -13,6 +13,13 @@ class InspectionImageUpload(BaseModel):
     angle: str  # front, back, left, right, top, bottom
     sequence_number: int
 
+class InspectionFinalizeBatch(BaseModel):
+    inspection_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    reevaluate: bool = False
+
+class InspectionBatchRequest(BaseModel):
+    inspection_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
 class InspectionUpdate(BaseModel):
     overall_status: Optional[str] = None
     has_damage: Optional[bool] = None
@@ -44,7 +51,7 @@ class InspectionImageResponse(BaseModel):
     class Config:
         from_attributes = True
 
-class InspectionResponse(BaseModel):
+class InspectionSummaryResponse(BaseModel):
     inspection_id: UUID
     parcel_id: UUID
     inspection_type: str
@@ -56,8 +63,16 @@ class InspectionResponse(BaseModel):
     images_received: int
     started_at: datetime
     completed_at: Optional[datetime]
-    images: List[InspectionImageResponse] = []
-    detections: List[DamageDetectionResponse] = []
     
     class Config:
         from_attributes = True
+
+class InspectionResponse(InspectionSummaryResponse):
+    images: List[InspectionImageResponse] = []
+    detections: List[DamageDetectionResponse] = []
+
+class InspectionListResponse(BaseModel):
+    items: List[InspectionSummaryResponse]
+    next_cursor: Optional[str]
+    limit: int
+    total_estimate: Optional[int] = None
@@ -1,6 +1,6 @@
 """Parcel schemas"""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -35,3 +35,9 @@ class ParcelResponse(ParcelBase):
     
     class Config:
         from_attributes = True
+
+class ParcelListResponse(BaseModel):
+    items: List[ParcelResponse]
+    next_cursor: Optional[str]
+    limit: int
+    total_estimate: Optional[int] = None
@@ -1,17 +1,201 @@
 """Analytics service for supplier performance and metrics"""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import Dict, List
+from sqlalchemy import select, func, insert, text, table, column, Date, DateTime
+from typing import Dict, List, Optional, Sequence
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import logging
+import time
 
 from app.models.supplier import Supplier
 from app.models.parcel import Parcel
 from app.models.inspection import Inspection
+from app.core.cache import TwoTierCache
+from app.services.rollup_service import (
+    ALL_DAMAGE_TYPES,
+    ROLLUP_MEASURES,
+    RollupService,
+    daily_rollups,
+    day_bucket,
+    hour_bucket,
+    hourly_rollups,
+    utc
+)
+from app.core.config import settings
+
+# Dashboard counts shared by every API process
+dashboard_cache = TwoTierCache(
+    namespace='dashboard',
+    ttl_seconds=settings.REDIS_CACHE_TTL,
+    local_ttl_seconds=settings.DASHBOARD_LOCAL_CACHE_TTL,
+    redis_url=settings.REDIS_URL,
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES
+)
+
+# Damage time series, keyed by window, bucket and filters
+timeseries_cache = TwoTierCache(
+    namespace='timeseries',
+    ttl_seconds=settings.TIMESERIES_CACHE_TTL,
+    local_ttl_seconds=settings.DASHBOARD_LOCAL_CACHE_TTL,
+    redis_url=settings.REDIS_URL,
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+# Refreshed in this order: supplier_scorecards is built from supplier_daily_metrics
+MATERIALIZED_VIEWS = ('parcel_dwell_times', 'supplier_daily_metrics', 'supplier_scorecards')
+
+# Daily per-supplier buckets (database/migrations/add_supplier_daily_metrics.sql)
+supplier_daily_metrics = table(
+    'supplier_daily_metrics',
+    column('supplier_id'),
+    column('day', Date),
+    column('shipments'),
+    column('late_shipments'),
+    column('parcels'),
+    column('damaged_parcels'),
+    column('packaged_parcels'),
+    column('packaging_damage_rate_sum'),
+    column('violations'),
+    column('last_violation_at', DateTime(timezone=True)),
+    column('claims'),
+    column('claimed_value'),
+    column('approved_claim_value'),
+)
+
+materialized_view_refreshes = table(
+    'materialized_view_refreshes',
+    column('view_name'),
+    column('started_at', DateTime(timezone=True)),
+    column('duration_ms'),
+    column('success'),
+    column('error'),
+)
+
+SCORECARD_METRICS = (
+    'shipments', 'late_shipments', 'late_delivery_rate',
+    'parcels', 'damaged_parcels', 'damage_rate', 'avg_packaging_damage_rate',
+    'violations', 'last_violation_at',
+    'claims', 'claimed_value', 'approved_claim_value',
+)
+SCORECARD_COUNTS = ('shipments', 'late_shipments', 'parcels', 'damaged_parcels', 'violations', 'claims')
+
+RANKING_METRICS = (
+    'damage_rate', 'late_delivery_rate', 'avg_packaging_damage_rate',
+    'damaged_parcels', 'parcels', 'shipments', 'violations', 'claims', 'approved_claim_value',
+)
+MAX_RANKING_PAGE_SIZE = 500
+
+BREAKDOWN_GROUPS = ('supplier', 'warehouse', 'damage_type', 'total')
+
+# Time-series bucket widths, smallest first
+TIMESERIES_BUCKETS = (
+    timedelta(hours=1), timedelta(hours=2), timedelta(hours=3), timedelta(hours=6),
+    timedelta(hours=12), timedelta(days=1), timedelta(days=2), timedelta(days=7),
+    timedelta(days=14), timedelta(days=28),
+)
+MAX_TIMESERIES_POINTS = 2000
+
+
+def _window_start(days: int) -> date:
+    """First day of a `days`-day window ending today (UTC)"""
+    if days < 1:
+        raise ValueError("days must be at least 1")
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def _ceil_bucket(value: datetime, floor, step: timedelta) -> datetime:
+    """Start of the first bucket at or after value"""
+    start = floor(value)
+    return start if start == value else start + step
+
+
+def timeseries_bucket(span: timedelta, max_points: int) -> timedelta:
+    """
+    Smallest bucket width that covers span in at most max_points buckets
+    
+    Widths come from TIMESERIES_BUCKETS; longer spans fall back to the
+    smallest sufficient number of whole days.
+    """
+    if not 1 <= max_points <= MAX_TIMESERIES_POINTS:
+        raise ValueError(f"max_points must be 1-{MAX_TIMESERIES_POINTS}")
+    for width in TIMESERIES_BUCKETS:
+        if span <= width * max_points:
+            return width
+    days = -(-span // timedelta(days=1))
+    return timedelta(days=-(-days // max_points))
+
 
 class AnalyticsService:
     """Service for analytics and reporting"""
     
+    @staticmethod
+    def _window_metrics(since: date):
+        """Per-supplier sums of the daily buckets from `since` on"""
+        m = supplier_daily_metrics
+        return (
+            select(
+                m.c.supplier_id,
+                func.sum(m.c.shipments).label('shipments'),
+                func.sum(m.c.late_shipments).label('late_shipments'),
+                func.sum(m.c.parcels).label('parcels'),
+                func.sum(m.c.damaged_parcels).label('damaged_parcels'),
+                func.sum(m.c.packaged_parcels).label('packaged_parcels'),
+                func.sum(m.c.packaging_damage_rate_sum).label('packaging_damage_rate_sum'),
+                func.sum(m.c.violations).label('violations'),
+                func.max(m.c.last_violation_at).label('last_violation_at'),
+                func.sum(m.c.claims).label('claims'),
+                func.sum(m.c.claimed_value).label('claimed_value'),
+                func.sum(m.c.approved_claim_value).label('approved_claim_value')
+            )
+            .where(m.c.day >= since)
+            .group_by(m.c.supplier_id)
+            .subquery('window_metrics')
+        )
+    
+    @staticmethod
+    def _scorecard_columns(w) -> Dict:
+        """Scorecard metric expressions over a _window_metrics subquery"""
+        return {
+            'shipments': func.coalesce(w.c.shipments, 0),
+            'late_shipments': func.coalesce(w.c.late_shipments, 0),
+            'late_delivery_rate': w.c.late_shipments * 100.0 / func.nullif(w.c.shipments, 0),
+            'parcels': func.coalesce(w.c.parcels, 0),
+            'damaged_parcels': func.coalesce(w.c.damaged_parcels, 0),
+            'damage_rate': w.c.damaged_parcels * 1.0 / func.nullif(w.c.parcels, 0),
+            'avg_packaging_damage_rate': w.c.packaging_damage_rate_sum / func.nullif(w.c.packaged_parcels, 0),
+            'violations': func.coalesce(w.c.violations, 0),
+            'last_violation_at': w.c.last_violation_at,
+            'claims': func.coalesce(w.c.claims, 0),
+            'claimed_value': func.coalesce(w.c.claimed_value, 0),
+            'approved_claim_value': func.coalesce(w.c.approved_claim_value, 0),
+        }
+    
+    @staticmethod
+    def _data_as_of():
+        """When the daily buckets were last refreshed successfully"""
+        r = materialized_view_refreshes
+        return (
+            select(func.max(r.c.started_at))
+            .where(r.c.view_name == 'supplier_daily_metrics', r.c.success == True)
+            .scalar_subquery()
+            .label('data_as_of')
+        )
+    
+    @staticmethod
+    def _format_metrics(row) -> Dict:
+        metrics = {}
+        for name in SCORECARD_METRICS:
+            value = getattr(row, name)
+            if isinstance(value, Decimal):
+                value = int(value) if name in SCORECARD_COUNTS else round(float(value), 4)
+            elif isinstance(value, float):
+                value = round(value, 4)
+            metrics[name] = value
+        return metrics
+    
     @staticmethod
     async def get_supplier_scorecard(
         db: AsyncSession,
@@ -21,75 +205,461 @@ class AnalyticsService:
         """
         Get comprehensive supplier scorecard
         
+        Sums the supplier's daily metric buckets over the last `days` days
+        (today included) in one query.
+        
         Args:
             supplier_id: UUID of supplier
             days: Number of days to analyze
         """
-        # Get supplier
-        supplier_result = await db.execute(
-            select(Supplier).where(Supplier.supplier_id == supplier_id)
+        since = _window_start(days)
+        w = AnalyticsService._window_metrics(since)
+        
+        result = await db.execute(
+            select(
+                Supplier.supplier_id,
+                Supplier.supplier_code,
+                Supplier.name,
+                Supplier.is_active,
+                *(expr.label(name) for name, expr in AnalyticsService._scorecard_columns(w).items()),
+                AnalyticsService._data_as_of()
+            )
+            .outerjoin(w, w.c.supplier_id == Supplier.supplier_id)
+            .where(Supplier.supplier_id == supplier_id)
         )
-        supplier = supplier_result.scalar_one_or_none()
+        row = result.one_or_none()
         
-        if not supplier:
+        if not row:
             return {"error": "Supplier not found"}
         
-        # Date range
-        since_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Get parcels from this supplier in date range
-        # (Assuming parcels link to supplier via shipment)
-        # For now, using all supplier parcels
-        
         scorecard = {
-            'supplier_id': str(supplier.supplier_id),
-            'supplier_code': supplier.supplier_code,
-            'supplier_name': supplier.name,
+            'supplier_id': str(row.supplier_id),
+            'supplier_code': row.supplier_code,
+            'supplier_name': row.name,
             'period_days': days,
-            'metrics': {
-                'damage_rate': supplier.damage_rate,
-                'total_parcels': supplier.total_parcels_received,
-                'damaged_parcels': supplier.damaged_parcels_count,
-                'on_time_delivery_rate': supplier.on_time_delivery_rate,
-                'quality_rating': supplier.quality_rating,
-            },
-            'status': 'active' if supplier.is_active else 'inactive',
+            'period_start': since,
+            'metrics': AnalyticsService._format_metrics(row),
+            'status': 'active' if row.is_active else 'inactive',
+            'data_as_of': row.data_as_of,
             'generated_at': datetime.utcnow()
         }
         
         return scorecard
     
     @staticmethod
-    async def get_dashboard_stats(
-        db: AsyncSession
+    async def get_supplier_rankings(
+        db: AsyncSession,
+        days: int = 30,
+        sort_by: str = 'damage_rate',
+        descending: bool = True,
+        active_only: bool = True,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict:
+        """
+        Rank every supplier by a scorecard metric over the last `days` days
+        
+        Ranking, the page and the total count come from one query. Suppliers
+        without activity in the window are ranked last.
+        
+        Raises:
+            ValueError: On an unknown sort metric or an invalid page
+        """
+        if sort_by not in RANKING_METRICS:
+            raise ValueError(f"sort_by must be one of: {', '.join(RANKING_METRICS)}")
+        if not 1 <= limit <= MAX_RANKING_PAGE_SIZE or offset < 0:
+            raise ValueError(f"limit must be 1-{MAX_RANKING_PAGE_SIZE} and offset non-negative")
+        
+        since = _window_start(days)
+        w = AnalyticsService._window_metrics(since)
+        columns = AnalyticsService._scorecard_columns(w)
+        sort_expr = columns[sort_by]
+        ordering = (sort_expr.desc() if descending else sort_expr.asc()).nulls_last()
+        
+        query = (
+            select(
+                Supplier.supplier_id,
+                Supplier.supplier_code,
+                Supplier.name,
+                Supplier.is_active,
+                *(expr.label(name) for name, expr in columns.items()),
+                func.rank().over(order_by=ordering).label('rank'),
+                func.count().over().label('total'),
+                AnalyticsService._data_as_of()
+            )
+            .outerjoin(w, w.c.supplier_id == Supplier.supplier_id)
+            .order_by(ordering, Supplier.supplier_code)
+            .limit(limit)
+            .offset(offset)
+        )
+        if active_only:
+            query = query.where(Supplier.is_active == True)
+        
+        rows = (await db.execute(query)).all()
+        
+        return {
+            'period_days': days,
+            'period_start': since,
+            'sort_by': sort_by,
+            'descending': descending,
+            'total': rows[0].total if rows else 0,
+            'limit': limit,
+            'offset': offset,
+            'data_as_of': rows[0].data_as_of if rows else None,
+            'suppliers': [
+                {
+                    'rank': row.rank,
+                    'supplier_id': str(row.supplier_id),
+                    'supplier_code': row.supplier_code,
+                    'supplier_name': row.name,
+                    'status': 'active' if row.is_active else 'inactive',
+                    'metrics': AnalyticsService._format_metrics(row)
+                }
+                for row in rows
+            ]
+        }
+    
+    @staticmethod
+    async def get_damage_breakdown(
+        db: AsyncSession,
+        group_by: str = 'supplier',
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        warehouse_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None
+    ) -> Dict:
+        """
+        Damage and auto-resolution rates per supplier, warehouse or damage type
+        
+        Reads the inspection rollups (daily rows for whole-day windows,
+        hourly otherwise), so the cost is O(buckets) regardless of how many
+        inspections the window holds.
+        
+        Args:
+            group_by: supplier, warehouse, damage_type or total
+            since / until: Window of completion times (default: last 30 days)
+        
+        Raises:
+            ValueError: On an unknown group_by or an empty window
+        """
+        if group_by not in BREAKDOWN_GROUPS:
+            raise ValueError(f"group_by must be one of: {', '.join(BREAKDOWN_GROUPS)}")
+        
+        until = utc(until) if until else day_bucket(datetime.utcnow()) + timedelta(days=1)
+        since = utc(since) if since else until - timedelta(days=30)
+        if since >= until:
+            raise ValueError("since must be before until")
+        
+        r = RollupService.source_for(since, until)
+        
+        conditions = [r.c.bucket_start >= since, r.c.bucket_start < until]
+        if warehouse_id is not None:
+            conditions.append(r.c.warehouse_id == warehouse_id)
+        if supplier_id is not None:
+            conditions.append(r.c.supplier_id == supplier_id)
+        
+        type_condition = (
+            r.c.damage_type != ALL_DAMAGE_TYPES if group_by == 'damage_type'
+            else r.c.damage_type == ALL_DAMAGE_TYPES
+        )
+        
+        key = {
+            'supplier': r.c.supplier_id,
+            'warehouse': r.c.warehouse_id,
+            'damage_type': r.c.damage_type,
+            'total': None
+        }[group_by]
+        
+        sums = [func.sum(r.c[m]).label(m) for m in ROLLUP_MEASURES]
+        query = select(*([key.label('key')] if key is not None else []), *sums).where(
+            *conditions, type_condition
+        )
+        if key is not None:
+            query = query.group_by(key).order_by(func.sum(r.c.inspections).desc())
+        
+        if group_by == 'damage_type':
+            # Share of all inspections, from the '' rows of the same window
+            query = query.add_columns(
+                select(func.sum(r.c.inspections))
+                .where(*conditions, r.c.damage_type == ALL_DAMAGE_TYPES)
+                .scalar_subquery()
+                .label('all_inspections')
+            )
+        
+        rows = (await db.execute(query)).all()
+        
+        def ratio(numerator, denominator):
+            return round(float(numerator) / float(denominator), 4) if denominator else None
+        
+        groups = []
+        for row in rows:
+            if not row.inspections:
+                continue
+            group = {
+                'inspections': int(row.inspections),
+                'damaged': int(row.damaged),
+                'detections': int(row.detections),
+            }
+            if key is not None:
+                group = {group_by: row.key, **group}
+            if group_by == 'damage_type':
+                group['share_of_inspections'] = ratio(row.inspections, row.all_inspections)
+            else:
+                group.update({
+                    'damage_rate': ratio(row.damaged, row.inspections),
+                    'auto_resolved': int(row.auto_resolved),
+                    'auto_resolution_rate': ratio(row.auto_resolved, row.inspections),
+                    'auto_actions': {
+                        'approved': int(row.auto_approved),
+                        'quarantine': int(row.auto_quarantined),
+                        'rejected': int(row.auto_rejected),
+                    },
+                    'avg_confidence': ratio(row.confidence_sum, row.confidence_count),
+                })
+            groups.append(group)
+        
+        return {
+            'group_by': group_by,
+            'since': since,
+            'until': until,
+            'granularity': 'day' if r is daily_rollups else 'hour',
+            'groups': groups
+        }
+    
+    @staticmethod
+    async def get_damage_timeseries(
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        max_points: int = 300,
+        warehouse_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None
     ) -> Dict:
-        """Get dashboard statistics"""
+        """
+        Damage rate, detections per type and inspection latency over time
+        
+        The bucket width is the smallest that keeps the series within
+        max_points; the window is widened to whole hours (or whole days for
+        day-sized buckets, which read the daily rollups). Empty buckets are
+        included with zero counts. Served from timeseries_cache.
+        
+        Raises:
+            ValueError: On an invalid max_points or an empty window
+        """
+        until = utc(until) if until else hour_bucket(datetime.utcnow()) + timedelta(hours=1)
+        since = utc(since) if since else until - timedelta(days=30)
+        if since >= until:
+            raise ValueError("since must be before until")
         
-        # Total parcels
-        total_parcels_result = await db.execute(
-            select(func.count(Parcel.parcel_id))
+        r = hourly_rollups
+        since, until = hour_bucket(since), _ceil_bucket(until, hour_bucket, timedelta(hours=1))
+        width = timeseries_bucket(until - since, max_points)
+        if not width % timedelta(days=1):
+            # Widening to whole days can only keep or grow the width
+            r = daily_rollups
+            since, until = day_bucket(since), _ceil_bucket(until, day_bucket, timedelta(days=1))
+            width = timeseries_bucket(until - since, max_points)
+        
+        key = f"{since.isoformat()}|{until.isoformat()}|{int(width.total_seconds())}|{warehouse_id}|{supplier_id}"
+        return await timeseries_cache.get_or_load(
+            key,
+            lambda: AnalyticsService._query_damage_timeseries(
+                db, r, since, until, width, warehouse_id, supplier_id
+            )
         )
-        total_parcels = total_parcels_result.scalar()
+    
+    @staticmethod
+    async def _query_damage_timeseries(
+        db: AsyncSession,
+        r,
+        since: datetime,
+        until: datetime,
+        width: timedelta,
+        warehouse_id: Optional[UUID],
+        supplier_id: Optional[UUID]
+    ) -> Dict:
+        """One grouped query: a row per bucket x damage_type ('' = totals)"""
+        bucket = func.date_bin(width, r.c.bucket_start, since).label('bucket')
+        measures = ('inspections', 'damaged', 'detections', 'confidence_sum',
+                    'confidence_count', 'latency_ms_sum', 'latency_count')
         
-        # Parcels with damage
-        damaged_parcels_result = await db.execute(
-            select(func.count(Parcel.parcel_id)).where(Parcel.has_damage == True)
+        query = (
+            select(bucket, r.c.damage_type, *(func.sum(r.c[m]).label(m) for m in measures))
+            .where(r.c.bucket_start >= since, r.c.bucket_start < until)
+            .group_by(bucket, r.c.damage_type)
         )
-        damaged_parcels = damaged_parcels_result.scalar()
+        if warehouse_id is not None:
+            query = query.where(r.c.warehouse_id == warehouse_id)
+        if supplier_id is not None:
+            query = query.where(r.c.supplier_id == supplier_id)
+        
+        rows = (await db.execute(query)).all()
         
-        # Auto-resolved parcels
-        auto_resolved_result = await db.execute(
-            select(func.count(Parcel.parcel_id)).where(Parcel.auto_resolved == True)
+        def ratio(numerator, denominator, digits=4):
+            return round(float(numerator) / float(denominator), digits) if denominator else None
+        
+        totals = {}
+        by_type = {}
+        damage_types = set()
+        for row in rows:
+            start = utc(row.bucket)
+            if row.damage_type == ALL_DAMAGE_TYPES:
+                totals[start] = row
+            else:
+                by_type.setdefault(start, {})[row.damage_type] = int(row.detections)
+                damage_types.add(row.damage_type)
+        
+        points = []
+        start = since
+        while start < until:
+            row = totals.get(start)
+            points.append({
+                'bucket_start': start,
+                'inspections': int(row.inspections) if row else 0,
+                'damaged': int(row.damaged) if row else 0,
+                'damage_rate': ratio(row.damaged, row.inspections) if row else None,
+                'detections': int(row.detections) if row else 0,
+                'detections_by_type': by_type.get(start, {}),
+                'avg_confidence': ratio(row.confidence_sum, row.confidence_count) if row else None,
+                'avg_latency_ms': ratio(row.latency_ms_sum, row.latency_count, 1) if row else None,
+            })
+            start += width
+        
+        return {
+            'since': since,
+            'until': until,
+            'bucket_seconds': int(width.total_seconds()),
+            'granularity': 'day' if r is daily_rollups else 'hour',
+            'damage_types': sorted(damage_types),
+            'points': points
+        }
+    
+    @staticmethod
+    async def refresh_materialized_views(
+        db: AsyncSession,
+        views: Sequence[str] = MATERIALIZED_VIEWS
+    ) -> List[Dict]:
+        """
+        REFRESH ... CONCURRENTLY each view, in dependency order
+        
+        Reads keep being served from the previous contents during a
+        refresh. Every refresh is recorded in materialized_view_refreshes
+        with its duration; a failed view is logged and the rest still run.
+        """
+        unknown = set(views) - set(MATERIALIZED_VIEWS)
+        if unknown:
+            raise ValueError(f"Unknown materialized views: {', '.join(sorted(unknown))}")
+        
+        results = []
+        for view in MATERIALIZED_VIEWS:
+            if view not in views:
+                continue
+            
+            started_at = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            error = None
+            try:
+                await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                error = str(e)
+                logger.error(f"Refreshing {view} failed: {e}")
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            
+            await db.execute(
+                insert(materialized_view_refreshes).values(
+                    view_name=view,
+                    started_at=started_at,
+                    duration_ms=duration_ms,
+                    success=error is None,
+                    error=error
+                )
+            )
+            await db.commit()
+            
+            logger.info(f"Refreshed {view} in {duration_ms} ms" if error is None else f"{view} not refreshed")
+            results.append({
+                'view': view,
+                'started_at': started_at,
+                'duration_ms': duration_ms,
+                'success': error is None,
+                'error': error
+            })
+        
+        return results
+    
+    @staticmethod
+    async def get_materialized_view_status(
+        db: AsyncSession
+    ) -> List[Dict]:
+        """Latest refresh per view with 7-day duration stats"""
+        result = await db.execute(text("""
+            SELECT DISTINCT ON (view_name)
+                view_name,
+                started_at,
+                duration_ms,
+                success,
+                error,
+                MAX(started_at) FILTER (WHERE success) OVER w AS last_success_at,
+                ROUND(AVG(duration_ms) FILTER (WHERE success) OVER w) AS avg_duration_ms,
+                MAX(duration_ms) FILTER (WHERE success) OVER w AS max_duration_ms,
+                COUNT(*) FILTER (WHERE NOT success) OVER w AS failures
+            FROM materialized_view_refreshes
+            WHERE started_at > CURRENT_TIMESTAMP - INTERVAL '7 days'
+            WINDOW w AS (PARTITION BY view_name)
+            ORDER BY view_name, started_at DESC
+        """))
+        
+        return [
+            {
+                'view': row.view_name,
+                'last_refresh_at': row.started_at,
+                'last_duration_ms': row.duration_ms,
+                'last_success': row.success,
+                'last_error': row.error,
+                'last_success_at': row.last_success_at,
+                'avg_duration_ms_7d': int(row.avg_duration_ms) if row.avg_duration_ms is not None else None,
+                'max_duration_ms_7d': row.max_duration_ms,
+                'failures_7d': row.failures
+            }
+            for row in result.all()
+        ]
+    
+    @staticmethod
+    async def get_dashboard_stats(
+        db: AsyncSession
+    ) -> Dict:
+        """
+        Get dashboard statistics
+        
+        Served from dashboard_cache; concurrent misses share one query.
+        """
+        return await dashboard_cache.get_or_load(
+            'stats',
+            lambda: AnalyticsService._query_dashboard_stats(db)
+        )
+    
+    @staticmethod
+    async def _query_dashboard_stats(
+        db: AsyncSession
+    ) -> Dict:
+        """All dashboard counts in one statement (one scan of parcels)"""
+        completed_inspections = (
+            select(func.count(Inspection.inspection_id))
+            .where(Inspection.overall_status == 'completed')
+            .scalar_subquery()
         )
-        auto_resolved = auto_resolved_result.scalar()
         
-        # Completed inspections
-        completed_inspections_result = await db.execute(
-            select(func.count(Inspection.inspection_id)).where(
-                Inspection.overall_status == 'completed'
+        result = await db.execute(
+            select(
+                func.count(Parcel.parcel_id),
+                func.count(Parcel.parcel_id).filter(Parcel.has_damage == True),
+                func.count(Parcel.parcel_id).filter(Parcel.auto_resolved == True),
+                completed_inspections
             )
         )
-        completed_inspections = completed_inspections_result.scalar()
+        total_parcels, damaged_parcels, auto_resolved, completed_inspections = result.one()
         
         # Calculate rates
         damage_rate = (damaged_parcels / total_parcels * 100) if total_parcels > 0 else 0
@@ -0,0 +1,503 @@
+"""Buffered, hash-chained writer for the event_log audit ledger
+
+Each event's hash is SHA-256 over the previous event's hash followed by
+the event's canonical JSON encoding, so altering or removing any row
+breaks every later hash.
+
+Events are buffered in-process and flushed in batches. A flush takes a
+transaction-level advisory lock (the sequencer shared by every API and
+worker process), reads the last hash once, chains the whole batch in
+memory and writes it with one COPY. Writers therefore serialize per batch,
+not per event.
+
+Durability (AUDIT_LEDGER_DURABILITY):
+    commit    record() returns once the event's batch is committed; callers
+              that arrive during a flush share the next one (group commit)
+    interval  record() returns immediately; batches are flushed every
+              AUDIT_FLUSH_INTERVAL_MS. Events buffered at a crash are lost.
+
+Events are recorded after the work they describe has committed, so a
+failed batch is not reported to the caller: it is logged and kept in the
+buffer, and retried every AUDIT_FLUSH_INTERVAL_MS by the flusher (or with
+the next record_many() in processes without one, e.g. Celery workers).
+Only transient failures (connection loss, lock timeouts) are retried that
+way. When the database rejects the data itself (a constraint violation
+such as a dangling foreign key, or invalid input) the batch is bisected
+until the offending events are isolated; those are dead-lettered (logged
+with their full content and counted) and the rest of the batch is written.
+The buffer holds at most AUDIT_BUFFER_MAX_EVENTS; beyond that the oldest
+events are dropped and logged, so an unreachable database cannot exhaust
+memory.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.event_log import EventLog
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+
+# pg_advisory_xact_lock key held while appending to the chain ('eventlog')
+LEDGER_LOCK_ID = 0x6576656E746C6F67
+
+# Columns written by COPY, in order (event_id comes from its sequence)
+LEDGER_COLUMNS = (
+    'event_type',
+    'parcel_id',
+    'user_id',
+    'warehouse_id',
+    'event_data',
+    'device_id',
+    'ip_address',
+    'user_agent',
+    'created_at',
+    'event_hash',
+)
+
+
+# SQLSTATE classes that no retry can fix: data exception, integrity constraint violation
+PERMANENT_SQLSTATE_CLASSES = ('22', '23')
+
+
+class AuditLedgerError(Exception):
+    """
+    Events could not be written to the ledger
+
+    permanent is True when the database rejected the events themselves,
+    so writing them again would fail the same way.
+    """
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def _is_permanent(error: Optional[BaseException]) -> bool:
+    """Whether a write failure comes from the events rather than the database"""
+    while error is not None:
+        sqlstate = getattr(error, 'sqlstate', None)
+        if isinstance(sqlstate, str):
+            return sqlstate[:2] in PERMANENT_SQLSTATE_CLASSES
+        if isinstance(error, (TypeError, ValueError)):
+            # Raised while encoding the COPY records
+            return True
+        error = getattr(error, 'orig', None) or error.__cause__
+    return False
+
+
+def _utc_iso(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec='microseconds')
+
+
+def _ip(value) -> Optional[str]:
+    if value is None:
+        return None
+    return _normalize_ip(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_ip(value: str) -> str:
+    # Addresses repeat heavily and parsing dominates verification time
+    return str(ipaddress.ip_interface(value).ip)
+
+
+def canonical_event(event: Dict[str, Any]) -> bytes:
+    """
+    Canonical encoding of an event for hashing
+
+    Stable across a database round-trip: UUIDs as strings, timestamps as
+    UTC ISO-8601 with microseconds, addresses without a prefix length,
+    object keys sorted.
+    """
+    return json.dumps(
+        {
+            'event_type': event['event_type'],
+            'parcel_id': str(event['parcel_id']) if event.get('parcel_id') else None,
+            'user_id': str(event['user_id']) if event.get('user_id') else None,
+            'warehouse_id': str(event['warehouse_id']) if event.get('warehouse_id') else None,
+            'event_data': event['event_data'],
+            'device_id': event.get('device_id'),
+            'ip_address': _ip(event.get('ip_address')),
+            'user_agent': event.get('user_agent'),
+            'created_at': _utc_iso(event['created_at']),
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False
+    ).encode('utf-8')
+
+
+def compute_event_hash(previous_hash: str, event: Dict[str, Any]) -> str:
+    """SHA-256 of the previous hash followed by the canonical event"""
+    digest = hashlib.sha256(previous_hash.encode('ascii'))
+    digest.update(canonical_event(event))
+    return digest.hexdigest()
+
+
+def chain_events(previous_hash: str, events: List[Dict[str, Any]]) -> str:
+    """Set event_hash on each event in order; returns the last hash"""
+    for event in events:
+        previous_hash = compute_event_hash(previous_hash, event)
+        event['event_hash'] = previous_hash
+    return previous_hash
+
+
+def build_event(
+    event_type: str,
+    event_data: Optional[Dict] = None,
+    parcel_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    warehouse_id: Optional[UUID] = None,
+    device_id: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build an unhashed ledger event stamped with the current time"""
+    return {
+        'event_type': event_type,
+        'parcel_id': parcel_id,
+        'user_id': user_id,
+        'warehouse_id': warehouse_id,
+        # Round-trip so the hashed form matches what JSONB gives back
+        'event_data': json.loads(json.dumps(event_data or {}, default=str)),
+        'device_id': device_id,
+        'ip_address': _ip(ip_address),
+        'user_agent': user_agent,
+        'created_at': datetime.now(timezone.utc),
+    }
+
+
+def finalized_inspection_events(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """INSPECT and AUTO_RESOLVE events for a finalize_inspections result"""
+    inspection = result['inspection']
+    decision = result['auto_resolution']
+    common = {
+        'parcel_id': result['parcel_id'],
+        'warehouse_id': result.get('warehouse_id'),
+    }
+    return [
+        build_event(
+            'INSPECT',
+            {
+                'inspection_id': inspection.inspection_id,
+                'overall_status': inspection.overall_status,
+                'has_damage': inspection.has_damage,
+                'damage_count': inspection.damage_count,
+                'overall_confidence': inspection.overall_confidence,
+                'images_received': inspection.images_received,
+            },
+            **common
+        ),
+        build_event(
+            'AUTO_RESOLVE',
+            {
+                'inspection_id': inspection.inspection_id,
+                'action': decision['action'],
+                'can_auto_resolve': decision['can_auto_resolve'],
+                'rule_triggered': decision.get('rule_triggered'),
+                'parcel_status': result['parcel_status'],
+            },
+            **common
+        ),
+    ]
+
+
+@dataclass
+class _Pending:
+    event: Dict[str, Any]
+    future: Optional[asyncio.Future] = field(default=None)
+
+
+def _release(batch: List[_Pending]):
+    """Let callers waiting on these events return"""
+    for p in batch:
+        if p.future is not None and not p.future.done():
+            p.future.set_result(None)
+
+
+class AuditLedger:
+    """Process-wide buffered writer for event_log"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = async_session,
+        durability: str = "commit",
+        flush_interval_ms: int = 200,
+        max_batch: int = 1000,
+        max_buffer: int = 100000
+    ):
+        if durability not in ("commit", "interval"):
+            raise ValueError(f"Unknown audit ledger durability: {durability}")
+        self.session_factory = session_factory
+        self.durability = durability
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self._buffer: List[_Pending] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.events_written = 0
+        self.batches_written = 0
+        self.events_dropped = 0
+        self.events_dead_lettered = 0
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is buffered and stop the flusher"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        self._stopping = False
+
+        if self._buffer:
+            logger.error(f"Dropping {len(self._buffer)} audit events that could not be written")
+            _release(self._buffer)
+            self._buffer = []
+
+    async def record(self, event_type: str, event_data: Optional[Dict] = None, **fields) -> None:
+        """
+        Append one event
+
+        Args:
+            event_type: e.g. LOGIN, INSPECT, AUTO_RESOLVE
+            event_data: JSON-serializable details
+            **fields: parcel_id, user_id, warehouse_id, device_id,
+                ip_address, user_agent
+
+        A batch that cannot be written is logged and kept for a retry
+        (events the database rejects are dead-lettered); it is not raised.
+        """
+        await self.record_many([build_event(event_type, event_data, **fields)])
+
+    async def record_many(
+        self,
+        events: List[Dict[str, Any]],
+        session_factory: Optional[async_sessionmaker] = None
+    ) -> None:
+        """
+        Append events built with build_event, in order
+
+        session_factory is used when this process has no flusher.
+        """
+        if not events:
+            return
+
+        if self._task is None:
+            # No flusher in this process or event loop (e.g. Celery tasks):
+            # write now, together with anything an earlier write left behind
+            batch = self._buffer + [_Pending(event) for event in events]
+            self._buffer = []
+            unwritten = await self._write_batch(batch, session_factory=session_factory)
+            if unwritten:
+                self._requeue(unwritten)
+            return
+
+        if self.durability == "interval":
+            self._buffer.extend(_Pending(event) for event in events)
+            self._trim()
+            if len(self._buffer) >= self.max_batch:
+                self._wakeup.set()
+            return
+
+        loop = asyncio.get_running_loop()
+        pending = [_Pending(event, loop.create_future()) for event in events]
+        self._buffer.extend(pending)
+        self._wakeup.set()
+        await asyncio.gather(*(p.future for p in pending))
+
+    async def write(
+        self,
+        events: List[Dict[str, Any]],
+        session_factory: Optional[async_sessionmaker] = None
+    ) -> None:
+        """
+        Chain and write events now, in one transaction
+
+        Round-trips: advisory lock, last hash, COPY, commit
+
+        Raises:
+            AuditLedgerError: The batch was not written
+        """
+        session_factory = session_factory or self.session_factory
+
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                    {'lock_id': LEDGER_LOCK_ID}
+                )
+                result = await db.execute(
+                    text("SELECT event_hash FROM event_log ORDER BY event_id DESC LIMIT 1")
+                )
+                chain_events(result.scalar_one_or_none() or GENESIS_HASH, events)
+                await self._copy(db, events)
+                await db.commit()
+        except Exception as e:
+            for event in events:
+                event.pop('event_hash', None)
+            raise AuditLedgerError(
+                f"Failed to write {len(events)} audit events: {e}",
+                permanent=_is_permanent(e)
+            ) from e
+
+        self.events_written += len(events)
+        self.batches_written += 1
+
+    @staticmethod
+    async def _copy(db: AsyncSession, events: List[Dict[str, Any]]) -> None:
+        """COPY events through the session's asyncpg connection"""
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        records = [
+            tuple(
+                json.dumps(event[column]) if column == 'event_data'
+                else ipaddress.ip_interface(event[column]) if column == 'ip_address' and event[column]
+                else event.get(column)
+                for column in LEDGER_COLUMNS
+            )
+            for event in events
+        ]
+
+        await raw_connection.driver_connection.copy_records_to_table(
+            EventLog.__tablename__,
+            records=records,
+            columns=LEDGER_COLUMNS
+        )
+
+    async def _write_batch(
+        self,
+        batch: List[_Pending],
+        session_factory: Optional[async_sessionmaker] = None
+    ) -> List[_Pending]:
+        """
+        Write a batch, dead-lettering events the database rejects
+
+        On a permanent error the batch is split in halves and each half
+        written in order, down to the single events that fail.
+
+        Returns:
+            The events not written because of a transient error, in order,
+            to be requeued
+        """
+        try:
+            await self.write([p.event for p in batch], session_factory=session_factory)
+        except AuditLedgerError as e:
+            if not e.permanent:
+                # The work these events describe is already committed: keep
+                # them and retry later instead of failing callers
+                logger.error(f"{e}; keeping them for a retry")
+                return batch
+            if len(batch) == 1:
+                self._dead_letter(batch[0], e)
+                return []
+            middle = len(batch) // 2
+            unwritten = await self._write_batch(batch[:middle], session_factory)
+            if unwritten:
+                return unwritten + batch[middle:]
+            return await self._write_batch(batch[middle:], session_factory)
+
+        _release(batch)
+        return []
+
+    def _dead_letter(self, pending: _Pending, error: AuditLedgerError):
+        """Give up on an event the database rejects; its content goes to the log"""
+        _release([pending])
+        self.events_dead_lettered += 1
+        event = pending.event
+        logger.error(
+            f"Dead-lettered {event['event_type']} audit event at {event['created_at']} "
+            f"({error.__cause__ or error}): {canonical_event(event).decode('utf-8')}"
+        )
+
+    def _requeue(self, batch: List[_Pending]):
+        """Put a failed batch back at the head of the buffer, in order"""
+        self._buffer[:0] = [_Pending(p.event) for p in batch]
+        _release(batch)
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest events beyond max_buffer"""
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow <= 0:
+            return
+        dropped, self._buffer = self._buffer[:overflow], self._buffer[overflow:]
+        _release(dropped)
+        self.events_dropped += overflow
+        logger.error(
+            f"Audit buffer full ({self.max_buffer} events); dropped the {overflow} oldest, "
+            f"first {dropped[0].event['event_type']} at {dropped[0].event['created_at']}"
+        )
+
+    async def _flush_buffer(self):
+        batch, self._buffer = self._buffer[:self.max_batch], self._buffer[self.max_batch:]
+
+        unwritten = await self._write_batch(batch)
+        if unwritten:
+            self._requeue(unwritten)
+
+    async def _run(self):
+        while True:
+            # Commit durability also ticks while failed batches wait for a retry
+            if (self.durability == "interval" or self._buffer) and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._buffer:
+                before = len(self._buffer)
+                await self._flush_buffer()
+                if len(self._buffer) >= before:
+                    # Flush failed; retry on the next tick
+                    break
+
+            if self._stopping:
+                return
+
+    def stats(self) -> Dict:
+        return {
+            'durability': self.durability,
+            'buffered': len(self._buffer),
+            'events_written': self.events_written,
+            'batches_written': self.batches_written,
+            'events_dropped': self.events_dropped,
+            'events_dead_lettered': self.events_dead_lettered,
+        }
+
+
+# Singleton instance
+audit_ledger = AuditLedger(
+    durability=settings.AUDIT_LEDGER_DURABILITY,
+    flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+    max_batch=settings.AUDIT_FLUSH_MAX_EVENTS,
+    max_buffer=settings.AUDIT_BUFFER_MAX_EVENTS
+)
@@ -1,13 +1,17 @@
 """Auto-resolution service for automatic parcel decisions"""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from typing import Dict, Optional
 from uuid import UUID
 from datetime import datetime
 
 from app.models.parcel import Parcel
 from app.models.inspection import Inspection
-from app.models.system_setting import SystemSetting
+from app.models.shipment import Shipment
+from app.services.rollup_service import RollupService
+from app.services.settings_cache import auto_resolution_settings_cache
+from app.services.reference_data import reference_data_cache
+from app.services.rule_engine import build_features, rules_for_snapshot
 
 class AutoResolutionService:
     """Service for automatic parcel resolution decisions"""
@@ -15,24 +19,27 @@ class AutoResolutionService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.settings = {}
+        self.settings_version = 0
+        self.rules = None
+        self.reference = None
     
     async def load_settings(self):
-        """Load auto-resolution settings from database"""
-        result = await self.db.execute(
-            select(SystemSetting).where(
-                SystemSetting.category == 'auto_resolution',
-                SystemSetting.is_active == True
-            )
-        )
-        settings = result.scalars().all()
+        """
+        Load auto-resolution settings and the compiled rule set
         
-        for setting in settings:
-            if setting.value_type == 'number':
-                self.settings[setting.setting_key] = float(setting.setting_value)
-            elif setting.value_type == 'boolean':
-                self.settings[setting.setting_key] = setting.setting_value.lower() == 'true'
-            else:
-                self.settings[setting.setting_key] = setting.setting_value
+        Served from the process-wide settings cache; only queries the
+        database when the cache has been invalidated or its TTL expired.
+        Supplier and SKU lookups are loaded too when the rules use them.
+        """
+        snapshot = await auto_resolution_settings_cache.get(self.db)
+        self.settings = snapshot.values
+        self.settings_version = snapshot.version
+        self.rules = rules_for_snapshot(snapshot)
+        
+        if self.rules.uses('supplier_damage_rate') or self.rules.uses('unit_value'):
+            self.reference = await reference_data_cache.get(self.db)
+        else:
+            self.reference = None
     
     def get_setting(self, key: str, default=None):
         """Get setting value with fallback"""
@@ -52,124 +59,69 @@ class AutoResolutionService:
         # Load settings
         await self.load_settings()
         
-        # Get parcel and inspection
-        parcel_result = await self.db.execute(
-            select(Parcel).where(Parcel.parcel_id == parcel_id)
-        )
-        parcel = parcel_result.scalar_one()
-        
-        inspection_result = await self.db.execute(
-            select(Inspection).where(Inspection.inspection_id == inspection_id)
-        )
-        inspection = inspection_result.scalar_one()
-        
-        # Check if auto-resolution is enabled
-        if not self.get_setting('auto_approve_enabled', True):
-            return {
-                'can_auto_resolve': False,
-                'action': 'manual_review',
-                'reason': 'Auto-resolution disabled',
-                'confidence': 0.0
-            }
-        
-        # Check minimum images
-        min_images = self.get_setting('min_images_for_auto_resolution', 6)
-        if inspection.images_received < min_images:
-            return {
-                'can_auto_resolve': False,
-                'action': 'manual_review',
-                'reason': f'Insufficient images ({inspection.images_received}/{min_images})',
-                'confidence': 0.0
-            }
-        
-        # Get thresholds
-        approve_confidence = self.get_setting('auto_approve_confidence_threshold', 0.95)
-        quarantine_confidence = self.get_setting('auto_quarantine_confidence_threshold', 0.70)
-        max_damage_for_approve = self.get_setting('auto_approve_max_damage_score', 0.10)
-        min_damage_for_quarantine = self.get_setting('auto_quarantine_min_damage_score', 0.30)
-        
-        # Calculate damage score from inspection
-        damage_score = 0.0
-        if inspection.has_damage:
-            # Simple calculation: damage_count / images * average_confidence
-            if inspection.damage_count > 0:
-                damage_score = min(1.0, inspection.damage_count / inspection.images_received)
-        
-        # Decision logic
-        decision = self._make_decision(
-            inspection=inspection,
-            damage_score=damage_score,
-            approve_confidence=approve_confidence,
-            quarantine_confidence=quarantine_confidence,
-            max_damage_for_approve=max_damage_for_approve,
-            min_damage_for_quarantine=min_damage_for_quarantine
+        # Get inspection with the parcel's SKU and supplier
+        result = await self.db.execute(
+            select(Inspection, Parcel.sku_id, Shipment.supplier_id)
+            .join(Parcel, Parcel.parcel_id == Inspection.parcel_id)
+            .outerjoin(Shipment, Shipment.shipment_id == Parcel.shipment_id)
+            .where(Inspection.inspection_id == inspection_id)
         )
+        inspection, sku_id, supplier_id = result.one()
         
-        return decision
+        return self.evaluate_inspection(inspection, supplier_id=supplier_id, sku_id=sku_id)
     
-    def _make_decision(
+    def evaluate_inspection(
         self,
-        inspection: Inspection,
-        damage_score: float,
-        approve_confidence: float,
-        quarantine_confidence: float,
-        max_damage_for_approve: float,
-        min_damage_for_quarantine: float
+        inspection,
+        supplier_id: Optional[UUID] = None,
+        sku_id: Optional[UUID] = None
     ) -> Dict:
-        """Make resolution decision based on rules"""
-        
-        # Rule 1: No damage detected with high confidence → APPROVE
-        if not inspection.has_damage and inspection.overall_confidence >= approve_confidence:
-            return {
-                'can_auto_resolve': True,
-                'action': 'approved',
-                'reason': 'No damage detected with high confidence',
-                'confidence': inspection.overall_confidence,
-                'damage_score': damage_score,
-                'rule_triggered': 'no_damage_high_confidence'
-            }
-        
-        # Rule 2: Minor damage with low score → APPROVE
-        if damage_score <= max_damage_for_approve:
-            return {
-                'can_auto_resolve': True,
-                'action': 'approved',
-                'reason': 'Damage score below threshold for approval',
-                'confidence': inspection.overall_confidence,
-                'damage_score': damage_score,
-                'rule_triggered': 'minor_damage_acceptable'
-            }
+        """
+        Make auto-resolution decision for an already-loaded inspection
         
-        # Rule 3: Significant damage detected → QUARANTINE
-        if damage_score >= min_damage_for_quarantine and inspection.overall_confidence >= quarantine_confidence:
-            return {
-                'can_auto_resolve': True,
-                'action': 'quarantine',
-                'reason': 'Significant damage detected',
-                'confidence': inspection.overall_confidence,
-                'damage_score': damage_score,
-                'rule_triggered': 'damage_detected'
-            }
+        Requires settings to be loaded. Works on any object with has_damage,
+        damage_count, overall_confidence and images_received attributes, so
+        callers that already hold the inspection row avoid another query.
+        Supplier damage rate and SKU value come from in-memory lookups.
+        """
+        supplier_damage_rate = unit_value = None
+        if self.reference is not None:
+            supplier_damage_rate = reference_data_cache.supplier_damage_rate(self.reference, supplier_id)
+            unit_value = reference_data_cache.unit_value(self.reference, sku_id)
+        
+        features = build_features(
+            inspection,
+            supplier_damage_rate=supplier_damage_rate,
+            unit_value=unit_value
+        )
+        index = self.rules.evaluate(features)
+        rule = self.rules.outcomes[index]
         
-        # Rule 4: Low confidence → MANUAL REVIEW
-        if inspection.overall_confidence < quarantine_confidence:
+        return {
+            'can_auto_resolve': rule.can_auto_resolve,
+            'action': rule.action,
+            'reason': self.rules.reason(index, features),
+            'confidence': inspection.overall_confidence,
+            'damage_score': features['damage_score'],
+            'rule_triggered': rule.name
+        }
+    
+    @staticmethod
+    def resolution_values(decision: Dict, resolved_at: datetime) -> Dict:
+        """Parcel column values that record a decision"""
+        if decision['can_auto_resolve']:
             return {
-                'can_auto_resolve': False,
-                'action': 'manual_review',
-                'reason': 'Low detection confidence',
-                'confidence': inspection.overall_confidence,
-                'damage_score': damage_score,
-                'rule_triggered': 'low_confidence'
+                'auto_resolved': True,
+                'resolution_action': decision['action'],
+                'status': decision['action'],
+                'completed_at': resolved_at
             }
         
-        # Default: Manual review for edge cases
+        # completed_at is left as it was
         return {
-            'can_auto_resolve': False,
-            'action': 'manual_review',
-            'reason': 'Edge case - requires human judgment',
-            'confidence': inspection.overall_confidence,
-            'damage_score': damage_score,
-            'rule_triggered': 'edge_case'
+            'auto_resolved': False,
+            'resolution_action': None,
+            'status': 'manual_review'
         }
     
     async def apply_decision(
@@ -177,24 +129,40 @@ class AutoResolutionService:
         parcel_id: UUID,
         decision: Dict
     ):
-        """Apply auto-resolution decision to parcel"""
+        """
+        Apply auto-resolution decision to parcel
         
+        Rollup counters of the parcel's inspections move with its resolution.
+        
+        Round-trips: UPDATE ... RETURNING, rollups when the resolution
+        changed, commit
+        """
+        values = self.resolution_values(decision, datetime.utcnow())
+        
+        # Locked pre-update row, so RETURNING can report what changed
+        previous = (
+            select(Parcel.parcel_id, Parcel.auto_resolved, Parcel.resolution_action)
+            .where(Parcel.parcel_id == parcel_id)
+            .with_for_update()
+            .subquery()
+        )
         result = await self.db.execute(
-            select(Parcel).where(Parcel.parcel_id == parcel_id)
+            update(Parcel)
+            .where(Parcel.parcel_id == previous.c.parcel_id)
+            .values(**values)
+            .returning(Parcel, previous.c.auto_resolved, previous.c.resolution_action)
+            .execution_options(populate_existing=True)
         )
-        parcel = result.scalar_one()
+        parcel, previous_auto_resolved, previous_action = result.one()
         
-        if decision['can_auto_resolve']:
-            parcel.auto_resolved = True
-            parcel.resolution_action = decision['action']
-            parcel.status = decision['action']
-            parcel.completed_at = datetime.utcnow()
-        else:
-            parcel.auto_resolved = False
-            parcel.resolution_action = None
-            parcel.status = 'manual_review'
+        await RollupService.apply_resolution_changes(self.db, [{
+            'parcel_id': parcel.parcel_id,
+            'previous_auto_resolved': previous_auto_resolved,
+            'previous_action': previous_action,
+            'auto_resolved': parcel.auto_resolved,
+            'action': parcel.resolution_action
+        }])
         
         await self.db.commit()
-        await self.db.refresh(parcel)
         
         return parcel
@@ -0,0 +1,220 @@
+"""Bulk auto-resolution for whole shipments or parcel ID lists
+
+Evaluates the compiled auto-resolution rules vectorized over numpy
+columns, so thousands of parcels cost one read query and one set-based
+UPDATE.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from typing import Dict, List, Optional
+from uuid import UUID
+from datetime import datetime
+
+import numpy as np
+
+from app.models.parcel import Parcel
+from app.models.inspection import Inspection
+from app.models.shipment import Shipment
+from app.services.auto_resolution_service import AutoResolutionService
+from app.services.reference_data import reference_data_cache
+from app.services.rollup_service import RollupService
+from app.services.rule_engine import CompiledRuleSet, build_feature_columns
+
+
+def decide_batch(columns: Dict[str, np.ndarray], rules: CompiledRuleSet) -> Dict[str, np.ndarray]:
+    """
+    Vectorized auto-resolution decisions
+
+    Args:
+        columns: Feature columns from rule_engine.build_feature_columns
+        rules: Compiled rule set
+
+    Returns:
+        Dict of arrays: rule (index into rules.outcomes), action,
+        can_auto_resolve, rule_triggered
+    """
+    rule = rules.evaluate_batch(columns)
+
+    return {
+        'rule': rule,
+        'action': rules.actions[rule],
+        'can_auto_resolve': rules.auto[rule],
+        'rule_triggered': rules.names[rule],
+    }
+
+
+class BulkResolutionService:
+    """Evaluate and apply auto-resolution for many parcels at once"""
+
+    @staticmethod
+    def _latest_inspections_query(
+        shipment_id: Optional[UUID],
+        parcel_ids: Optional[List[UUID]]
+    ):
+        """Latest completed inspection of each selected parcel"""
+        query = (
+            select(
+                Parcel.parcel_id,
+                Inspection.inspection_id,
+                Inspection.has_damage,
+                Inspection.damage_count,
+                Inspection.overall_confidence,
+                Inspection.images_received,
+                Inspection.max_severity,
+                Parcel.sku_id,
+                Shipment.supplier_id
+            )
+            .join(Inspection, Inspection.parcel_id == Parcel.parcel_id)
+            .outerjoin(Shipment, Shipment.shipment_id == Parcel.shipment_id)
+            .where(Inspection.overall_status == 'completed')
+            .distinct(Parcel.parcel_id)
+            .order_by(Parcel.parcel_id, Inspection.completed_at.desc())
+        )
+
+        if shipment_id is not None:
+            query = query.where(Parcel.shipment_id == shipment_id)
+        if parcel_ids:
+            query = query.where(Parcel.parcel_id.in_(parcel_ids))
+
+        return query
+
+    @staticmethod
+    async def evaluate(
+        db: AsyncSession,
+        shipment_id: Optional[UUID] = None,
+        parcel_ids: Optional[List[UUID]] = None,
+        apply: bool = True
+    ) -> Dict:
+        """
+        Evaluate every parcel in a shipment (or ID list) and optionally apply
+
+        Round-trips: 1 read + 1 set-based UPDATE + 1 rollup statement +
+        commit, independent of the number of parcels (plus one settings
+        query on a cache miss).
+
+        Returns:
+            Dict with per-action counts and one decision per parcel that has
+            a completed inspection
+        """
+        if shipment_id is None and not parcel_ids:
+            raise ValueError("shipment_id or parcel_ids is required")
+
+        auto_service = AutoResolutionService(db)
+        await auto_service.load_settings()
+
+        result = await db.execute(
+            BulkResolutionService._latest_inspections_query(shipment_id, parcel_ids)
+        )
+        rows = result.all()
+
+        if not rows:
+            return {'evaluated': 0, 'applied': False, 'counts': {}, 'decisions': []}
+
+        (
+            parcel_id, inspection_id, has_damage, damage_count, confidence,
+            images, max_severity, sku_id, supplier_id
+        ) = zip(*rows)
+
+        rules = auto_service.rules
+        reference = auto_service.reference
+        columns = build_feature_columns(
+            has_damage=has_damage,
+            damage_count=damage_count,
+            overall_confidence=confidence,
+            images_received=images,
+            max_severity=max_severity,
+            supplier_damage_rate=(
+                [reference_data_cache.supplier_damage_rate(reference, i) for i in supplier_id]
+                if reference is not None else None
+            ),
+            unit_value=(
+                [reference_data_cache.unit_value(reference, i) for i in sku_id]
+                if reference is not None else None
+            )
+        )
+        decisions = decide_batch(columns, rules)
+
+        if apply:
+            await BulkResolutionService._apply(
+                db,
+                parcel_ids=list(parcel_id),
+                can_auto_resolve=decisions['can_auto_resolve'].tolist(),
+                actions=decisions['action'].tolist(),
+                resolved_at=datetime.utcnow()
+            )
+
+        actions, counts = np.unique(decisions['action'].astype(str), return_counts=True)
+
+        return {
+            'evaluated': len(rows),
+            'applied': apply,
+            'settings_version': auto_service.settings_version,
+            'counts': dict(zip(actions.tolist(), counts.tolist())),
+            'decisions': [
+                {
+                    'parcel_id': parcel_id[i],
+                    'inspection_id': inspection_id[i],
+                    'action': decisions['action'][i],
+                    'can_auto_resolve': bool(decisions['can_auto_resolve'][i]),
+                    'reason': rules.reason(
+                        decisions['rule'][i],
+                        {name: column[i] for name, column in columns.items()}
+                    ),
+                    'rule_triggered': decisions['rule_triggered'][i],
+                    'damage_score': float(columns['damage_score'][i]),
+                    'confidence': confidence[i]
+                }
+                for i in range(len(rows))
+            ]
+        }
+
+    @staticmethod
+    async def _apply(
+        db: AsyncSession,
+        parcel_ids: List[UUID],
+        can_auto_resolve: List[bool],
+        actions: List[str],
+        resolved_at: datetime
+    ) -> None:
+        """
+        Write every decision with one UPDATE ... FROM unnest(...)
+
+        Rollup counters move for parcels whose resolution changed.
+        """
+        # Same values as AutoResolutionService.resolution_values; the locked
+        # pre-update rows give the previous resolution for the rollups
+        result = await db.execute(
+            text("""
+                UPDATE parcels AS p
+                SET auto_resolved = d.auto_resolved,
+                    resolution_action = CASE WHEN d.auto_resolved THEN d.action END,
+                    status = CASE WHEN d.auto_resolved THEN d.action ELSE 'manual_review' END,
+                    completed_at = CASE WHEN d.auto_resolved THEN CAST(:resolved_at AS timestamp) ELSE p.completed_at END,
+                    updated_at = CAST(:resolved_at AS timestamp)
+                FROM unnest(
+                    CAST(:parcel_ids AS uuid[]),
+                    CAST(:auto_resolved AS boolean[]),
+                    CAST(:actions AS text[])
+                ) AS d(parcel_id, auto_resolved, action)
+                JOIN (
+                    SELECT parcel_id, auto_resolved, resolution_action
+                    FROM parcels
+                    WHERE parcel_id = ANY(CAST(:parcel_ids AS uuid[]))
+                    FOR UPDATE
+                ) AS previous ON previous.parcel_id = d.parcel_id
+                WHERE p.parcel_id = d.parcel_id
+                RETURNING p.parcel_id,
+                    previous.auto_resolved AS previous_auto_resolved,
+                    previous.resolution_action AS previous_action,
+                    p.auto_resolved,
+                    p.resolution_action AS action
+            """),
+            {
+                'parcel_ids': parcel_ids,
+                'auto_resolved': can_auto_resolve,
+                'actions': actions,
+                'resolved_at': resolved_at
+            }
+        )
+        await RollupService.apply_resolution_changes(db, result.mappings().all())
+        await db.commit()
@@ -0,0 +1,270 @@
+"""Damage claim service
+
+Claims are generated in bulk for a shipment or a parcel ID list. A claim is
+filed for each parcel whose latest completed inspection found damage,
+valued at the SKU's unit value scaled by the worst severity reported by the
+inspection or its detections. Selection is one set-based read and all
+claims are written with one INSERT ... SELECT FROM unnest(...) per
+CLAIM_INSERT_BATCH; claim numbers come from damage_claim_number_seq inside
+that statement. The (parcel_id, inspection_id) unique index makes
+generation idempotent: re-running skips parcels already claimed.
+"""
+from sqlalchemy import case, func, select, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+from app.db.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from app.models.damage_claim import DamageClaim
+from app.models.damage_detection import DamageDetection
+from app.models.inspection import Inspection
+from app.models.parcel import Parcel
+from app.models.shipment import Shipment
+from app.models.sku import Sku
+
+CLAIM_TYPES = ('supplier_damage', 'transit_damage', 'handling_damage', 'missing_items')
+
+# Severity rank -> share of the unit value claimed (rank 0: unknown)
+SEVERITY_RANKS = {'minor': 1, 'moderate': 2, 'severe': 3}
+SEVERITY_CLAIM_FACTORS = np.array([0.25, 0.25, 0.6, 1.0])
+
+# Claims written per INSERT statement (and per progress report)
+CLAIM_INSERT_BATCH = 5000
+
+INSERT_CLAIMS_SQL = """
+    INSERT INTO damage_claims (
+        claim_number, parcel_id, inspection_id, supplier_id, claim_type,
+        claimed_value, currency, status, filed_by_user_id
+    )
+    SELECT
+        'CLM-' || to_char(CURRENT_TIMESTAMP AT TIME ZONE 'UTC', 'YYYYMMDD') || '-'
+            || lpad(nextval('damage_claim_number_seq')::TEXT, 8, '0'),
+        c.parcel_id, c.inspection_id, c.supplier_id, :claim_type,
+        c.claimed_value, c.currency, 'submitted', :filed_by_user_id
+    FROM unnest(
+        CAST(:parcel_ids AS UUID[]),
+        CAST(:inspection_ids AS UUID[]),
+        CAST(:supplier_ids AS UUID[]),
+        CAST(:claimed_values AS NUMERIC[]),
+        CAST(:currencies AS TEXT[])
+    ) AS c(parcel_id, inspection_id, supplier_id, claimed_value, currency)
+    ORDER BY c.parcel_id
+    ON CONFLICT (parcel_id, inspection_id) DO NOTHING
+    RETURNING claim_id, claim_number, parcel_id, inspection_id, supplier_id, claimed_value, currency
+"""
+
+
+def severity_rank(severity: Optional[str]) -> int:
+    return SEVERITY_RANKS.get((severity or '').lower(), 0)
+
+
+def claim_values(unit_values: np.ndarray, severity_ranks: np.ndarray) -> np.ndarray:
+    """Claimed value per parcel (NaN where the unit value is unknown), to the cent"""
+    values = unit_values.astype(np.float64) * SEVERITY_CLAIM_FACTORS[severity_ranks]
+    return np.round(values, 2)
+
+
+class ClaimService:
+    """Service for damage claims"""
+    
+    @staticmethod
+    async def list_claims(
+        db: AsyncSession,
+        status: Optional[str] = None,
+        warehouse_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None,
+        claim_type: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict:
+        """
+        Claims, newest first, one keyset page at a time
+        
+        Ordered by (created_at, claim_id); warehouse is the claimed
+        parcel's current warehouse.
+        """
+        query = select(DamageClaim)
+        if status is not None:
+            query = query.where(DamageClaim.status == status)
+        if warehouse_id is not None:
+            query = query.where(DamageClaim.parcel_id.in_(
+                select(Parcel.parcel_id).where(Parcel.current_warehouse_id == warehouse_id)
+            ))
+        if supplier_id is not None:
+            query = query.where(DamageClaim.supplier_id == supplier_id)
+        if claim_type is not None:
+            query = query.where(DamageClaim.claim_type == claim_type)
+        
+        return await keyset_page(
+            db,
+            query,
+            sort_column=DamageClaim.created_at,
+            key_column=DamageClaim.claim_id,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    
+    @staticmethod
+    async def get_evidence_package(db: AsyncSession, claim_id: UUID) -> Optional[Dict]:
+        """Claim number and evidence package path, or None for an unknown claim"""
+        row = (await db.execute(
+            select(DamageClaim.claim_number, DamageClaim.evidence_package_url)
+            .where(DamageClaim.claim_id == claim_id)
+        )).first()
+        if row is None:
+            return None
+        return {'claim_number': row.claim_number, 'evidence_package_url': row.evidence_package_url}
+    
+    @staticmethod
+    def _claim_candidates_query(
+        shipment_id: Optional[UUID],
+        parcel_ids: Optional[List[UUID]],
+        inspection_id: Optional[UUID] = None
+    ):
+        """
+        Latest completed inspection of each selected parcel, with supplier,
+        SKU value and its detections' count and worst severity rank
+        """
+        rank = case(
+            *((func.lower(DamageDetection.severity) == name, value) for name, value in SEVERITY_RANKS.items()),
+            else_=0
+        )
+        detections = (
+            select(
+                func.count().label('detections'),
+                func.coalesce(func.max(rank), 0).label('detection_severity_rank')
+            )
+            .where(DamageDetection.inspection_id == Inspection.inspection_id)
+            .lateral()
+        )
+        query = (
+            select(
+                Parcel.parcel_id,
+                Inspection.inspection_id,
+                Inspection.has_damage,
+                Inspection.max_severity,
+                Shipment.supplier_id,
+                Sku.unit_value,
+                Sku.currency,
+                detections.c.detections,
+                detections.c.detection_severity_rank
+            )
+            .join(Inspection, Inspection.parcel_id == Parcel.parcel_id)
+            .join(detections, true())
+            .outerjoin(Shipment, Shipment.shipment_id == Parcel.shipment_id)
+            .outerjoin(Sku, Sku.sku_id == Parcel.sku_id)
+            .where(Inspection.overall_status == 'completed')
+            .distinct(Parcel.parcel_id)
+            .order_by(Parcel.parcel_id, Inspection.completed_at.desc())
+        )
+        
+        if shipment_id is not None:
+            query = query.where(Parcel.shipment_id == shipment_id)
+        if parcel_ids:
+            query = query.where(Parcel.parcel_id.in_(parcel_ids))
+        if inspection_id is not None:
+            query = query.where(Inspection.inspection_id == inspection_id)
+        
+        return query
+    
+    @staticmethod
+    async def generate_claims(
+        db: AsyncSession,
+        shipment_id: Optional[UUID] = None,
+        parcel_ids: Optional[List[UUID]] = None,
+        inspection_id: Optional[UUID] = None,
+        claim_type: str = 'supplier_damage',
+        filed_by_user_id: Optional[UUID] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        File claims for the damaged parcels of a shipment or ID list
+        
+        Round-trips: 1 read + 1 INSERT per CLAIM_INSERT_BATCH claims +
+        commit, independent of the number of parcels.
+        
+        Args:
+            inspection_id: Claim this inspection instead of each parcel's
+                latest completed one
+            on_progress: Called with (claims written, claims to write)
+                after each INSERT
+        
+        Returns:
+            Dict with the created claims, their total value and skipped
+            parcel counts per reason (not_damaged, no_unit_value,
+            already_claimed)
+        
+        Raises:
+            ValueError: Without a selection or on an unknown claim type
+        """
+        if shipment_id is None and not parcel_ids:
+            raise ValueError("shipment_id or parcel_ids is required")
+        if claim_type not in CLAIM_TYPES:
+            raise ValueError(f"claim_type must be one of: {', '.join(CLAIM_TYPES)}")
+        
+        result = await db.execute(
+            ClaimService._claim_candidates_query(shipment_id, parcel_ids, inspection_id)
+        )
+        rows = result.all()
+        skipped = {'not_damaged': 0, 'no_unit_value': 0, 'already_claimed': 0}
+        
+        damaged = [row for row in rows if row.has_damage]
+        skipped['not_damaged'] = len(rows) - len(damaged)
+        if not damaged:
+            return {
+                'evaluated': len(rows),
+                'created': 0,
+                'total_claimed_value': 0.0,
+                'skipped': skipped,
+                'claims': []
+            }
+        
+        ranks = np.array([
+            max(severity_rank(row.max_severity), row.detection_severity_rank) for row in damaged
+        ], dtype=np.int64)
+        unit_values = np.array(
+            [np.nan if row.unit_value is None else float(row.unit_value) for row in damaged]
+        )
+        values = claim_values(unit_values, ranks)
+        
+        valued = ~np.isnan(values)
+        skipped['no_unit_value'] = int((~valued).sum())
+        candidates = [(row, float(value)) for row, value, ok in zip(damaged, values, valued) if ok]
+        
+        claims = []
+        for start in range(0, len(candidates), CLAIM_INSERT_BATCH):
+            batch = candidates[start:start + CLAIM_INSERT_BATCH]
+            inserted = await db.execute(
+                text(INSERT_CLAIMS_SQL),
+                {
+                    'claim_type': claim_type,
+                    'filed_by_user_id': filed_by_user_id,
+                    'parcel_ids': [row.parcel_id for row, _ in batch],
+                    'inspection_ids': [row.inspection_id for row, _ in batch],
+                    'supplier_ids': [row.supplier_id for row, _ in batch],
+                    'claimed_values': [value for _, value in batch],
+                    'currencies': [row.currency or 'USD' for row, _ in batch],
+                }
+            )
+            claims.extend(dict(row._mapping) for row in inserted)
+            if on_progress is not None:
+                on_progress(start + len(batch), len(candidates))
+        await db.commit()
+        
+        skipped['already_claimed'] = len(candidates) - len(claims)
+        detections = {row.inspection_id: row.detections for row in damaged}
+        for claim in claims:
+            claim['claimed_value'] = float(claim['claimed_value'])
+            claim['detections'] = detections[claim['inspection_id']]
+        
+        return {
+            'evaluated': len(rows),
+            'created': len(claims),
+            'total_claimed_value': round(sum(claim['claimed_value'] for claim in claims), 2),
+            'skipped': skipped,
+            'claims': claims
+        }
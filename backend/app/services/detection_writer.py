@@ -0,0 +1,153 @@
+"""Bulk writer for damage detections"""
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.damage_detection import DamageDetection
+
+# Severity levels, lowest first
+SEVERITY_LEVELS = ('minor', 'moderate', 'severe')
+
+# Column order used for COPY
+DETECTION_COLUMNS = (
+    'detection_id',
+    'inspection_id',
+    'image_id',
+    'damage_type',
+    'confidence',
+    'severity',
+    'bbox_x1',
+    'bbox_y1',
+    'bbox_x2',
+    'bbox_y2',
+    'model_name',
+    'model_version',
+    'detection_metadata',
+    'detected_at',
+    'created_at',
+)
+
+
+def build_detection_rows(
+    inspection_id: UUID,
+    image_id: UUID,
+    ml_result: Dict,
+    detected_at: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Build damage_detections rows from an ML analysis result
+
+    Class name, confidence and box already have their own columns, so only
+    the remaining fields (class_id) are kept in detection_metadata.
+    """
+    detected_at = detected_at or datetime.utcnow()
+    rows = []
+
+    for detection_data in ml_result.get('detections', []):
+        bbox = detection_data.get('bbox', {})
+        rows.append({
+            'detection_id': uuid.uuid4(),
+            'inspection_id': inspection_id,
+            'image_id': image_id,
+            'damage_type': detection_data.get('class_name', 'unknown'),
+            'confidence': detection_data.get('confidence', 0.0),
+            'severity': "moderate",  # Default
+            'bbox_x1': bbox.get('x1'),
+            'bbox_y1': bbox.get('y1'),
+            'bbox_x2': bbox.get('x2'),
+            'bbox_y2': bbox.get('y2'),
+            'model_name': "YOLOv8n",
+            'model_version': "8.0",
+            'detection_metadata': {'class_id': detection_data.get('class_id')},
+            'detected_at': detected_at,
+            'created_at': detected_at,
+        })
+
+    return rows
+
+
+def summarize_detection_rows(rows: List[Dict]) -> Dict:
+    """
+    Aggregate detection rows into the running totals kept on an inspection
+
+    Returns:
+        Dict with damage_count, confidence_sum, max_severity and a
+        damage_types histogram ({damage_type: count})
+    """
+    damage_types: Dict[str, int] = {}
+    max_rank = -1
+
+    for row in rows:
+        damage_types[row['damage_type']] = damage_types.get(row['damage_type'], 0) + 1
+        if row['severity'] in SEVERITY_LEVELS:
+            max_rank = max(max_rank, SEVERITY_LEVELS.index(row['severity']))
+
+    return {
+        'damage_count': len(rows),
+        'confidence_sum': sum(row['confidence'] or 0.0 for row in rows),
+        'max_severity': SEVERITY_LEVELS[max_rank] if max_rank >= 0 else None,
+        'damage_types': damage_types,
+    }
+
+
+class DetectionWriter:
+    """Writes damage detections with one statement per batch"""
+
+    @staticmethod
+    async def write(
+        db: AsyncSession,
+        rows: List[Dict],
+        method: Optional[str] = None
+    ) -> int:
+        """
+        Insert detection rows in the session's current transaction
+
+        Args:
+            rows: Rows from build_detection_rows (one image or many)
+            method: "copy" (asyncpg COPY) or "executemany"; defaults to
+                settings.DETECTION_WRITE_METHOD
+
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+
+        method = method or settings.DETECTION_WRITE_METHOD
+
+        if method == "copy":
+            await DetectionWriter._copy(db, rows)
+        elif method == "executemany":
+            await db.execute(insert(DamageDetection), rows)
+        else:
+            raise ValueError(f"Unknown detection write method: {method}")
+
+        return len(rows)
+
+    @staticmethod
+    async def _copy(db: AsyncSession, rows: List[Dict]) -> None:
+        """COPY rows through the session's asyncpg connection"""
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        # The SQLAlchemy asyncpg dialect registers a jsonb codec that takes
+        # already-serialized JSON text
+        records = [
+            tuple(
+                json.dumps(row[column]) if column == 'detection_metadata' else row[column]
+                for column in DETECTION_COLUMNS
+            )
+            for row in rows
+        ]
+
+        await raw_connection.driver_connection.copy_records_to_table(
+            DamageDetection.__tablename__,
+            records=records,
+            columns=DETECTION_COLUMNS
+        )
@@ -0,0 +1,174 @@
+"""Inspection progress event fan-out
+
+Events are published per inspection and per warehouse. With the redis
+backend, every API process subscribes to the inspection-events:* channels
+and fans messages out to its local SSE subscribers, so events published by
+Celery workers reach browsers connected to any API process. The memory
+backend keeps everything in-process (single-process development).
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "inspection-events"
+
+# Per-subscriber buffer; slow consumers drop their oldest events
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def inspection_channel(inspection_id) -> str:
+    """Channel name for one inspection's events"""
+    return f"{CHANNEL_PREFIX}:inspection:{inspection_id}"
+
+
+def warehouse_channel(warehouse_id) -> str:
+    """Channel name for all inspection events in a warehouse"""
+    return f"{CHANNEL_PREFIX}:warehouse:{warehouse_id}"
+
+
+def build_event(event_type: str, inspection_id, data: Dict, warehouse_id=None) -> Dict:
+    """Build an event payload"""
+    return {
+        'type': event_type,
+        'inspection_id': str(inspection_id),
+        'warehouse_id': str(warehouse_id) if warehouse_id else None,
+        'data': data,
+        'emitted_at': datetime.utcnow().isoformat()
+    }
+
+
+def _event_channels(event: Dict):
+    channels = [inspection_channel(event['inspection_id'])]
+    if event['warehouse_id']:
+        channels.append(warehouse_channel(event['warehouse_id']))
+    return channels
+
+
+class InspectionEventBus:
+    """Publish/subscribe hub for inspection progress events"""
+
+    def __init__(self, backend: str = "redis"):
+        self.backend = backend
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._redis: Optional[aioredis.Redis] = None
+        self._sync_redis: Optional[redis.Redis] = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start relaying Redis messages to local subscribers"""
+        if self.backend != "redis" or self._listener_task is not None:
+            return
+
+        self._redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info("📡 Inspection event bus listening on Redis")
+
+    async def stop(self):
+        """Stop the Redis relay"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        """Register a local subscriber queue for a channel"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        """Remove a local subscriber queue"""
+        queues = self._subscribers.get(channel)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[channel]
+
+    async def publish(self, event_type: str, inspection_id, data: Dict, warehouse_id=None):
+        """
+        Publish an event from the API process
+
+        Failures are logged, never raised: progress events must not break
+        the request that produced them.
+        """
+        event = build_event(event_type, inspection_id, data, warehouse_id)
+
+        if self.backend != "redis":
+            for channel in _event_channels(event):
+                self._dispatch(channel, event)
+            return
+
+        try:
+            if self._redis is None:
+                self._redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+            payload = json.dumps(event, default=str)
+            for channel in _event_channels(event):
+                await self._redis.publish(channel, payload)
+        except Exception as e:
+            logger.warning(f"Failed to publish {event_type} event: {e}")
+
+    def publish_sync(self, event_type: str, inspection_id, data: Dict, warehouse_id=None):
+        """Publish an event from a Celery worker (blocking Redis client)"""
+        if self.backend != "redis":
+            # Workers run in another process; in-memory events can't reach the API
+            return
+
+        event = build_event(event_type, inspection_id, data, warehouse_id)
+
+        try:
+            if self._sync_redis is None:
+                self._sync_redis = redis.Redis.from_url(settings.REDIS_URL)
+            payload = json.dumps(event, default=str)
+            for channel in _event_channels(event):
+                self._sync_redis.publish(channel, payload)
+        except Exception as e:
+            logger.warning(f"Failed to publish {event_type} event: {e}")
+
+    def _dispatch(self, channel: str, event: Dict):
+        """Deliver an event to local subscribers of a channel"""
+        for queue in list(self._subscribers.get(channel, ())):
+            if queue.full():
+                # Drop the oldest event rather than block the publisher
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _listen(self):
+        """Relay Redis pub/sub messages to local subscribers, reconnecting on errors"""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    if message['channel'] not in self._subscribers:
+                        continue
+                    self._dispatch(message['channel'], json.loads(message['data']))
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus Redis connection lost: {e}; retrying")
+                await pubsub.close()
+                await asyncio.sleep(1)
+
+
+# Singleton instance
+event_bus = InspectionEventBus(backend=settings.EVENT_BUS_BACKEND)
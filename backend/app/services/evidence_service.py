@@ -0,0 +1,347 @@
+"""Evidence packages for damage claims
+
+A package is a zip in the storage backend holding claim.json (claim,
+parcel, inspection and every detection), evidence.pdf (a summary page plus
+one page per annotated image) and the annotated images themselves. As with
+exports, only the local backend is supported: other STORAGE_BACKEND values
+raise ValueError.
+
+Annotating an image (decode, draw the detection boxes, re-encode) is the
+expensive part, so renders run in a process pool and are cached on disk by
+(image_id, model_version): detections of an image are written once per
+model version, so a cached render stays valid and rebuilding a disputed
+claim's package only re-assembles the zip. The zip is written straight to
+the storage path (entries are copied in chunks) and swapped into place
+once complete.
+
+Like the ledger verifier, this reads through psycopg2: builds run in a
+worker process, not on the event loop. The render pool is a billiard.Pool
+(Celery's fork of multiprocessing), which unlike the standard library may
+be started from Celery's daemonic prefork children, so builds in a default
+worker render with EVIDENCE_WORKERS processes.
+"""
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import psycopg2
+import psycopg2.extras
+from billiard import Pool
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest side of an annotated image; larger images are downscaled
+EVIDENCE_IMAGE_MAX_SIDE = 1600
+
+EVIDENCE_JPEG_QUALITY = 85
+
+# Box outline per detection severity
+SEVERITY_COLORS = {
+    'severe': (220, 38, 38),
+    'moderate': (234, 88, 12),
+    'minor': (202, 138, 4),
+}
+DEFAULT_BOX_COLOR = (37, 99, 235)
+
+# Summary page: A4 at 150 dpi
+SUMMARY_PAGE_SIZE = (1240, 1754)
+
+# Copy buffer for zip entries
+COPY_CHUNK_SIZE = 1024 * 1024
+
+CLAIM_SQL = """
+    SELECT c.claim_id, c.claim_number, c.claim_type, c.claimed_value, c.currency,
+           c.status, c.created_at, c.inspection_id,
+           p.parcel_id, p.tracking_number, p.current_warehouse_id AS warehouse_id,
+           s.supplier_code, s.name AS supplier_name,
+           k.sku_code, k.name AS sku_name, k.unit_value,
+           i.inspection_type, i.started_at, i.completed_at, i.max_severity,
+           i.damage_count, i.overall_confidence
+    FROM damage_claims c
+    LEFT JOIN parcels p ON p.parcel_id = c.parcel_id
+    LEFT JOIN suppliers s ON s.supplier_id = c.supplier_id
+    LEFT JOIN skus k ON k.sku_id = p.sku_id
+    LEFT JOIN inspections i ON i.inspection_id = c.inspection_id
+    WHERE c.claim_id = %s
+"""
+
+IMAGES_SQL = """
+    SELECT image_id, angle, file_path, width, height
+    FROM inspection_images
+    WHERE inspection_id = %s
+    ORDER BY sequence_number NULLS LAST, angle
+"""
+
+DETECTIONS_SQL = """
+    SELECT detection_id, image_id, damage_type, confidence, severity,
+           bbox_x1, bbox_y1, bbox_x2, bbox_y2, model_name, model_version, detected_at
+    FROM damage_detections
+    WHERE inspection_id = %s
+    ORDER BY image_id, confidence DESC
+"""
+
+
+def _storage_root() -> Path:
+    if settings.STORAGE_BACKEND != 'local':
+        raise ValueError(f"Evidence packages are not supported on the {settings.STORAGE_BACKEND} storage backend")
+    return Path(settings.LOCAL_STORAGE_PATH) / 'evidence'
+
+
+def annotation_cache_path(image_id: UUID, model_version: Optional[str]) -> Path:
+    """Cached render of an image annotated with one model version's detections"""
+    version = re.sub(r'[^A-Za-z0-9._-]', '_', model_version or 'none')
+    return _storage_root() / 'annotations' / f"{image_id}_{version}.jpg"
+
+
+def package_path(claim_number: str) -> Path:
+    """Destination of a claim's evidence package"""
+    return _storage_root() / 'packages' / f"{re.sub(r'[^A-Za-z0-9._-]', '_', claim_number)}.zip"
+
+
+def render_annotation(
+    source_path: str,
+    target_path: str,
+    boxes: Sequence[Tuple[float, float, float, float, str, Optional[str]]]
+) -> str:
+    """
+    Draw detection boxes on an image and save it as JPEG
+
+    Module-level so process pool workers can run it.
+
+    Args:
+        boxes: (x1, y1, x2, y2, label, severity) in source pixels
+
+    Returns:
+        target_path, written atomically
+    """
+    with Image.open(source_path) as source:
+        image = source.convert('RGB')
+    scale = min(1.0, EVIDENCE_IMAGE_MAX_SIDE / max(image.size))
+    if scale < 1.0:
+        image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+    draw = ImageDraw.Draw(image)
+    line = max(2, round(max(image.size) / 400))
+    font = ImageFont.load_default(size=max(12, round(max(image.size) / 60)))
+    for x1, y1, x2, y2, label, severity in boxes:
+        color = SEVERITY_COLORS.get((severity or '').lower(), DEFAULT_BOX_COLOR)
+        box = [x1 * scale, y1 * scale, x2 * scale, y2 * scale]
+        draw.rectangle(box, outline=color, width=line)
+        left, top, right, bottom = draw.textbbox((box[0], box[1]), label, font=font)
+        text_top = max(0, box[1] - (bottom - top) - 2 * line)
+        draw.rectangle([box[0], text_top, box[0] + right - left + 2 * line, text_top + bottom - top + 2 * line], fill=color)
+        draw.text((box[0] + line, text_top + line - top + box[1]), label, fill=(255, 255, 255), font=font)
+
+    target = Path(target_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f"{target.name}.{os.getpid()}.partial")
+    image.save(partial, 'JPEG', quality=EVIDENCE_JPEG_QUALITY)
+    os.replace(partial, target)
+    return target_path
+
+
+def _label(detection: Dict) -> str:
+    confidence = detection['confidence']
+    if confidence is None:
+        return detection['damage_type'] or 'damage'
+    return f"{detection['damage_type'] or 'damage'} {float(confidence):.0%}"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _summary_page(claim: Dict, images: List[Dict]) -> Image.Image:
+    page = Image.new('RGB', SUMMARY_PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=24)
+    lines = [
+        f"Damage claim {claim['claim_number']}",
+        '',
+        f"Type: {claim['claim_type']}    Status: {claim['status']}",
+        f"Claimed value: {claim['claimed_value']} {claim['currency']}",
+        f"Parcel: {claim['tracking_number']} ({claim['parcel_id']})",
+        f"Supplier: {claim['supplier_name'] or '-'} ({claim['supplier_code'] or '-'})",
+        f"SKU: {claim['sku_name'] or '-'} ({claim['sku_code'] or '-'}), unit value {claim['unit_value']}",
+        f"Inspection: {claim['inspection_id']} ({claim['inspection_type']})",
+        f"Completed: {claim['completed_at']}    Max severity: {claim['max_severity'] or '-'}",
+        f"Detections: {claim['damage_count']}    Confidence: {claim['overall_confidence']}",
+        '',
+        'Images:',
+    ]
+    lines += [
+        f"  {image['angle']}: {len(image['detections'])} detection(s)"
+        + ('' if image['annotated'] else ' (image file missing)')
+        for image in images
+    ]
+    y = 80
+    for text in lines:
+        draw.text((80, y), text, fill=(0, 0, 0), font=font)
+        y += 36
+    return page
+
+
+def _write_pdf(claim: Dict, images: List[Dict]) -> bytes:
+    pages = [Image.open(image['annotated']) for image in images if image['annotated']]
+    try:
+        pdf = io.BytesIO()
+        _summary_page(claim, images).save(pdf, 'PDF', resolution=150, save_all=True, append_images=pages)
+        return pdf.getvalue()
+    finally:
+        for page in pages:
+            page.close()
+
+
+def _load(connection, claim_id: UUID) -> Tuple[Dict, List[Dict], List[Dict]]:
+    with connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+        cursor.execute(CLAIM_SQL, (str(claim_id),))
+        claim = cursor.fetchone()
+        if claim is None:
+            raise ValueError(f"Claim {claim_id} not found")
+        if claim['inspection_id'] is None:
+            raise ValueError(f"Claim {claim['claim_number']} has no inspection")
+        cursor.execute(IMAGES_SQL, (str(claim['inspection_id']),))
+        images = [dict(row) for row in cursor.fetchall()]
+        cursor.execute(DETECTIONS_SQL, (str(claim['inspection_id']),))
+        detections = [dict(row) for row in cursor.fetchall()]
+    return dict(claim), images, detections
+
+
+def _copy_into(archive: zipfile.ZipFile, source: Path, name: str):
+    with open(source, 'rb') as src, archive.open(zipfile.ZipInfo(name, time.localtime()[:6]), 'w') as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+
+def build_evidence_package(
+    dsn: str,
+    claim_id: UUID,
+    workers: Optional[int] = None,
+    on_stage: Optional[Callable[[str, Dict], None]] = None
+) -> Dict:
+    """
+    Build (or rebuild) a claim's evidence package and record its URL
+
+    Args:
+        workers: Render processes (default: settings.EVIDENCE_WORKERS)
+        on_stage: Called with (stage, details) as the build progresses
+
+    Returns:
+        Path, claim number, bytes, image counts (rendered vs cached) and
+        seconds
+
+    Raises:
+        ValueError: Unknown claim, claim without an inspection, or a
+            storage backend without local paths
+    """
+    started = time.perf_counter()
+    workers = workers or settings.EVIDENCE_WORKERS
+    connection = psycopg2.connect(dsn)
+    try:
+        claim, images, detections = _load(connection, claim_id)
+
+        by_image: Dict[UUID, List[Dict]] = {}
+        for detection in detections:
+            by_image.setdefault(detection['image_id'], []).append(detection)
+
+        renders = []
+        for image in images:
+            image['detections'] = by_image.get(image['image_id'], [])
+            # The version of the most recent run ('10' sorts before '9' as text)
+            latest = max(
+                (d for d in image['detections'] if d['model_version']),
+                key=lambda d: d['detected_at'],
+                default=None
+            )
+            image['model_version'] = latest['model_version'] if latest else None
+            image['annotated'] = str(annotation_cache_path(image['image_id'], image['model_version']))
+            if not os.path.exists(image['annotated']):
+                if image['file_path'] and os.path.exists(image['file_path']):
+                    boxes = [
+                        (d['bbox_x1'], d['bbox_y1'], d['bbox_x2'], d['bbox_y2'], _label(d), d['severity'])
+                        for d in image['detections']
+                        if d['model_version'] == image['model_version'] and None not in (
+                            d['bbox_x1'], d['bbox_y1'], d['bbox_x2'], d['bbox_y2']
+                        )
+                    ]
+                    renders.append((image['file_path'], image['annotated'], boxes))
+                else:
+                    image['annotated'] = None
+
+        if on_stage is not None:
+            on_stage('render', {'images': len(images), 'rendering': len(renders)})
+        if len(renders) == 1 or workers == 1:
+            for render in renders:
+                render_annotation(*render)
+        elif renders:
+            with Pool(processes=min(workers, len(renders))) as pool:
+                pool.starmap(render_annotation, renders)
+
+        if on_stage is not None:
+            on_stage('package', {'images': len(images)})
+        manifest = {
+            'claim': claim,
+            'images': [
+                {key: image[key] for key in ('image_id', 'angle', 'width', 'height', 'model_version')}
+                | {'file': f"images/{image['angle']}_{image['image_id']}.jpg" if image['annotated'] else None}
+                for image in images
+            ],
+            'detections': detections,
+            'generated_at': datetime.utcnow(),
+        }
+
+        path = package_path(claim['claim_number'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+        with zipfile.ZipFile(partial, 'w') as archive:
+            archive.writestr(
+                'claim.json',
+                json.dumps(manifest, default=_json_default, indent=2),
+                compress_type=zipfile.ZIP_DEFLATED
+            )
+            archive.writestr('evidence.pdf', _write_pdf(claim, images))
+            # JPEGs are stored: recompressing them saves nothing
+            for image, entry in zip(images, manifest['images']):
+                if image['annotated']:
+                    _copy_into(archive, Path(image['annotated']), entry['file'])
+        os.replace(partial, path)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE damage_claims SET evidence_package_url = %s, updated_at = CURRENT_TIMESTAMP "
+                "WHERE claim_id = %s",
+                (str(path), str(claim_id))
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+    seconds = time.perf_counter() - started
+    logger.info(f"Built evidence package {path} ({len(renders)} images rendered) in {seconds:.2f}s")
+    return {
+        'claim_id': str(claim_id),
+        'claim_number': claim['claim_number'],
+        'path': str(path),
+        'bytes': path.stat().st_size,
+        'images': len(images),
+        'rendered': len(renders),
+        'cached': sum(1 for image in images if image['annotated']) - len(renders),
+        'missing': sum(1 for image in images if not image['annotated']),
+        'seconds': round(seconds, 3),
+    }
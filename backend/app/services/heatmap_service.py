@@ -0,0 +1,387 @@
+"""Damage hotspot heatmaps from detection bounding boxes
+
+Boxes are normalized by their image's width and height and accumulated
+into HEATMAP_GRID_SIZE x HEATMAP_GRID_SIZE grids (row = y, column = x).
+A cell counts the boxes that overlap it. Accumulation is vectorized: each
+box adds four corners to a 2-D difference array (one np.bincount for all
+boxes and groups), and two cumulative sums turn it into coverage counts.
+
+Grids are materialized per UTC day x angle x packaging type in
+damage_heatmap_daily, so a heatmap over a date range sums stored grids
+instead of re-reading detections. A day is recomputed on read until it
+was last computed HEATMAP_SETTLE after its end (late detections). Supplier
+heatmaps are not materialized and are accumulated from detections on read.
+Stale days are materialized HEATMAP_MATERIALIZE_BATCH days per query.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.rollup_service import day_bucket, utc
+
+HEATMAP_GRID_SIZE = 32
+
+# Longest window one heatmap may cover
+HEATMAP_MAX_DAYS = 366
+
+# Materialized days are final once computed this long after the day ended
+HEATMAP_SETTLE = timedelta(hours=1)
+
+# Days materialized per detection query and transaction
+HEATMAP_MATERIALIZE_BATCH = 31
+
+# Stored cell counts: little-endian int32, row-major
+CELL_DTYPE = np.dtype('<i4')
+
+DETECTION_BOXES_SQL = """
+    SELECT (d.detected_at AT TIME ZONE 'UTC')::DATE AS day, img.angle, p.packaging_type_id,
+           d.bbox_x1, d.bbox_y1, d.bbox_x2, d.bbox_y2, img.width, img.height
+    FROM damage_detections d
+    JOIN inspection_images img ON img.image_id = d.image_id
+    JOIN inspections i ON i.inspection_id = d.inspection_id
+    JOIN parcels p ON p.parcel_id = i.parcel_id
+    {supplier_join}
+    WHERE d.detected_at >= :start AND d.detected_at < :end
+      {filters}
+"""
+
+MATERIALIZE_SQL = """
+    INSERT INTO damage_heatmap_daily (day, angle, packaging_type_id, grid_size, detections, cells)
+    SELECT g.day, g.angle, g.packaging_type_id, :grid_size, g.detections, g.cells
+    FROM unnest(
+        CAST(:day AS DATE[]),
+        CAST(:angle AS TEXT[]),
+        CAST(:packaging_type_id AS UUID[]),
+        CAST(:detections AS BIGINT[]),
+        CAST(:cells AS BYTEA[])
+    ) AS g(day, angle, packaging_type_id, detections, cells)
+    ON CONFLICT (day, angle, packaging_type_id) DO UPDATE SET
+        grid_size = EXCLUDED.grid_size,
+        detections = EXCLUDED.detections,
+        cells = EXCLUDED.cells
+"""
+
+
+def normalize_boxes(
+    x1: np.ndarray,
+    y1: np.ndarray,
+    x2: np.ndarray,
+    y2: np.ndarray,
+    width: np.ndarray,
+    height: np.ndarray
+) -> np.ndarray:
+    """(N, 4) pixel boxes -> x1, y1, x2, y2 in 0..1 of their image"""
+    scale = np.stack([width, height, width, height], axis=1).astype(np.float64)
+    boxes = np.stack([x1, y1, x2, y2], axis=1).astype(np.float64) / scale
+    return np.clip(boxes, 0.0, 1.0)
+
+
+def accumulate(
+    boxes: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    n_groups: int = 1,
+    grid_size: int = HEATMAP_GRID_SIZE
+) -> np.ndarray:
+    """
+    Coverage grids of normalized boxes
+
+    Args:
+        boxes: (N, 4) x1, y1, x2, y2 in 0..1
+        groups: Optional (N,) group index in 0..n_groups-1 (default: all 0)
+
+    Returns:
+        (n_groups, grid_size, grid_size) int64 counts of boxes overlapping
+        each cell; every box covers at least one cell
+    """
+    side = grid_size + 1
+    if groups is None:
+        groups = np.zeros(len(boxes), dtype=np.int64)
+
+    c0 = np.clip(np.floor(boxes[:, 0] * grid_size), 0, grid_size - 1).astype(np.int64)
+    r0 = np.clip(np.floor(boxes[:, 1] * grid_size), 0, grid_size - 1).astype(np.int64)
+    c1 = np.maximum(np.ceil(boxes[:, 2] * grid_size).astype(np.int64), c0 + 1)
+    r1 = np.maximum(np.ceil(boxes[:, 3] * grid_size).astype(np.int64), r0 + 1)
+
+    base = groups.astype(np.int64) * side * side
+    length = n_groups * side * side
+    added = np.bincount(
+        np.concatenate([base + r0 * side + c0, base + r1 * side + c1]), minlength=length
+    )
+    removed = np.bincount(
+        np.concatenate([base + r0 * side + c1, base + r1 * side + c0]), minlength=length
+    )
+    diff = (added - removed).reshape(n_groups, side, side)
+    return diff.cumsum(axis=1).cumsum(axis=2)[:, :grid_size, :grid_size]
+
+
+# DETECTION_BOXES_SQL columns that grids can be grouped by
+GROUP_COLUMNS = ('day', 'angle', 'packaging_type_id')
+
+
+def _group_grids(
+    rows: Sequence,
+    by: Tuple[str, ...],
+    grid_size: int = HEATMAP_GRID_SIZE
+) -> List[Tuple[Tuple, int, np.ndarray]]:
+    """
+    [(key, detections, grid)] of DETECTION_BOXES_SQL rows grouped by columns
+
+    Rows without a usable box (missing or empty box, unknown image size)
+    are skipped.
+    """
+    if not rows:
+        return []
+    columns = list(zip(*rows))
+    keys = list(zip(*(columns[GROUP_COLUMNS.index(name)] for name in by)))
+
+    index: Dict[Tuple, int] = {}
+    groups = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys))
+
+    # None -> NaN, which fails every comparison below
+    x1, y1, x2, y2, width, height = (
+        np.asarray(values, dtype=np.float64) for values in columns[len(GROUP_COLUMNS):]
+    )
+    valid = (x2 > x1) & (y2 > y1) & (width > 0) & (height > 0)
+    groups = groups[valid]
+    boxes = normalize_boxes(x1[valid], y1[valid], x2[valid], y2[valid], width[valid], height[valid])
+
+    grids = accumulate(boxes, groups, len(index), grid_size)
+    counts = np.bincount(groups, minlength=len(index))
+    return [(key, int(counts[i]), grids[i]) for key, i in index.items() if counts[i]]
+
+
+def _day_range(since: datetime, until: datetime) -> List[date]:
+    start = day_bucket(since)
+    end = day_bucket(until)
+    if end < utc(until):
+        end += timedelta(days=1)
+    days = (end - start).days
+    if days < 1:
+        raise ValueError("until must be after since")
+    if days > HEATMAP_MAX_DAYS:
+        raise ValueError(f"Heatmap window is limited to {HEATMAP_MAX_DAYS} days")
+    return [(start + timedelta(days=i)).date() for i in range(days)]
+
+
+def _batches(days: List[date]) -> List[List[date]]:
+    """Sorted days split into runs of consecutive days, at most a batch long"""
+    batches: List[List[date]] = []
+    for day in days:
+        if (
+            batches
+            and day - batches[-1][-1] == timedelta(days=1)
+            and len(batches[-1]) < HEATMAP_MATERIALIZE_BATCH
+        ):
+            batches[-1].append(day)
+        else:
+            batches.append([day])
+    return batches
+
+
+def _naive(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+class HeatmapService:
+    """Materialize and read damage heatmaps"""
+
+    @staticmethod
+    async def _boxes(
+        db: AsyncSession,
+        start: datetime,
+        end: datetime,
+        angle: Optional[str] = None,
+        packaging_type_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None
+    ) -> Sequence:
+        filters, params = [], {'start': start, 'end': end}
+        if angle is not None:
+            filters.append("AND img.angle = :angle")
+            params['angle'] = angle
+        if packaging_type_id is not None:
+            filters.append("AND p.packaging_type_id = :packaging_type_id")
+            params['packaging_type_id'] = packaging_type_id
+        supplier_join = ""
+        if supplier_id is not None:
+            supplier_join = "JOIN shipments sh ON sh.shipment_id = p.shipment_id"
+            filters.append("AND sh.supplier_id = :supplier_id")
+            params['supplier_id'] = supplier_id
+
+        sql = DETECTION_BOXES_SQL.format(supplier_join=supplier_join, filters=' '.join(filters))
+        return (await db.execute(text(sql), params)).all()
+
+    @staticmethod
+    async def materialize_days(
+        db: AsyncSession,
+        days: List[date],
+        grid_size: int = HEATMAP_GRID_SIZE
+    ) -> int:
+        """
+        Recompute the grids of UTC days (every angle x packaging type)
+
+        One detection query over min(days)..max(days), so pass runs of
+        consecutive days. Runs in the caller's transaction; concurrent
+        materializations of a day converge through the upserts.
+
+        Returns:
+            Detections accumulated
+        """
+        if not days:
+            return 0
+        rows = await HeatmapService._boxes(db, _naive(min(days)), _naive(max(days)) + timedelta(days=1))
+        selected = set(days)
+        grids = [g for g in _group_grids(rows, GROUP_COLUMNS, grid_size) if g[0][0] in selected]
+
+        await db.execute(text("DELETE FROM damage_heatmap_daily WHERE day = ANY(:days)"), {'days': days})
+        if grids:
+            await db.execute(text(MATERIALIZE_SQL), {
+                'grid_size': grid_size,
+                'day': [key[0] for key, _, _ in grids],
+                'angle': [key[1] for key, _, _ in grids],
+                'packaging_type_id': [key[2] for key, _, _ in grids],
+                'detections': [count for _, count, _ in grids],
+                'cells': [grid.astype(CELL_DTYPE).tobytes() for _, _, grid in grids],
+            })
+
+        per_day = {day: 0 for day in days}
+        for key, count, _ in grids:
+            per_day[key[0]] += count
+        await db.execute(
+            text("""
+                INSERT INTO damage_heatmap_days (day, detections, computed_at)
+                SELECT day, detections, CURRENT_TIMESTAMP
+                FROM unnest(CAST(:days AS DATE[]), CAST(:detections AS BIGINT[])) AS d(day, detections)
+                ON CONFLICT (day) DO UPDATE SET
+                    detections = EXCLUDED.detections,
+                    computed_at = EXCLUDED.computed_at
+            """),
+            {'days': list(per_day), 'detections': list(per_day.values())}
+        )
+        return sum(per_day.values())
+
+    @staticmethod
+    async def refresh(
+        db: AsyncSession,
+        days: List[date],
+        now: Optional[datetime] = None
+    ) -> List[date]:
+        """
+        Materialize the days that are missing or not yet final
+
+        Runs of consecutive stale days are materialized up to
+        HEATMAP_MATERIALIZE_BATCH days at a time, committing after each.
+        Days that have not started are skipped.
+
+        Returns:
+            Days recomputed
+        """
+        now = utc(now or datetime.utcnow())
+        if not days:
+            return []
+
+        result = await db.execute(
+            text("SELECT day, computed_at FROM damage_heatmap_days WHERE day >= :first AND day <= :last"),
+            {'first': min(days), 'last': max(days)}
+        )
+        computed = {row.day: utc(row.computed_at) for row in result}
+
+        stale = []
+        for day in sorted(days):
+            day_start = utc(_naive(day))
+            if day_start > now:
+                continue
+            computed_at = computed.get(day)
+            if computed_at is None or computed_at < day_start + timedelta(days=1) + HEATMAP_SETTLE:
+                stale.append(day)
+
+        for batch in _batches(stale):
+            await HeatmapService.materialize_days(db, batch)
+            await db.commit()
+        return stale
+
+    @staticmethod
+    async def get_heatmap(
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        angle: Optional[str] = None,
+        packaging_type_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None
+    ) -> Dict:
+        """
+        Damage heatmaps per angle over whole UTC days
+
+        Unless filtered by supplier, stale days in the window are
+        materialized first (see refresh), which commits the session.
+
+        Args:
+            since / until: Window of detection times (default: the last 30
+                days), widened to whole UTC days
+            angle / packaging_type_id / supplier_id: Optional filters
+
+        Returns:
+            Window, grid_size and per angle its detections, max cell and
+            grid (rows top to bottom, columns left to right)
+
+        Raises:
+            ValueError: On an empty or too long window
+        """
+        until = utc(until or datetime.utcnow())
+        since = utc(since or until - timedelta(days=30))
+        days = _day_range(since, until)
+        start, end = _naive(days[0]), _naive(days[-1]) + timedelta(days=1)
+
+        per_angle: Dict[str, Tuple[int, np.ndarray]] = {}
+        if supplier_id is not None:
+            rows = await HeatmapService._boxes(db, start, end, angle, packaging_type_id, supplier_id)
+            for (grid_angle,), count, grid in _group_grids(rows, ('angle',)):
+                per_angle[grid_angle] = (count, grid)
+        else:
+            await HeatmapService.refresh(db, days)
+
+            filters, params = [], {'first': days[0], 'last': days[-1], 'grid_size': HEATMAP_GRID_SIZE}
+            if angle is not None:
+                filters.append("AND angle = :angle")
+                params['angle'] = angle
+            if packaging_type_id is not None:
+                filters.append("AND packaging_type_id = :packaging_type_id")
+                params['packaging_type_id'] = packaging_type_id
+            result = await db.execute(
+                text(f"""
+                    SELECT angle, detections, cells
+                    FROM damage_heatmap_daily
+                    WHERE day >= :first AND day <= :last AND grid_size = :grid_size
+                    {' '.join(filters)}
+                """),
+                params
+            )
+            rows = result.all()
+            if rows:
+                angles = np.array([row.angle for row in rows])
+                detections = np.array([row.detections for row in rows], dtype=np.int64)
+                cells = np.frombuffer(b''.join(row.cells for row in rows), dtype=CELL_DTYPE)
+                cells = cells.reshape(len(rows), HEATMAP_GRID_SIZE, HEATMAP_GRID_SIZE)
+                for grid_angle in np.unique(angles):
+                    mask = angles == grid_angle
+                    per_angle[str(grid_angle)] = (
+                        int(detections[mask].sum()), cells[mask].sum(axis=0, dtype=np.int64)
+                    )
+
+        return {
+            'since': utc(start),
+            'until': utc(end),
+            'grid_size': HEATMAP_GRID_SIZE,
+            'angles': [
+                {
+                    'angle': grid_angle,
+                    'detections': detections,
+                    'max': int(grid.max()),
+                    'grid': grid.tolist(),
+                }
+                for grid_angle, (detections, grid) in sorted(per_angle.items())
+            ],
+        }
@@ -1,17 +1,71 @@
 """Inspection service for managing parcel inspections"""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy import bindparam, select, insert, update, func, case, text, true
+from sqlalchemy.orm import aliased, selectinload, load_only
 from typing import List, Dict, Optional
 from uuid import UUID
 import uuid
 from datetime import datetime
 from pathlib import Path
+import json
+import time
 
 from app.models.inspection import Inspection
 from app.models.inspection_image import InspectionImage
 from app.models.damage_detection import DamageDetection
 from app.models.parcel import Parcel
+from app.models.shipment import Shipment
+from app.db.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from app.services.parcel_service import supplier_shipments
 from app.services.ml_service import get_damage_detection_service
+from app.services.rollup_service import RollupService
+from app.services.detection_writer import (
+    SEVERITY_LEVELS,
+    DetectionWriter,
+    build_detection_rows,
+    summarize_detection_rows
+)
+
+# Columns served by the inspection read path (InspectionResponse and its
+# nested image/detection schemas); raw ml_results and metadata stay unloaded
+INSPECTION_DETAIL_COLUMNS = (
+    Inspection.inspection_id,
+    Inspection.parcel_id,
+    Inspection.inspection_type,
+    Inspection.overall_status,
+    Inspection.has_damage,
+    Inspection.damage_count,
+    Inspection.overall_confidence,
+    Inspection.images_expected,
+    Inspection.images_received,
+    Inspection.started_at,
+    Inspection.completed_at,
+)
+IMAGE_DETAIL_COLUMNS = (
+    InspectionImage.image_id,
+    InspectionImage.inspection_id,
+    InspectionImage.angle,
+    InspectionImage.sequence_number,
+    InspectionImage.file_path,
+    InspectionImage.processed,
+    InspectionImage.width,
+    InspectionImage.height,
+)
+DETECTION_DETAIL_COLUMNS = (
+    DamageDetection.detection_id,
+    DamageDetection.inspection_id,
+    DamageDetection.damage_type,
+    DamageDetection.confidence,
+    DamageDetection.severity,
+    DamageDetection.bbox_x1,
+    DamageDetection.bbox_y1,
+    DamageDetection.bbox_x2,
+    DamageDetection.bbox_y2,
+)
+
+# SQL array literal of severity levels, lowest first
+_SEVERITY_ARRAY = "ARRAY[" + ", ".join(f"'{level}'" for level in SEVERITY_LEVELS) + "]::text[]"
 
 class InspectionService:
     """Service for managing inspections"""
@@ -23,7 +77,11 @@ class InspectionService:
         inspector_user_id: Optional[UUID] = None,
         inspection_type: str = "automated"
     ) -> Inspection:
-        """Create new inspection for a parcel"""
+        """
+        Create new inspection for a parcel
+        
+        Round-trips: 1 statement + commit
+        """
         
         inspection = Inspection(
             parcel_id=parcel_id,
@@ -37,7 +95,6 @@ class InspectionService:
         
         db.add(inspection)
         await db.commit()
-        await db.refresh(inspection)
         
         return inspection
     
@@ -51,10 +108,23 @@ class InspectionService:
         width: int,
         height: int,
         file_size: int
-    ) -> InspectionImage:
-        """Add image to inspection"""
+    ) -> Dict:
+        """
+        Add image to inspection
         
+        The image insert and the images_received increment run as one
+        statement (INSERT ... RETURNING inside an UPDATE), so concurrent
+        uploads for the same inspection can't lose a count.
+        
+        Round-trips: 1 statement + commit
+        
+        Returns:
+            Dict with the image, updated images_received/images_expected
+            and the parcel's warehouse_id
+        """
+        now = datetime.utcnow()
         image = InspectionImage(
+            image_id=uuid.uuid4(),
             inspection_id=inspection_id,
             angle=angle,
             sequence_number=sequence_number,
@@ -63,122 +133,612 @@ class InspectionService:
             width=width,
             height=height,
             format="JPEG",
-            processed=False
+            processed=False,
+            captured_at=now,
+            uploaded_at=now,
+            created_at=now
         )
         
-        db.add(image)
+        new_image = (
+            insert(InspectionImage)
+            .values(
+                image_id=image.image_id,
+                inspection_id=image.inspection_id,
+                angle=image.angle,
+                sequence_number=image.sequence_number,
+                file_path=image.file_path,
+                file_size_bytes=image.file_size_bytes,
+                width=image.width,
+                height=image.height,
+                format=image.format,
+                processed=image.processed,
+                captured_at=now,
+                uploaded_at=now,
+                created_at=now
+            )
+            .returning(InspectionImage.inspection_id)
+            .cte("new_image")
+        )
         
-        # Update inspection images_received count
         result = await db.execute(
-            select(Inspection).where(Inspection.inspection_id == inspection_id)
+            update(Inspection)
+            .where(Inspection.inspection_id == new_image.c.inspection_id)
+            .values(images_received=Inspection.images_received + 1)
+            .returning(
+                Inspection.images_received,
+                Inspection.images_expected,
+                InspectionService._parcel_warehouse_id()
+            )
+            .execution_options(synchronize_session=False)
         )
-        inspection = result.scalar_one()
-        inspection.images_received += 1
+        row = result.one()
         
         await db.commit()
-        await db.refresh(image)
         
-        return image
+        return {
+            'image': image,
+            'images_received': row.images_received,
+            'images_expected': row.images_expected,
+            'warehouse_id': row.current_warehouse_id
+        }
     
     @staticmethod
     async def process_image_with_ml(
         db: AsyncSession,
         image_id: UUID
-    ) -> List[DamageDetection]:
-        """Process image with ML model and create damage detections"""
+    ) -> Optional[List[Dict]]:
+        """
+        Process image with ML model and create damage detections
+        
+        Detections are written in one bulk statement (see DetectionWriter).
+        The image is claimed (processed=true) in the same transaction as the
+        detections and aggregates, so a redelivered or concurrent run of an
+        already processed image writes nothing.
+        
+        Returns:
+            The written detection rows, or None if the image was already
+            processed
+        """
         
         # Get image
         result = await db.execute(
-            select(InspectionImage).where(InspectionImage.image_id == image_id)
+            select(InspectionImage.inspection_id, InspectionImage.file_path, InspectionImage.processed)
+            .where(InspectionImage.image_id == image_id)
         )
-        image = result.scalar_one()
+        image = result.one()
+        if image.processed:
+            return None
         
         # Run ML detection
         ml_service = get_damage_detection_service()
+        started = time.perf_counter()
         ml_result = ml_service.analyze_damage(image.file_path)
+        processing_time_ms = int((time.perf_counter() - started) * 1000)
+        
+        # Claim the image; a concurrent run blocks here until this commits
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(InspectionImage)
+            .where(
+                InspectionImage.image_id == image_id,
+                InspectionImage.processed.is_not(True)
+            )
+            .values(
+                processed=True,
+                processed_at=now,
+                processing_time_ms=processing_time_ms
+            )
+            .returning(InspectionImage.image_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.one_or_none() is None:
+            await db.rollback()
+            return None
         
         # Create damage detections
+        detections = build_detection_rows(
+            inspection_id=image.inspection_id,
+            image_id=image_id,
+            ml_result=ml_result,
+            detected_at=now
+        )
+        await DetectionWriter.write(db, detections)
+        await InspectionService.apply_detection_aggregates(
+            db=db,
+            inspection_id=image.inspection_id,
+            detections=detections
+        )
+        
+        await db.commit()
+        
+        return detections
+    
+    @staticmethod
+    async def create_inspection_with_images(
+        db: AsyncSession,
+        inspection_id: UUID,
+        parcel_id: UUID,
+        images: List[Dict],
+        ml_results: List[Dict],
+        inspector_user_id: Optional[UUID] = None,
+        inspection_type: str = "automated",
+        parcel_updates: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Create a full multi-angle inspection in a single transaction
+        
+        Args:
+            images: Stored image info (image_id, angle, sequence_number,
+                file_path, file_size, width, height), one per angle
+            ml_results: ML analysis per image, in the same order as images
+            parcel_updates: Optional parcel metadata (weight/dimensions) to
+                record alongside the inspection
+        
+        Returns:
+            Dict with the inspection, its images and detections, and the
+            parcel's warehouse_id
+        """
+        now = datetime.utcnow()
+        
+        inspection = Inspection(
+            inspection_id=inspection_id,
+            parcel_id=parcel_id,
+            inspector_user_id=inspector_user_id,
+            inspection_type=inspection_type,
+            overall_status="in_progress",
+            images_expected=len(images),
+            images_received=len(images),
+            ml_model_version="YOLOv8n"
+        )
+        
+        image_rows = []
         detections = []
         
-        for detection_data in ml_result.get('detections', []):
-            detection = DamageDetection(
-                inspection_id=image.inspection_id,
-                image_id=image_id,
-                damage_type=detection_data.get('class_name', 'unknown'),
-                confidence=detection_data.get('confidence', 0.0),
-                severity="moderate",  # Default
-                bbox_x1=detection_data.get('bbox', {}).get('x1'),
-                bbox_y1=detection_data.get('bbox', {}).get('y1'),
-                bbox_x2=detection_data.get('bbox', {}).get('x2'),
-                bbox_y2=detection_data.get('bbox', {}).get('y2'),
-                model_name="YOLOv8n",
-                model_version="8.0",
-                detection_metadata=detection_data
+        db.add(inspection)
+        
+        for image_info, ml_result in zip(images, ml_results):
+            image = InspectionImage(
+                image_id=image_info['image_id'],
+                inspection_id=inspection_id,
+                angle=image_info['angle'],
+                sequence_number=image_info['sequence_number'],
+                file_path=image_info['file_path'],
+                file_size_bytes=image_info['file_size'],
+                width=image_info['width'],
+                height=image_info['height'],
+                format="JPEG",
+                processed=True,
+                processed_at=now
             )
-            
-            db.add(detection)
-            detections.append(detection)
+            image_rows.append(image)
+            detections.extend(
+                build_detection_rows(
+                    inspection_id=inspection_id,
+                    image_id=image.image_id,
+                    ml_result=ml_result,
+                    detected_at=now
+                )
+            )
+        
+        db.add_all(image_rows)
+        
+        # The inspection is new, so its aggregates are just this batch's totals
+        summary = summarize_detection_rows(detections)
+        inspection.damage_count = summary['damage_count']
+        inspection.detection_confidence_sum = summary['confidence_sum']
+        inspection.max_severity = summary['max_severity']
+        inspection.damage_types = summary['damage_types']
+        
+        # Inspection and image rows must exist before detections reference them
+        await db.flush()
+        await DetectionWriter.write(db, detections)
         
-        # Mark image as processed
-        image.processed = True
-        image.processed_at = datetime.utcnow()
+        if parcel_updates:
+            result = await db.execute(
+                update(Parcel)
+                .where(Parcel.parcel_id == parcel_id)
+                .values(**parcel_updates)
+                .returning(Parcel.current_warehouse_id)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            result = await db.execute(
+                select(Parcel.current_warehouse_id).where(Parcel.parcel_id == parcel_id)
+            )
+        warehouse_id = result.scalar_one_or_none()
         
         await db.commit()
         
-        return detections
+        return {
+            'inspection': inspection,
+            'images': image_rows,
+            'detections': detections,
+            'warehouse_id': warehouse_id
+        }
     
     @staticmethod
-    async def complete_inspection(
+    async def apply_detection_aggregates(
+        db: AsyncSession,
+        inspection_id: UUID,
+        detections: List[Dict]
+    ) -> None:
+        """
+        Add an image's detections to the inspection's running aggregates
+        
+        Updates damage_count, detection_confidence_sum, max_severity and the
+        damage_types histogram in one UPDATE, in the caller's transaction.
+        The row lock serializes concurrent images of the same inspection.
+        """
+        if not detections:
+            return
+        
+        summary = summarize_detection_rows(detections)
+        
+        await db.execute(
+            text(f"""
+                UPDATE inspections
+                SET damage_count = COALESCE(damage_count, 0) + :damage_count,
+                    detection_confidence_sum = COALESCE(detection_confidence_sum, 0) + :confidence_sum,
+                    max_severity = CASE
+                        WHEN COALESCE(array_position({_SEVERITY_ARRAY}, CAST(:max_severity AS text)), 0)
+                             > COALESCE(array_position({_SEVERITY_ARRAY}, max_severity::text), 0)
+                        THEN :max_severity
+                        ELSE max_severity
+                    END,
+                    damage_types = (
+                        SELECT jsonb_object_agg(key, total)
+                        FROM (
+                            SELECT key, SUM(value::int) AS total
+                            FROM (
+                                SELECT key, value FROM jsonb_each_text(COALESCE(inspections.damage_types, '{{}}'::jsonb))
+                                UNION ALL
+                                SELECT key, value FROM jsonb_each_text(CAST(:damage_types AS jsonb))
+                            ) entries
+                            GROUP BY key
+                        ) totals
+                    ),
+                    updated_at = :now
+                WHERE inspection_id = :inspection_id
+            """),
+            {
+                'inspection_id': inspection_id,
+                'damage_count': summary['damage_count'],
+                'confidence_sum': summary['confidence_sum'],
+                'max_severity': summary['max_severity'],
+                'damage_types': json.dumps(summary['damage_types']),
+                'now': datetime.utcnow()
+            }
+        )
+    
+    @staticmethod
+    async def recompute_inspection_aggregates(
         db: AsyncSession,
         inspection_id: UUID
-    ) -> Inspection:
-        """Complete inspection and update parcel"""
+    ) -> None:
+        """
+        Rebuild an inspection's detection aggregates from damage_detections
+        
+        SQL-side fallback for when the running totals are suspect, e.g.
+        after detections were edited or deleted by hand.
+        """
+        await db.execute(
+            text(f"""
+                UPDATE inspections
+                SET damage_count = agg.damage_count,
+                    detection_confidence_sum = agg.confidence_sum,
+                    max_severity = agg.max_severity,
+                    damage_types = agg.damage_types,
+                    updated_at = :now
+                FROM (
+                    SELECT
+                        COUNT(*) AS damage_count,
+                        COALESCE(SUM(confidence), 0) AS confidence_sum,
+                        ({_SEVERITY_ARRAY})[MAX(array_position({_SEVERITY_ARRAY}, severity::text))] AS max_severity,
+                        (
+                            SELECT jsonb_object_agg(damage_type, type_count)
+                            FROM (
+                                SELECT damage_type, COUNT(*) AS type_count
+                                FROM damage_detections
+                                WHERE inspection_id = :inspection_id
+                                GROUP BY damage_type
+                            ) types
+                        ) AS damage_types
+                    FROM damage_detections
+                    WHERE inspection_id = :inspection_id
+                ) agg
+                WHERE inspections.inspection_id = :inspection_id
+            """),
+            {'inspection_id': inspection_id, 'now': datetime.utcnow()}
+        )
+        
+        await db.commit()
+    
+    @staticmethod
+    async def get_processing_progress(
+        db: AsyncSession,
+        inspection_id: UUID
+    ) -> Optional[Dict]:
+        """Get image processing progress for an inspection"""
+        
+        images_processed = (
+            select(func.count(InspectionImage.image_id))
+            .where(
+                InspectionImage.inspection_id == inspection_id,
+                InspectionImage.processed == True
+            )
+            .scalar_subquery()
+        )
         
-        # Get inspection with detections
         result = await db.execute(
-            select(Inspection).where(Inspection.inspection_id == inspection_id)
+            select(
+                Inspection.overall_status,
+                Inspection.images_expected,
+                Inspection.images_received,
+                images_processed.label('images_processed'),
+                Parcel.current_warehouse_id
+            )
+            .outerjoin(Parcel, Parcel.parcel_id == Inspection.parcel_id)
+            .where(Inspection.inspection_id == inspection_id)
         )
-        inspection = result.scalar_one()
+        row = result.one_or_none()
+        
+        if row is None:
+            return None
         
-        # Get all detections
-        detections_result = await db.execute(
-            select(DamageDetection).where(DamageDetection.inspection_id == inspection_id)
+        return {
+            'inspection_id': str(inspection_id),
+            'overall_status': row.overall_status,
+            'images_expected': row.images_expected,
+            'images_received': row.images_received,
+            'images_processed': row.images_processed,
+            'warehouse_id': str(row.current_warehouse_id) if row.current_warehouse_id else None
+        }
+    
+    @staticmethod
+    def _detail_query():
+        """Inspection select with images and detections eagerly loaded, projected to the response columns"""
+        return (
+            select(Inspection)
+            .options(
+                load_only(*INSPECTION_DETAIL_COLUMNS, raiseload=True),
+                selectinload(Inspection.images).load_only(*IMAGE_DETAIL_COLUMNS, raiseload=True),
+                selectinload(Inspection.detections).load_only(*DETECTION_DETAIL_COLUMNS, raiseload=True)
+            )
+            .execution_options(populate_existing=True)
         )
-        detections = detections_result.scalars().all()
+    
+    @staticmethod
+    async def get_inspection_detail(
+        db: AsyncSession,
+        inspection_id: UUID
+    ) -> Optional[Inspection]:
+        """
+        Get an inspection with its images and detections
         
-        # Calculate overall results
-        has_damage = len(detections) > 0
-        damage_count = len(detections)
+        Always three queries (inspection, images, detections) regardless of
+        how many images or detections there are. Only the columns used by
+        InspectionResponse are loaded; touching any other attribute raises
+        instead of issuing a lazy load.
+        """
+        result = await db.execute(
+            InspectionService._detail_query()
+            .where(Inspection.inspection_id == inspection_id)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def get_inspection_details(
+        db: AsyncSession,
+        inspection_ids: List[UUID]
+    ) -> List[Inspection]:
+        """
+        Get many inspections with their images and detections
         
-        if detections:
-            overall_confidence = sum(d.confidence for d in detections) / len(detections)
-        else:
-            overall_confidence = 1.0  # High confidence in no damage
+        Same three queries as get_inspection_detail for the whole batch.
+        Results follow the order of inspection_ids; unknown ids are skipped.
+        """
+        if not inspection_ids:
+            return []
         
-        # Update inspection
-        inspection.overall_status = "completed"
-        inspection.has_damage = has_damage
-        inspection.damage_count = damage_count
-        inspection.overall_confidence = overall_confidence
-        inspection.completed_at = datetime.utcnow()
+        result = await db.execute(
+            InspectionService._detail_query()
+            .where(Inspection.inspection_id.in_(inspection_ids))
+        )
+        found = {inspection.inspection_id: inspection for inspection in result.scalars()}
+        
+        return [found[inspection_id] for inspection_id in dict.fromkeys(inspection_ids) if inspection_id in found]
+    
+    @staticmethod
+    async def list_inspections(
+        db: AsyncSession,
+        status: Optional[str] = None,
+        warehouse_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None,
+        has_damage: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict:
+        """
+        Inspections, newest first, one keyset page at a time
+        
+        Ordered by (started_at, inspection_id); see app.db.pagination.
+        Rows carry the INSPECTION_DETAIL_COLUMNS only. Warehouse and
+        supplier filter on the inspected parcel.
+        """
+        query = select(*INSPECTION_DETAIL_COLUMNS)
+        if status is not None:
+            query = query.where(Inspection.overall_status == status)
+        if has_damage is not None:
+            query = query.where(Inspection.has_damage == has_damage)
+        
+        parcel_conditions = []
+        if warehouse_id is not None:
+            parcel_conditions.append(Parcel.current_warehouse_id == warehouse_id)
+        if supplier_id is not None:
+            parcel_conditions.append(Parcel.shipment_id.in_(supplier_shipments(supplier_id)))
+        if parcel_conditions:
+            query = query.where(Inspection.parcel_id.in_(
+                select(Parcel.parcel_id).where(*parcel_conditions)
+            ))
+        
+        return await keyset_page(
+            db,
+            query,
+            sort_column=Inspection.started_at,
+            key_column=Inspection.inspection_id,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
+    
+    @staticmethod
+    def _parcel_warehouse_id():
+        """Correlated subquery for the inspected parcel's warehouse (for RETURNING)"""
+        return (
+            select(Parcel.current_warehouse_id)
+            .where(Parcel.parcel_id == Inspection.parcel_id)
+            .scalar_subquery()
+            .label('current_warehouse_id')
+        )
+    
+    @staticmethod
+    def _parcel_sku_id():
+        """Correlated subquery for the inspected parcel's sku_id"""
+        return (
+            select(Parcel.sku_id)
+            .where(Parcel.parcel_id == Inspection.parcel_id)
+            .scalar_subquery()
+            .label('sku_id')
+        )
+    
+    @staticmethod
+    def _parcel_supplier_id():
+        """Correlated subquery for the supplier of the inspected parcel's shipment"""
+        return (
+            select(Shipment.supplier_id)
+            .join(Parcel, Parcel.shipment_id == Shipment.shipment_id)
+            .where(Parcel.parcel_id == Inspection.parcel_id)
+            .scalar_subquery()
+            .label('supplier_id')
+        )
+    
+    @staticmethod
+    def _parcel_resolution():
+        """Correlated subqueries for the inspected parcel's current resolution"""
+        return (
+            select(Parcel.auto_resolved)
+            .where(Parcel.parcel_id == Inspection.parcel_id)
+            .scalar_subquery()
+            .label('auto_resolved'),
+            select(Parcel.resolution_action)
+            .where(Parcel.parcel_id == Inspection.parcel_id)
+            .scalar_subquery()
+            .label('resolution_action')
+        )
+    
+    @staticmethod
+    def _parcel_inspected_before():
+        """Correlated EXISTS for another completed inspection of the same parcel"""
+        other = aliased(Inspection)
+        return (
+            select(other.inspection_id)
+            .where(
+                other.parcel_id == Inspection.parcel_id,
+                other.inspection_id != Inspection.inspection_id,
+                other.overall_status == "completed"
+            )
+            .exists()
+            .label('inspected_before')
+        )
+    
+    @staticmethod
+    def _completion_values(completed_at: datetime) -> Dict:
+        """Column values that complete an inspection from its running aggregates"""
+        damage_count = func.coalesce(Inspection.damage_count, 0)
+        
+        return {
+            'overall_status': "completed",
+            'has_damage': damage_count > 0,
+            'damage_count': damage_count,
+            # High confidence in no damage when nothing was detected
+            'overall_confidence': case(
+                (damage_count > 0, Inspection.detection_confidence_sum / damage_count),
+                else_=1.0
+            ),
+            'completed_at': completed_at
+        }
+    
+    @staticmethod
+    async def complete_inspection(
+        db: AsyncSession,
+        inspection_id: UUID
+    ) -> Inspection:
+        """
+        Complete inspection and update parcel
+        
+        Results come from the running detection aggregates kept on the
+        inspection row, so completing is O(1) regardless of how many
+        detections were written. Only in-progress inspections are completed,
+        so a concurrent second call is a no-op that returns the stored result.
+        
+        Round-trips: 3 statements + commit (complete, parcel, rollups)
+        """
+        now = datetime.utcnow()
         
-        # Update parcel
         result = await db.execute(
-            select(Parcel).where(Parcel.parcel_id == inspection.parcel_id)
+            update(Inspection)
+            .where(
+                Inspection.inspection_id == inspection_id,
+                Inspection.overall_status == "in_progress"
+            )
+            .values(**InspectionService._completion_values(now))
+            .returning(
+                Inspection,
+                InspectionService._parcel_warehouse_id(),
+                InspectionService._parcel_supplier_id(),
+                *InspectionService._parcel_resolution()
+            )
+            .execution_options(populate_existing=True)
         )
-        parcel = result.scalar_one()
+        row = result.one_or_none()
         
-        parcel.has_damage = has_damage
-        parcel.inspected_at = datetime.utcnow()
+        if row is None:
+            # Already completed (or missing)
+            result = await db.execute(
+                select(Inspection).where(Inspection.inspection_id == inspection_id)
+            )
+            return result.scalar_one()
         
-        if has_damage:
-            parcel.damage_severity = "moderate"  # Could be calculated
-            parcel.status = "quarantine"
-        else:
-            parcel.status = "approved"
+        inspection, warehouse_id, supplier_id, auto_resolved, resolution_action = row
+        
+        # Update parcel
+        has_damage = inspection.has_damage
+        await db.execute(
+            update(Parcel)
+            .where(Parcel.parcel_id == inspection.parcel_id)
+            .values(
+                has_damage=has_damage,
+                inspected_at=now,
+                damage_severity=(
+                    inspection.max_severity or "moderate"
+                    if has_damage else Parcel.damage_severity
+                ),
+                status="quarantine" if has_damage else "approved"
+            )
+            .execution_options(synchronize_session=False)
+        )
+        
+        # The parcel keeps its resolution, so the inspection counts under it
+        await RollupService.apply(db, [{
+            'inspection': inspection,
+            'warehouse_id': warehouse_id,
+            'supplier_id': supplier_id,
+            'auto_resolved': auto_resolved,
+            'action': resolution_action
+        }])
         
         await db.commit()
-        await db.refresh(inspection)
         
         return inspection
 
@@ -188,30 +748,201 @@ class InspectionService:
         inspection_id: UUID
     ) -> Dict:
         """Complete inspection and apply auto-resolution"""
-        
-        # First complete the inspection normally
-        inspection = await InspectionService.complete_inspection(
+        return await InspectionService.finalize_inspection(
             db=db,
             inspection_id=inspection_id
         )
+    
+    @staticmethod
+    async def finalize_inspection(
+        db: AsyncSession,
+        inspection_id: UUID,
+        reevaluate: bool = False
+    ) -> Dict:
+        """
+        Complete an inspection and apply auto-resolution in one transaction
         
-        # Apply auto-resolution
-        from app.services.auto_resolution_service import AutoResolutionService
+        Returns:
+            Dict with inspection, auto_resolution decision, parcel_id,
+            parcel_status, warehouse_id and newly_completed (whether this
+            call completed the inspection)
         
-        auto_service = AutoResolutionService(db)
-        decision = await auto_service.evaluate_parcel(
-            parcel_id=inspection.parcel_id,
-            inspection_id=inspection_id
+        Raises:
+            NoResultFound: Unknown inspection
+            ValueError: The inspection is not in progress (or, with
+                reevaluate, not completed)
+        """
+        results = await InspectionService.finalize_inspections(
+            db=db,
+            inspection_ids=[inspection_id],
+            reevaluate=reevaluate
         )
+        if results:
+            return results[0]
         
-        # Apply decision
-        parcel = await auto_service.apply_decision(
-            parcel_id=inspection.parcel_id,
-            decision=decision
+        result = await db.execute(
+            select(Inspection.overall_status).where(Inspection.inspection_id == inspection_id)
         )
+        status = result.scalar_one_or_none()
+        if status is None:
+            raise NoResultFound(f"Inspection {inspection_id} not found")
+        raise ValueError(f"Inspection {inspection_id} is {status}")
+    
+    @staticmethod
+    async def finalize_inspections(
+        db: AsyncSession,
+        inspection_ids: List[UUID],
+        reevaluate: bool = False
+    ) -> List[Dict]:
+        """
+        Complete many inspections and apply auto-resolution in one transaction
         
-        return {
-            'inspection': inspection,
-            'auto_resolution': decision,
-            'parcel': parcel
-        }
+        In-progress inspections are completed from their running aggregates.
+        Already-completed ones are skipped unless reevaluate is set, in
+        which case their parcels are re-decided as the inspections stand
+        (overwriting any manual decision). Failed inspections are never
+        evaluated. Duplicate IDs are finalized once.
+        
+        Round-trips: at most 8 statements + commit, independent of batch
+        size (complete, fetch already-completed when re-evaluating, one
+        executemany parcel UPDATE per column set - at most four - rollups,
+        and resolution changes for parcels inspected before); settings come
+        from the settings cache, plus one query when it needs a reload
+        """
+        from app.services.auto_resolution_service import AutoResolutionService
+        
+        inspection_ids = list(dict.fromkeys(inspection_ids))
+        if not inspection_ids:
+            return []
+        
+        now = datetime.utcnow()
+        
+        # Complete in-progress inspections
+        result = await db.execute(
+            update(Inspection)
+            .where(
+                Inspection.inspection_id.in_(inspection_ids),
+                Inspection.overall_status == "in_progress"
+            )
+            .values(**InspectionService._completion_values(now))
+            .returning(
+                Inspection,
+                InspectionService._parcel_warehouse_id(),
+                InspectionService._parcel_sku_id(),
+                InspectionService._parcel_supplier_id(),
+                *InspectionService._parcel_resolution(),
+                InspectionService._parcel_inspected_before()
+            )
+            .execution_options(populate_existing=True)
+        )
+        inspections = {row[0].inspection_id: row for row in result.all()}
+        newly_completed = set(inspections)
+        
+        # Pick up inspections that were already completed
+        remaining = [i for i in inspection_ids if i not in inspections]
+        if remaining and reevaluate:
+            result = await db.execute(
+                select(
+                    Inspection,
+                    Parcel.current_warehouse_id,
+                    Parcel.sku_id,
+                    Shipment.supplier_id,
+                    Parcel.auto_resolved,
+                    Parcel.resolution_action,
+                    true().label('inspected_before')
+                )
+                .join(Parcel, Parcel.parcel_id == Inspection.parcel_id)
+                .outerjoin(Shipment, Shipment.shipment_id == Parcel.shipment_id)
+                .where(
+                    Inspection.inspection_id.in_(remaining),
+                    Inspection.overall_status == "completed"
+                )
+            )
+            inspections.update({row[0].inspection_id: row for row in result.all()})
+        
+        if not inspections:
+            return []
+        
+        auto_service = AutoResolutionService(db)
+        await auto_service.load_settings()
+        
+        results = []
+        parcel_updates = {}
+        rollup_records = []
+        resolution_changes = []
+        
+        for inspection_id in inspection_ids:
+            row = inspections.get(inspection_id)
+            if row is None:
+                continue
+            (
+                inspection, warehouse_id, sku_id, supplier_id,
+                previous_auto_resolved, previous_action, inspected_before
+            ) = row
+            
+            decision = auto_service.evaluate_inspection(
+                inspection,
+                supplier_id=supplier_id,
+                sku_id=sku_id
+            )
+            
+            # Undamaged parcels keep their severity, as in complete_inspection
+            values = {
+                'has_damage': inspection.has_damage,
+                'inspected_at': now,
+                **AutoResolutionService.resolution_values(decision, now)
+            }
+            if inspection.has_damage:
+                values['damage_severity'] = inspection.max_severity or "moderate"
+            parcel_updates.setdefault(frozenset(values), []).append(
+                {'target_parcel_id': inspection.parcel_id, **values}
+            )
+            
+            results.append({
+                'inspection': inspection,
+                'auto_resolution': decision,
+                'parcel_id': inspection.parcel_id,
+                'parcel_status': values['status'],
+                'warehouse_id': warehouse_id,
+                'newly_completed': inspection_id in newly_completed
+            })
+            
+            resolution = (values['auto_resolved'], values['resolution_action'])
+            if inspected_before:
+                # Every completed inspection of the parcel follows its
+                # resolution: count a new one under the previous resolution
+                # and move them all together below
+                resolution = (previous_auto_resolved, previous_action)
+                resolution_changes.append({
+                    'parcel_id': inspection.parcel_id,
+                    'previous_auto_resolved': previous_auto_resolved,
+                    'previous_action': previous_action,
+                    'auto_resolved': values['auto_resolved'],
+                    'action': values['resolution_action']
+                })
+            
+            if inspection_id in newly_completed:
+                rollup_records.append({
+                    'inspection': inspection,
+                    'warehouse_id': warehouse_id,
+                    'supplier_id': supplier_id,
+                    'auto_resolved': resolution[0],
+                    'action': resolution[1]
+                })
+        
+        # One executemany per column set. Core rather than ORM bulk UPDATE
+        # by primary key, which resolves every foreign key of parcels
+        parcels = Parcel.__table__
+        for rows in parcel_updates.values():
+            await db.execute(
+                update(parcels).where(parcels.c.parcel_id == bindparam('target_parcel_id')),
+                rows
+            )
+        
+        # Re-evaluated inspections were counted when first completed
+        await RollupService.apply(db, rollup_records)
+        await RollupService.apply_resolution_changes(db, resolution_changes)
+        
+        await db.commit()
+        
+        return results
@@ -0,0 +1,269 @@
+"""Parallel, checkpointed verification of the event_log hash chain
+
+The chain is split into event_id ranges verified concurrently in a process
+pool. A range starts from the stored hash of the event just before it, so
+ranges are independent: range N recomputes the hash of its last event and
+compares it to the stored one, which is exactly the hash range N+1 starts
+from. Each range is read through a server-side cursor in batches.
+
+Every verified range ends in a chain checkpoint (last event_id and its
+hash) in event_log_checkpoints. Later runs resume after the newest
+checkpoint, and every run first checks that all checkpointed events still
+carry their recorded hashes. That check only compares stored event_hash
+values: it catches a checkpointed row being removed or its hash being
+rewritten, but not an edit to the content of an event before the newest
+checkpoint that leaves the stored hashes alone. Only a full run (full=True)
+recomputes those hashes and finds such edits.
+
+Workers use psycopg2 rather than the async engine: each one is a separate
+process with its own blocking connection.
+"""
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+
+from app.services.audit_ledger import GENESIS_HASH, compute_event_hash
+
+logger = logging.getLogger(__name__)
+
+# Event IDs per range handed to a worker
+VERIFY_RANGE_SIZE = 250000
+
+# Rows per server-side cursor fetch
+CURSOR_BATCH_SIZE = 10000
+
+VERIFY_COLUMNS = (
+    'event_id',
+    'event_type',
+    'parcel_id',
+    'user_id',
+    'warehouse_id',
+    'event_data',
+    'device_id',
+    'ip_address',
+    'user_agent',
+    'created_at',
+    'event_hash',
+)
+
+
+@dataclass
+class RangeResult:
+    start_id: int
+    end_id: int
+    events: int = 0
+    last_event_id: Optional[int] = None
+    last_hash: Optional[str] = None
+    mismatch_event_id: Optional[int] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.mismatch_event_id is None
+
+
+def sync_dsn(database_url: str) -> str:
+    """psycopg2 DSN from a SQLAlchemy database URL"""
+    return database_url.replace('postgresql+asyncpg://', 'postgresql://')
+
+
+def verify_rows(previous_hash: str, rows: Iterable[Tuple]) -> Tuple[int, Optional[int], str, Optional[int]]:
+    """
+    Recompute hashes over rows in event_id order
+
+    Args:
+        previous_hash: Hash of the event before the first row
+        rows: Tuples in VERIFY_COLUMNS order
+
+    Returns:
+        (events verified, last event_id, last hash, event_id of the first
+        mismatch or None)
+    """
+    count = 0
+    last_event_id = None
+    for row in rows:
+        event = dict(zip(VERIFY_COLUMNS, row))
+        expected = compute_event_hash(previous_hash, event)
+        if expected != event['event_hash']:
+            return count, last_event_id, previous_hash, event['event_id']
+        previous_hash = expected
+        last_event_id = event['event_id']
+        count += 1
+    return count, last_event_id, previous_hash, None
+
+
+def split_ranges(first_id: int, last_id: int, range_size: int = VERIFY_RANGE_SIZE) -> List[Tuple[int, int]]:
+    """Inclusive event_id ranges covering first_id..last_id"""
+    return [
+        (start, min(start + range_size - 1, last_id))
+        for start in range(first_id, last_id + 1, range_size)
+    ]
+
+
+def _verify_range(dsn: str, start_id: int, end_id: int) -> RangeResult:
+    """Verify one range in a worker process"""
+    started = time.perf_counter()
+    result = RangeResult(start_id=start_id, end_id=end_id)
+
+    connection = psycopg2.connect(dsn)
+    try:
+        connection.set_session(readonly=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT event_hash FROM event_log WHERE event_id < %s "
+                "ORDER BY event_id DESC LIMIT 1",
+                (start_id,)
+            )
+            row = cursor.fetchone()
+            previous_hash = row[0] if row else GENESIS_HASH
+
+        with connection.cursor(name=f'verify_event_log_{start_id}') as cursor:
+            cursor.itersize = CURSOR_BATCH_SIZE
+            cursor.execute(
+                f"SELECT {', '.join(VERIFY_COLUMNS)} FROM event_log "
+                "WHERE event_id BETWEEN %s AND %s ORDER BY event_id",
+                (start_id, end_id)
+            )
+            (
+                result.events,
+                result.last_event_id,
+                result.last_hash,
+                result.mismatch_event_id
+            ) = verify_rows(previous_hash, cursor)
+    finally:
+        connection.close()
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _checkpoint_mismatches(cursor) -> List[int]:
+    """
+    Checkpointed events whose stored hash no longer matches
+
+    Compares stored hashes only; event content is not re-hashed here.
+    """
+    cursor.execute("""
+        SELECT c.last_event_id
+        FROM event_log_checkpoints c
+        LEFT JOIN event_log e ON e.event_id = c.last_event_id
+        WHERE e.event_hash IS DISTINCT FROM c.last_event_hash
+        ORDER BY c.last_event_id
+    """)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def verify_event_log(
+    dsn: str,
+    workers: int = 4,
+    range_size: int = VERIFY_RANGE_SIZE,
+    full: bool = False,
+    write_checkpoints: bool = True
+) -> Dict:
+    """
+    Verify event_log from the newest checkpoint (or from the start)
+
+    Args:
+        dsn: psycopg2 connection string
+        workers: Worker processes
+        range_size: Event IDs per range
+        full: Re-verify from the first event instead of the last checkpoint;
+            the only mode that catches content edits before it
+        write_checkpoints: Record a checkpoint after each verified range
+
+    Returns:
+        Report with events verified, events_per_second, the first mismatch
+        (if any) and checkpoints written
+    """
+    started = time.perf_counter()
+
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection.cursor() as cursor:
+            checkpoint_mismatches = _checkpoint_mismatches(cursor)
+
+            resume_after = None
+            if not full:
+                cursor.execute(
+                    "SELECT last_event_id FROM event_log_checkpoints "
+                    "ORDER BY last_event_id DESC LIMIT 1"
+                )
+                row = cursor.fetchone()
+                resume_after = row[0] if row else None
+
+            cursor.execute(
+                "SELECT MIN(event_id), MAX(event_id) FROM event_log WHERE event_id > %s",
+                (resume_after if resume_after is not None else 0,)
+            )
+            first_id, last_id = cursor.fetchone()
+        connection.commit()
+
+        ranges = split_ranges(first_id, last_id, range_size) if first_id is not None else []
+
+        results: List[RangeResult] = []
+        if ranges:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_verify_range, dsn, start, end) for start, end in ranges]
+                results = [future.result() for future in futures]
+
+        # Checkpoint the contiguous verified prefix only
+        verified = []
+        for result in results:
+            if not result.ok:
+                break
+            verified.append(result)
+
+        checkpoints_written = 0
+        if write_checkpoints and not checkpoint_mismatches:
+            with connection.cursor() as cursor:
+                for result in verified:
+                    if result.last_event_id is None:
+                        continue
+                    cursor.execute(
+                        """
+                        INSERT INTO event_log_checkpoints
+                            (last_event_id, last_event_hash, events_verified, duration_ms)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (last_event_id) DO NOTHING
+                        """,
+                        (
+                            result.last_event_id,
+                            result.last_hash,
+                            result.events,
+                            int(result.seconds * 1000)
+                        )
+                    )
+                    checkpoints_written += cursor.rowcount
+            connection.commit()
+    finally:
+        connection.close()
+
+    mismatch = next((r for r in results if not r.ok), None)
+    events = sum(r.events for r in results)
+    seconds = time.perf_counter() - started
+    worker_seconds = sum(r.seconds for r in results)
+
+    report = {
+        'ok': mismatch is None and not checkpoint_mismatches,
+        'resumed_after_event_id': resume_after,
+        'ranges': len(ranges),
+        'events': events,
+        'seconds': round(seconds, 3),
+        'events_per_second': round(events / seconds) if seconds else 0,
+        'per_worker_events_per_second': round(events / worker_seconds) if worker_seconds else 0,
+        'first_mismatch_event_id': mismatch.mismatch_event_id if mismatch else None,
+        'checkpoint_mismatches': checkpoint_mismatches,
+        'checkpoints_written': checkpoints_written,
+        'range_results': [asdict(r) for r in results],
+    }
+
+    if not report['ok']:
+        logger.error(
+            f"event_log verification failed: first mismatch at "
+            f"{report['first_mismatch_event_id']}, checkpoint mismatches {checkpoint_mismatches}"
+        )
+    return report
@@ -27,8 +27,29 @@ class DamageDetectionService:
         """
         # Run inference
         results = self.model(image_path)
-        result = results[0]
         
+        return self._parse_result(results[0], confidence_threshold)
+    
+    def detect_objects_batch(
+        self,
+        image_paths: List[str],
+        confidence_threshold: float = 0.25
+    ) -> List[List[Dict]]:
+        """
+        Detect objects in several images with a single batched inference call
+        
+        Returns:
+            One detection list per image, in input order
+        """
+        if not image_paths:
+            return []
+        
+        results = self.model(image_paths)
+        
+        return [self._parse_result(result, confidence_threshold) for result in results]
+    
+    def _parse_result(self, result, confidence_threshold: float) -> List[Dict]:
+        """Convert a YOLO result into detection dicts"""
         detections = []
         
         for box in result.boxes:
@@ -66,6 +87,22 @@ class DamageDetectionService:
         """
         detections = self.detect_objects(image_path)
         
+        return self._assess_damage(detections)
+    
+    def analyze_damage_batch(self, image_paths: List[str]) -> List[Dict]:
+        """
+        Analyze several images for damage in one batched inference call
+        
+        Returns:
+            One analysis result per image, in input order
+        """
+        return [
+            self._assess_damage(detections)
+            for detections in self.detect_objects_batch(image_paths)
+        ]
+    
+    def _assess_damage(self, detections: List[Dict]) -> Dict:
+        """Build damage assessment from detections"""
         # Simple damage detection logic
         # In production, you'd train a custom model
         has_damage = False
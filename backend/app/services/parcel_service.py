@@ -0,0 +1,54 @@
+"""Parcel listing service"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional
+from uuid import UUID
+
+from app.db.pagination import DEFAULT_PAGE_SIZE, keyset_page
+from app.models.parcel import Parcel
+from app.models.shipment import Shipment
+
+
+def supplier_shipments(supplier_id: UUID):
+    """Shipment IDs of a supplier, for IN filters on parcels"""
+    return select(Shipment.shipment_id).where(Shipment.supplier_id == supplier_id)
+
+
+class ParcelService:
+    """Service for parcel queries"""
+    
+    @staticmethod
+    async def list_parcels(
+        db: AsyncSession,
+        status: Optional[str] = None,
+        warehouse_id: Optional[UUID] = None,
+        supplier_id: Optional[UUID] = None,
+        has_damage: Optional[bool] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict:
+        """
+        Parcels, newest first, one keyset page at a time
+        
+        Ordered by (created_at, parcel_id); see app.db.pagination.
+        """
+        query = select(Parcel)
+        if status is not None:
+            query = query.where(Parcel.status == status)
+        if warehouse_id is not None:
+            query = query.where(Parcel.current_warehouse_id == warehouse_id)
+        if supplier_id is not None:
+            query = query.where(Parcel.shipment_id.in_(supplier_shipments(supplier_id)))
+        if has_damage is not None:
+            query = query.where(Parcel.has_damage == has_damage)
+        
+        return await keyset_page(
+            db,
+            query,
+            sort_column=Parcel.created_at,
+            key_column=Parcel.parcel_id,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
+        )
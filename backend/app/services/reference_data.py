@@ -0,0 +1,108 @@
+"""In-memory lookups used by auto-resolution rules
+
+Supplier damage rates and SKU unit values are loaded in two queries and
+kept per process, so rules that read them add no per-parcel queries. A
+lookup miss (a supplier or SKU created after the last load) marks the
+cache stale so the next access reloads it.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.supplier import Supplier
+from app.models.sku import Sku
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    supplier_damage_rates: Dict[UUID, Optional[float]] = field(default_factory=dict)
+    sku_unit_values: Dict[UUID, Optional[float]] = field(default_factory=dict)
+    loaded_at: float = 0.0  # time.monotonic()
+
+
+class ReferenceDataCache:
+    """Process-wide supplier and SKU lookups with a TTL"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._data: Optional[ReferenceData] = None
+        self._stale = True
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.loads = 0
+
+    def invalidate(self):
+        self._stale = True
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._data is not None
+            and not self._stale
+            and time.monotonic() - self._data.loaded_at < self.ttl_seconds
+        )
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def get(self, db: AsyncSession) -> ReferenceData:
+        """Current lookups, loading them if stale"""
+        if self._is_fresh():
+            return self._data
+
+        async with self._get_lock():
+            if self._is_fresh():
+                return self._data
+
+            self._stale = False
+            try:
+                suppliers = await db.execute(
+                    select(Supplier.supplier_id, Supplier.damage_rate)
+                )
+                skus = await db.execute(
+                    select(Sku.sku_id, Sku.unit_value)
+                )
+            except Exception:
+                self._stale = True
+                raise
+
+            self.loads += 1
+            self._data = ReferenceData(
+                supplier_damage_rates={
+                    supplier_id: None if rate is None else float(rate)
+                    for supplier_id, rate in suppliers.all()
+                },
+                sku_unit_values={
+                    sku_id: None if value is None else float(value)
+                    for sku_id, value in skus.all()
+                },
+                loaded_at=time.monotonic()
+            )
+            return self._data
+
+    def supplier_damage_rate(self, data: ReferenceData, supplier_id: Optional[UUID]) -> Optional[float]:
+        if supplier_id is None:
+            return None
+        if supplier_id not in data.supplier_damage_rates:
+            self.invalidate()
+        return data.supplier_damage_rates.get(supplier_id)
+
+    def unit_value(self, data: ReferenceData, sku_id: Optional[UUID]) -> Optional[float]:
+        if sku_id is None:
+            return None
+        if sku_id not in data.sku_unit_values:
+            self.invalidate()
+        return data.sku_unit_values.get(sku_id)
+
+
+# Singleton instance
+reference_data_cache = ReferenceDataCache(ttl_seconds=settings.REFERENCE_DATA_CACHE_TTL)
@@ -0,0 +1,308 @@
+"""What-if replay of auto-resolution thresholds over historical inspections
+
+Completed inspections are streamed once into numpy feature columns, then
+every candidate threshold set is evaluated against them in memory with
+rule_engine.evaluate_many. Nothing is written: live parcel rows are never
+touched.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.inspection import Inspection
+from app.models.parcel import Parcel
+from app.models.shipment import Shipment
+from app.services.reference_data import reference_data_cache
+from app.services.rollup_service import hour_bucket, utc
+from app.services.rule_engine import (
+    ACTIONS,
+    DEFAULT_RULES,
+    DEFAULT_SETTINGS,
+    build_feature_columns,
+    compile_rules,
+    evaluate_many,
+    rules_for_snapshot
+)
+from app.services.settings_cache import auto_resolution_settings_cache
+
+# Rows fetched per round-trip while streaming history
+STREAM_BATCH_SIZE = 10000
+
+
+@dataclass
+class InspectionHistory:
+    """
+    Columnar snapshot of completed inspections
+
+    max_severity, sku_id and supplier_id are text columns with '' where
+    the value is missing.
+    """
+    has_damage: np.ndarray
+    damage_count: np.ndarray
+    overall_confidence: np.ndarray
+    images_received: np.ndarray
+    max_severity: np.ndarray
+    sku_id: np.ndarray
+    supplier_id: np.ndarray
+    loaded_at: float
+    load_seconds: float
+
+    def __len__(self):
+        return len(self.has_damage)
+
+
+# Most recent history per (since, until, warehouse_id)
+_history_cache: Dict[Tuple, InspectionHistory] = {}
+
+
+class ReplayService:
+    """Replay auto-resolution decisions under candidate settings"""
+
+    @staticmethod
+    async def load_history(
+        db: AsyncSession,
+        since: datetime,
+        until: datetime,
+        warehouse_id: Optional[UUID] = None
+    ) -> InspectionHistory:
+        """
+        Stream completed inspections into columns
+
+        Uses a server-side cursor so rows arrive in batches of
+        STREAM_BATCH_SIZE; results are cached for REPLAY_CACHE_TTL seconds
+        so successive what-if runs over the same window skip the load.
+        """
+        key = (since, until, warehouse_id)
+        cached = _history_cache.get(key)
+        if cached is not None and time.monotonic() - cached.loaded_at < settings.REPLAY_CACHE_TTL:
+            return cached
+
+        started = time.perf_counter()
+        # completed_at is stored as naive UTC
+        start, end = (utc(value).replace(tzinfo=None) for value in (since, until))
+
+        query = (
+            select(
+                Inspection.has_damage,
+                Inspection.damage_count,
+                Inspection.overall_confidence,
+                Inspection.images_received,
+                func.coalesce(Inspection.max_severity, ''),
+                func.coalesce(cast(Parcel.sku_id, String), ''),
+                func.coalesce(cast(Shipment.supplier_id, String), '')
+            )
+            .join(Parcel, Parcel.parcel_id == Inspection.parcel_id)
+            .outerjoin(Shipment, Shipment.shipment_id == Parcel.shipment_id)
+            .where(
+                Inspection.overall_status == 'completed',
+                Inspection.completed_at >= start,
+                Inspection.completed_at < end
+            )
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        if warehouse_id is not None:
+            query = query.where(Parcel.current_warehouse_id == warehouse_id)
+
+        chunks = {name: [] for name in (
+            'has_damage', 'damage_count', 'overall_confidence', 'images_received',
+            'max_severity', 'sku_id', 'supplier_id'
+        )}
+
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            # Column-wise conversion; None becomes False / NaN inside numpy
+            has_damage, damage_count, confidence, images, severity, sku_id, supplier_id = zip(*partition)
+            chunks['has_damage'].append(np.asarray(has_damage, dtype=bool))
+            chunks['damage_count'].append(np.nan_to_num(np.asarray(damage_count, dtype=np.float64)))
+            chunks['overall_confidence'].append(np.asarray(confidence, dtype=np.float64))
+            chunks['images_received'].append(np.nan_to_num(np.asarray(images, dtype=np.float64)))
+            chunks['max_severity'].append(np.asarray(severity, dtype=str))
+            chunks['sku_id'].append(np.asarray(sku_id, dtype=str))
+            chunks['supplier_id'].append(np.asarray(supplier_id, dtype=str))
+
+        def concat(name, dtype):
+            return np.concatenate(chunks[name]) if chunks[name] else np.array([], dtype=dtype)
+
+        history = InspectionHistory(
+            has_damage=concat('has_damage', bool),
+            damage_count=concat('damage_count', np.float64),
+            overall_confidence=concat('overall_confidence', np.float64),
+            images_received=concat('images_received', np.float64),
+            max_severity=concat('max_severity', str),
+            sku_id=concat('sku_id', str),
+            supplier_id=concat('supplier_id', str),
+            loaded_at=time.monotonic(),
+            load_seconds=time.perf_counter() - started
+        )
+
+        _history_cache.clear()
+        _history_cache[key] = history
+        return history
+
+    @staticmethod
+    def _reference_column(ids: np.ndarray, table: Dict[UUID, Optional[float]]) -> np.ndarray:
+        """Per-row values of a reference table, looked up once per distinct ID ('' is missing)"""
+        keys, inverse = np.unique(ids, return_inverse=True)
+        values = np.array(
+            [table.get(UUID(key)) if key else None for key in keys],
+            dtype=np.float64
+        )
+        return values[inverse]
+
+    @staticmethod
+    def _count_actions(outcome: np.ndarray, action_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map outcome indexes to action codes and count them per rule set
+
+        Returns:
+            (counts of shape rule sets x len(ACTIONS), action code matrix)
+        """
+        codes = np.take_along_axis(action_codes, outcome, axis=1)
+        offsets = np.arange(len(codes))[:, np.newaxis] * len(ACTIONS)
+        return np.bincount(
+            (codes + offsets).ravel(),
+            minlength=len(codes) * len(ACTIONS)
+        ).reshape(len(codes), len(ACTIONS)), codes
+
+    @staticmethod
+    async def replay(
+        db: AsyncSession,
+        candidates: List[Dict],
+        since: datetime,
+        until: datetime,
+        warehouse_id: Optional[UUID] = None,
+        rules: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Count decisions per candidate settings over historical inspections
+
+        Args:
+            candidates: [{'name': str, 'settings': {setting_key: value}}];
+                each overrides the current auto-resolution settings
+            rules: Optional rule set for the candidates instead of the current one
+
+        Returns:
+            Current-settings baseline counts and, per candidate, action counts
+            and how many inspections would get a different action than under
+            the baseline
+
+        Raises:
+            ValueError: On unknown setting keys or an invalid rule set
+        """
+        snapshot = await auto_resolution_settings_cache.get(db)
+        base_settings = snapshot.values
+
+        for candidate in candidates:
+            unknown = set(candidate['settings']) - set(DEFAULT_SETTINGS) - set(base_settings)
+            if unknown:
+                raise ValueError(f"Unknown settings in candidate {candidate['name']}: {', '.join(sorted(unknown))}")
+
+        # The baseline is always the live rule set and settings
+        baseline_rules = rules_for_snapshot(snapshot)
+        if rules is None:
+            rules = snapshot.get('auto_resolution_rules') or DEFAULT_RULES
+
+        rule_sets = [baseline_rules] + [
+            compile_rules(rules, {**base_settings, **candidate['settings']})
+            for candidate in candidates
+        ]
+
+        history = await ReplayService.load_history(db, since, until, warehouse_id)
+
+        started = time.perf_counter()
+
+        supplier_damage_rate = unit_value = None
+        if any(r.uses('supplier_damage_rate') or r.uses('unit_value') for r in rule_sets):
+            reference = await reference_data_cache.get(db)
+            supplier_damage_rate = ReplayService._reference_column(
+                history.supplier_id, reference.supplier_damage_rates
+            )
+            unit_value = ReplayService._reference_column(history.sku_id, reference.sku_unit_values)
+
+        columns = build_feature_columns(
+            has_damage=history.has_damage,
+            damage_count=history.damage_count,
+            overall_confidence=history.overall_confidence,
+            images_received=history.images_received,
+            max_severity=history.max_severity,
+            supplier_damage_rate=supplier_damage_rate,
+            unit_value=unit_value
+        )
+
+        total = len(history)
+        counts = np.zeros((len(rule_sets), len(ACTIONS)), dtype=np.int64)
+        flipped = np.zeros(len(rule_sets), dtype=np.int64)
+        flipped_to = np.zeros((len(rule_sets), len(ACTIONS)), dtype=np.int64)
+
+        # Outcome index -> action code, per rule set
+        action_codes = [
+            np.array([ACTIONS.index(outcome.action) for outcome in r.outcomes])
+            for r in rule_sets
+        ]
+
+        if total:
+            baseline_codes = np.empty(total, dtype=np.int64)
+            for indexes, rows, outcome in evaluate_many(rule_sets[:1], columns):
+                _, codes = ReplayService._count_actions(outcome, action_codes[0][np.newaxis, :])
+                baseline_codes[rows] = codes[0]
+
+            for indexes, rows, outcome in evaluate_many(rule_sets, columns):
+                group_codes = np.stack([action_codes[i] for i in indexes])
+                group_counts, codes = ReplayService._count_actions(outcome, group_codes)
+                counts[indexes] += group_counts
+
+                changed = codes != baseline_codes[rows][np.newaxis, :]
+                flipped[indexes] += changed.sum(axis=1)
+                for action_code in range(len(ACTIONS)):
+                    flipped_to[indexes, action_code] += (changed & (codes == action_code)).sum(axis=1)
+
+        def summarize(i):
+            return {action: int(counts[i, a]) for a, action in enumerate(ACTIONS)}
+
+        return {
+            'inspections': total,
+            'since': since,
+            'until': until,
+            'warehouse_id': warehouse_id,
+            'settings_version': snapshot.version,
+            'load_seconds': round(history.load_seconds, 3),
+            'evaluate_seconds': round(time.perf_counter() - started, 3),
+            'baseline': summarize(0),
+            'candidates': [
+                {
+                    'name': candidate['name'],
+                    'settings': candidate['settings'],
+                    'counts': summarize(i),
+                    'flipped': int(flipped[i]),
+                    'flipped_to': {
+                        action: int(flipped_to[i, a])
+                        for a, action in enumerate(ACTIONS)
+                        if flipped_to[i, a]
+                    }
+                }
+                for i, candidate in enumerate(candidates, start=1)
+            ]
+        }
+
+
+def replay_window(
+    days: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Tuple[datetime, datetime]:
+    """
+    Resolve a replay window in UTC; `days` applies when since is omitted
+
+    By default the window ends at the end of the current hour, so repeated
+    runs share the cached history.
+    """
+    until = utc(until) if until else hour_bucket(datetime.now(timezone.utc)) + timedelta(hours=1)
+    since = utc(since) if since else until - timedelta(days=days)
+    return since, until
@@ -0,0 +1,392 @@
+"""Hourly and daily inspection rollups
+
+inspection_rollups_hourly and inspection_rollups_daily hold counters per
+time bucket x warehouse x supplier x damage_type. damage_type '' is the
+all-inspections row; a per-type row counts the inspections in which that
+type was detected and its detections.
+
+Counters are incremented in the transaction that completes inspections, so
+analytics read O(buckets) rows instead of scanning parcels, inspections
+and damage_detections. backfill() rebuilds any range from source tables.
+
+Auto-resolution counters follow the parcel's current resolution, as in
+backfill(): when a decision changes a parcel's resolution, every completed
+inspection of the parcel moves from the old counters to the new ones.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import column, table, text, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Counter columns, in unnest/INSERT order
+ROLLUP_MEASURES = (
+    'inspections',
+    'damaged',
+    'auto_resolved',
+    'auto_approved',
+    'auto_quarantined',
+    'auto_rejected',
+    'confidence_sum',
+    'confidence_count',
+    'detections',
+    'latency_ms_sum',
+    'latency_count',
+)
+
+ROLLUP_DIMENSIONS = ('bucket_start', 'warehouse_id', 'supplier_id', 'damage_type')
+
+# damage_type of the all-inspections rows
+ALL_DAMAGE_TYPES = ''
+
+# Auto-resolution action -> counter
+ACTION_MEASURES = {
+    'approved': 'auto_approved',
+    'quarantine': 'auto_quarantined',
+    'rejected': 'auto_rejected',
+}
+
+# Counters that follow the parcel's resolution
+RESOLUTION_MEASURES = ('auto_resolved',) + tuple(ACTION_MEASURES.values())
+
+# Backfill transaction size
+BACKFILL_CHUNK = timedelta(days=1)
+
+
+def _rollup_table(name: str):
+    return table(
+        name,
+        column('bucket_start', DateTime(timezone=True)),
+        column('warehouse_id'),
+        column('supplier_id'),
+        column('damage_type'),
+        *(column(measure) for measure in ROLLUP_MEASURES)
+    )
+
+
+hourly_rollups = _rollup_table('inspection_rollups_hourly')
+daily_rollups = _rollup_table('inspection_rollups_daily')
+
+
+def utc(value: datetime) -> datetime:
+    """Aware UTC datetime (naive values are UTC)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hour_bucket(value: datetime) -> datetime:
+    """UTC hour containing value"""
+    return utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(value: datetime) -> datetime:
+    """UTC day containing value"""
+    return utc(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_deltas(records: Iterable[Dict]) -> Dict[Tuple, List[float]]:
+    """
+    Hourly counter increments for completed inspections
+
+    Args:
+        records: Dicts with inspection (completed Inspection),
+            warehouse_id, supplier_id, auto_resolved and action
+
+    Returns:
+        {(bucket_start, warehouse_id, supplier_id, damage_type): counters
+        in ROLLUP_MEASURES order}
+    """
+    index = {measure: i for i, measure in enumerate(ROLLUP_MEASURES)}
+    deltas = defaultdict(lambda: [0] * len(ROLLUP_MEASURES))
+
+    for record in records:
+        inspection = record['inspection']
+        bucket = hour_bucket(inspection.completed_at)
+        base = (bucket, record['warehouse_id'], record['supplier_id'])
+
+        counters = deltas[base + (ALL_DAMAGE_TYPES,)]
+        counters[index['inspections']] += 1
+        if inspection.has_damage:
+            counters[index['damaged']] += 1
+        if record['auto_resolved']:
+            counters[index['auto_resolved']] += 1
+            measure = ACTION_MEASURES.get(record['action'])
+            if measure:
+                counters[index[measure]] += 1
+        if inspection.overall_confidence is not None:
+            counters[index['confidence_sum']] += float(inspection.overall_confidence)
+            counters[index['confidence_count']] += 1
+        counters[index['detections']] += inspection.damage_count or 0
+        if inspection.started_at is not None:
+            latency = utc(inspection.completed_at) - utc(inspection.started_at)
+            counters[index['latency_ms_sum']] += latency.total_seconds() * 1000
+            counters[index['latency_count']] += 1
+
+        for damage_type, count in (inspection.damage_types or {}).items():
+            type_counters = deltas[base + (damage_type,)]
+            type_counters[index['inspections']] += 1
+            type_counters[index['damaged']] += 1
+            type_counters[index['detections']] += count
+
+    return dict(deltas)
+
+
+def resolution_counters(auto_resolved: bool, action) -> List[int]:
+    """RESOLUTION_MEASURES counters of one inspection of a parcel"""
+    if not auto_resolved:
+        return [0] * len(RESOLUTION_MEASURES)
+    measure = ACTION_MEASURES.get(action)
+    return [1] + [int(m == measure) for m in RESOLUTION_MEASURES[1:]]
+
+
+def _upsert_sql(target: str) -> str:
+    measures = ', '.join(ROLLUP_MEASURES)
+    updates = ',\n            '.join(f"{m} = r.{m} + EXCLUDED.{m}" for m in ROLLUP_MEASURES)
+    return f"""
+        INSERT INTO {target} AS r ({', '.join(ROLLUP_DIMENSIONS)}, {measures})
+        {{select}}
+        ON CONFLICT ({', '.join(ROLLUP_DIMENSIONS)}) DO UPDATE SET
+            {updates},
+            updated_at = CURRENT_TIMESTAMP
+    """
+
+
+_UNNEST_TYPES = {
+    'bucket_start': 'timestamptz',
+    'warehouse_id': 'uuid',
+    'supplier_id': 'uuid',
+    'damage_type': 'text',
+    'confidence_sum': 'double precision',
+    'latency_ms_sum': 'double precision',
+}
+
+def _apply_sql(delta: str) -> str:
+    """Upsert hourly rows selected by `delta` into both grains in one statement"""
+    # The hourly upsert is a data-modifying CTE
+    return "WITH delta AS ({delta}), hourly AS ({hourly}) {daily}".format(
+        delta=delta,
+        hourly=_upsert_sql('inspection_rollups_hourly').format(
+            select="SELECT * FROM delta"
+        ),
+        daily=_upsert_sql('inspection_rollups_daily').format(
+            select=(
+                "SELECT date_trunc('day', bucket_start, 'UTC'), warehouse_id, supplier_id, damage_type, "
+                + ', '.join(f"SUM({m})" for m in ROLLUP_MEASURES)
+                + " FROM delta GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4"
+            )
+        )
+    )
+
+
+APPLY_DELTAS_SQL = _apply_sql("SELECT * FROM unnest({arrays}) AS d({names})".format(
+    arrays=', '.join(
+        f"CAST(:{name} AS {_UNNEST_TYPES.get(name, 'bigint')}[])"
+        for name in ROLLUP_DIMENSIONS + ROLLUP_MEASURES
+    ),
+    names=', '.join(ROLLUP_DIMENSIONS + ROLLUP_MEASURES)
+))
+
+# Per-parcel counter changes, spread over each parcel's completed inspections
+APPLY_RESOLUTION_CHANGES_SQL = _apply_sql("""
+    SELECT date_trunc('hour', i.completed_at, 'UTC') AS bucket_start,
+        p.current_warehouse_id AS warehouse_id,
+        sh.supplier_id,
+        CAST('' AS text) AS damage_type,
+        {measures}
+    FROM unnest(CAST(:parcel_id AS uuid[]), {arrays}) AS c(parcel_id, {names})
+    JOIN inspections i ON i.parcel_id = c.parcel_id AND i.overall_status = 'completed'
+    JOIN parcels p ON p.parcel_id = c.parcel_id
+    LEFT JOIN shipments sh ON sh.shipment_id = p.shipment_id
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+""".format(
+    measures=', '.join(
+        f"SUM(c.{m}) AS {m}" if m in RESOLUTION_MEASURES else f"0 AS {m}"
+        for m in ROLLUP_MEASURES
+    ),
+    arrays=', '.join(f"CAST(:{m} AS bigint[])" for m in RESOLUTION_MEASURES),
+    names=', '.join(RESOLUTION_MEASURES)
+))
+
+# Source query for a backfill range; resolution comes from the parcel
+BACKFILL_SOURCE_SQL = """
+    SELECT
+        date_trunc('hour', i.completed_at, 'UTC') AS bucket_start,
+        p.current_warehouse_id AS warehouse_id,
+        sh.supplier_id,
+        i.has_damage,
+        p.auto_resolved,
+        p.resolution_action,
+        i.overall_confidence,
+        COALESCE(i.damage_count, 0) AS damage_count,
+        i.damage_types,
+        EXTRACT(EPOCH FROM i.completed_at - i.started_at) * 1000 AS latency_ms
+    FROM inspections i
+    JOIN parcels p ON p.parcel_id = i.parcel_id
+    LEFT JOIN shipments sh ON sh.shipment_id = p.shipment_id
+    WHERE i.overall_status = 'completed'
+      AND i.completed_at >= :start AND i.completed_at < :end
+"""
+
+BACKFILL_HOURLY_SQL = f"""
+    WITH src AS ({BACKFILL_SOURCE_SQL}),
+    types AS (
+        SELECT src.bucket_start, src.warehouse_id, src.supplier_id, t.key AS damage_type,
+               t.value::BIGINT AS detections
+        FROM src, jsonb_each_text(CASE WHEN jsonb_typeof(src.damage_types) = 'object'
+                                       THEN src.damage_types ELSE '{{}}'::JSONB END) AS t
+    )
+    INSERT INTO inspection_rollups_hourly ({', '.join(ROLLUP_DIMENSIONS + ROLLUP_MEASURES)})
+    SELECT bucket_start, warehouse_id, supplier_id, '',
+        COUNT(*),
+        COUNT(*) FILTER (WHERE has_damage),
+        COUNT(*) FILTER (WHERE auto_resolved),
+        COUNT(*) FILTER (WHERE auto_resolved AND resolution_action = 'approved'),
+        COUNT(*) FILTER (WHERE auto_resolved AND resolution_action = 'quarantine'),
+        COUNT(*) FILTER (WHERE auto_resolved AND resolution_action = 'rejected'),
+        COALESCE(SUM(overall_confidence), 0),
+        COUNT(overall_confidence),
+        SUM(damage_count),
+        COALESCE(SUM(latency_ms), 0),
+        COUNT(latency_ms)
+    FROM src
+    GROUP BY 1, 2, 3
+    UNION ALL
+    SELECT bucket_start, warehouse_id, supplier_id, damage_type,
+        COUNT(*), COUNT(*), 0, 0, 0, 0, 0, 0, SUM(detections), 0, 0
+    FROM types
+    GROUP BY 1, 2, 3, 4
+"""
+
+BACKFILL_DAILY_SQL = f"""
+    INSERT INTO inspection_rollups_daily ({', '.join(ROLLUP_DIMENSIONS + ROLLUP_MEASURES)})
+    SELECT date_trunc('day', bucket_start, 'UTC'), warehouse_id, supplier_id, damage_type,
+        {', '.join(f'SUM({m})' for m in ROLLUP_MEASURES)}
+    FROM inspection_rollups_hourly
+    WHERE bucket_start >= :start AND bucket_start < :end
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+class RollupService:
+    """Maintain and read the inspection rollup tables"""
+
+    @staticmethod
+    async def apply(db: AsyncSession, records: List[Dict], sign: int = 1) -> int:
+        """
+        Add completed inspections to both rollup grains
+
+        Runs in the caller's transaction (one statement, no commit), so
+        counters move together with the inspections they count. Only pass
+        inspections that were just completed; re-applying double-counts.
+
+        Args:
+            sign: -1 removes the inspections (e.g. when deleting them)
+
+        Returns:
+            Number of hourly rows touched
+        """
+        deltas = rollup_deltas(records)
+        if not deltas:
+            return 0
+        if sign != 1:
+            deltas = {key: [sign * value for value in counters] for key, counters in deltas.items()}
+
+        # Sorted so concurrent finalizers lock rows in the same order
+        keys = sorted(deltas, key=lambda k: (k[0], str(k[1]), str(k[2]), k[3]))
+        params = {name: [key[i] for key in keys] for i, name in enumerate(ROLLUP_DIMENSIONS)}
+        for i, measure in enumerate(ROLLUP_MEASURES):
+            params[measure] = [deltas[key][i] for key in keys]
+
+        await db.execute(text(APPLY_DELTAS_SQL), params)
+        return len(keys)
+
+    @staticmethod
+    async def apply_resolution_changes(db: AsyncSession, changes: Iterable[Dict]) -> int:
+        """
+        Move auto-resolution counters of parcels whose resolution changed
+
+        Runs in the caller's transaction (one statement, no commit; none
+        when nothing changed). Every completed inspection of a changed
+        parcel moves from its previous counters to the new ones.
+
+        Args:
+            changes: Dicts with parcel_id, previous_auto_resolved,
+                previous_action, auto_resolved and action
+
+        Returns:
+            Number of parcels whose counters moved
+        """
+        deltas = {}
+        for change in changes:
+            previous = resolution_counters(change['previous_auto_resolved'], change['previous_action'])
+            current = resolution_counters(change['auto_resolved'], change['action'])
+            if previous != current:
+                deltas[change['parcel_id']] = [new - old for new, old in zip(current, previous)]
+        if not deltas:
+            return 0
+
+        # Sorted so concurrent writers lock rows in the same order
+        parcel_ids = sorted(deltas, key=str)
+        params = {'parcel_id': parcel_ids}
+        for i, measure in enumerate(RESOLUTION_MEASURES):
+            params[measure] = [deltas[parcel_id][i] for parcel_id in parcel_ids]
+
+        await db.execute(text(APPLY_RESOLUTION_CHANGES_SQL), params)
+        return len(parcel_ids)
+
+    @staticmethod
+    async def backfill(
+        db: AsyncSession,
+        since: datetime,
+        until: datetime
+    ) -> Dict:
+        """
+        Rebuild rollups for whole UTC days covering since..until
+
+        One transaction per day: delete the day's rows, re-aggregate its
+        hourly buckets from inspections, then derive the daily row from
+        them. Auto-resolution counts use each parcel's current resolution.
+        """
+        start = day_bucket(since)
+        end = day_bucket(until)
+        if end < utc(until):
+            end += timedelta(days=1)
+
+        days = hourly_rows = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = chunk_start + BACKFILL_CHUNK
+            params = {'start': chunk_start, 'end': chunk_end}
+
+            await db.execute(
+                text("DELETE FROM inspection_rollups_hourly WHERE bucket_start >= :start AND bucket_start < :end"),
+                params
+            )
+            await db.execute(
+                text("DELETE FROM inspection_rollups_daily WHERE bucket_start >= :start AND bucket_start < :end"),
+                params
+            )
+            result = await db.execute(text(BACKFILL_HOURLY_SQL), params)
+            hourly_rows += result.rowcount
+            await db.execute(text(BACKFILL_DAILY_SQL), params)
+            await db.commit()
+
+            days += 1
+            chunk_start = chunk_end
+
+        return {
+            'since': start,
+            'until': end,
+            'days': days,
+            'hourly_rows': hourly_rows
+        }
+
+    @staticmethod
+    def source_for(since: datetime, until: datetime):
+        """Daily rollups when the window is whole UTC days, else hourly"""
+        if day_bucket(since) == utc(since) and day_bucket(until) == utc(until):
+            return daily_rollups
+        return hourly_rollups
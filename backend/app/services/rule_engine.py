@@ -0,0 +1,521 @@
+"""Declarative auto-resolution rules compiled into a decision table
+
+A rule set is JSON (stored in system_settings.auto_resolution_rules):
+
+    {
+        "rules": [
+            {
+                "name": "no_damage_high_confidence",
+                "when": [
+                    ["has_damage", "==", false],
+                    ["overall_confidence", ">=", "$auto_approve_confidence_threshold"]
+                ],
+                "action": "approved",
+                "reason": "No damage detected with high confidence"
+            },
+            ...
+        ],
+        "default": {"name": "edge_case", "action": "manual_review", "reason": "..."}
+    }
+
+Rules are tried in order and the first whose clauses all hold wins. The
+left side of a clause is a feature (see FEATURES) or a "$setting"
+reference; the right side is a literal or a "$setting" reference.
+
+Compiling resolves setting references against a settings snapshot,
+folds clauses that only involve settings (dropping rules that can never
+match), and de-duplicates identical conditions so each is evaluated once
+per parcel or once per column batch.
+"""
+import logging
+import operator
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-parcel inputs available to rules; missing values are NaN and fail
+# every comparison except "!="
+FEATURES = (
+    'has_damage',
+    'damage_count',
+    'overall_confidence',
+    'images_received',
+    'damage_score',
+    'severity_rank',  # 0 none, 1 minor, 2 moderate, 3 severe
+    'supplier_damage_rate',
+    'unit_value',
+)
+
+SEVERITY_RANKS = {'minor': 1, 'moderate': 2, 'severe': 3}
+
+ACTIONS = ('approved', 'quarantine', 'rejected', 'manual_review')
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Fallbacks for settings missing from system_settings
+DEFAULT_SETTINGS = {
+    'auto_approve_enabled': True,
+    'auto_quarantine_enabled': True,
+    'auto_reject_enabled': False,
+    'min_images_for_auto_resolution': 6,
+    'auto_approve_confidence_threshold': 0.95,
+    'auto_quarantine_confidence_threshold': 0.70,
+    'auto_approve_max_damage_score': 0.10,
+    'auto_quarantine_min_damage_score': 0.30,
+    'use_supplier_history': True,
+    'supplier_damage_rate_threshold': 0.15,
+    'high_value_threshold': 500.0,
+}
+
+DEFAULT_RULES = {
+    'rules': [
+        {
+            'name': 'auto_resolution_disabled',
+            'when': [['$auto_approve_enabled', '==', False]],
+            'action': 'manual_review',
+            'reason': 'Auto-resolution disabled'
+        },
+        {
+            'name': 'insufficient_images',
+            'when': [['images_received', '<', '$min_images_for_auto_resolution']],
+            'action': 'manual_review',
+            'reason': 'Insufficient images ({images_received:.0f}/{min_images_for_auto_resolution:.0f})'
+        },
+        {
+            'name': 'high_value_damage',
+            'when': [
+                ['has_damage', '==', True],
+                ['unit_value', '>=', '$high_value_threshold']
+            ],
+            'action': 'manual_review',
+            'reason': 'Damage on high-value item'
+        },
+        {
+            'name': 'no_damage_high_confidence',
+            'when': [
+                ['has_damage', '==', False],
+                ['overall_confidence', '>=', '$auto_approve_confidence_threshold']
+            ],
+            'action': 'approved',
+            'reason': 'No damage detected with high confidence'
+        },
+        {
+            'name': 'supplier_history_review',
+            'when': [
+                ['$use_supplier_history', '==', True],
+                ['has_damage', '==', True],
+                ['supplier_damage_rate', '>=', '$supplier_damage_rate_threshold'],
+                ['damage_score', '<=', '$auto_approve_max_damage_score']
+            ],
+            'action': 'manual_review',
+            'reason': 'Minor damage from supplier with high damage rate'
+        },
+        {
+            'name': 'minor_damage_acceptable',
+            'when': [['damage_score', '<=', '$auto_approve_max_damage_score']],
+            'action': 'approved',
+            'reason': 'Damage score below threshold for approval'
+        },
+        {
+            'name': 'damage_detected',
+            'when': [
+                ['$auto_quarantine_enabled', '==', True],
+                ['damage_score', '>=', '$auto_quarantine_min_damage_score'],
+                ['overall_confidence', '>=', '$auto_quarantine_confidence_threshold']
+            ],
+            'action': 'quarantine',
+            'reason': 'Significant damage detected'
+        },
+        {
+            'name': 'low_confidence',
+            'when': [['overall_confidence', '<', '$auto_quarantine_confidence_threshold']],
+            'action': 'manual_review',
+            'reason': 'Low detection confidence'
+        },
+    ],
+    'default': {
+        'name': 'edge_case',
+        'action': 'manual_review',
+        'reason': 'Edge case - requires human judgment'
+    }
+}
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    name: str
+    action: str
+    can_auto_resolve: bool
+    reason: str
+    conditions: Tuple[int, ...]  # indexes into CompiledRuleSet.conditions
+
+
+class CompiledRuleSet:
+    """
+    Decision table: unique conditions plus rules that reference them
+
+    Rule index len(rules) is the default outcome.
+    """
+
+    def __init__(
+        self,
+        conditions: List[Tuple[str, str, float]],
+        rules: List[CompiledRule],
+        default: CompiledRule,
+        settings: Dict[str, float]
+    ):
+        self.conditions = tuple(conditions)
+        self.rules = tuple(rules)
+        self.default = default
+        self.settings = settings
+        self.outcomes = self.rules + (default,)
+
+        self._condition_funcs = tuple(
+            (feature, OPERATORS[op], value) for feature, op, value in self.conditions
+        )
+        self.features = frozenset(feature for feature, _, _ in self.conditions)
+
+        self.actions = np.array([rule.action for rule in self.outcomes], dtype=object)
+        self.names = np.array([rule.name for rule in self.outcomes], dtype=object)
+        self.auto = np.array([rule.can_auto_resolve for rule in self.outcomes], dtype=bool)
+
+    def uses(self, feature: str) -> bool:
+        """Whether any surviving rule reads a feature"""
+        return feature in self.features
+
+    def evaluate(self, values: Dict[str, float]) -> int:
+        """Index of the first matching rule for one parcel's features"""
+        results: Dict[int, bool] = {}
+
+        for index, rule in enumerate(self.rules):
+            for condition in rule.conditions:
+                if condition not in results:
+                    feature, compare, value = self._condition_funcs[condition]
+                    results[condition] = bool(compare(values[feature], value))
+                if not results[condition]:
+                    break
+            else:
+                return index
+
+        return len(self.rules)
+
+    def evaluate_batch(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Index of the first matching rule for every row of feature columns"""
+        size = len(next(iter(columns.values())))
+
+        with np.errstate(invalid='ignore'):
+            masks = [
+                compare(columns[feature], value)
+                for feature, compare, value in self._condition_funcs
+            ]
+
+        rule_masks = []
+        for rule in self.rules:
+            mask = np.ones(size, dtype=bool)
+            for condition in rule.conditions:
+                mask &= masks[condition]
+            rule_masks.append(mask)
+
+        if not rule_masks:
+            return np.full(size, len(self.rules))
+
+        return np.select(rule_masks, np.arange(len(self.rules)), default=len(self.rules))
+
+    def reason(self, index: int, values: Optional[Dict[str, float]] = None) -> str:
+        """Reason text for an outcome, with {feature} and {setting} placeholders filled in"""
+        template = self.outcomes[index].reason
+        if '{' not in template:
+            return template
+        try:
+            return template.format(**self.settings, **(values or {}))
+        except (KeyError, ValueError, IndexError, TypeError):
+            # Missing placeholder, or a value (e.g. None) its format spec rejects
+            return template
+
+
+def _as_number(value: Any) -> float:
+    if value is None:
+        return float('nan')
+    return float(value)
+
+
+def _resolve(operand: Any, settings: Dict[str, Any]):
+    """Return ("setting", value), ("feature", name) or ("literal", value)"""
+    if isinstance(operand, str) and operand.startswith('$'):
+        key = operand[1:]
+        if key in settings:
+            return 'setting', _as_number(settings[key])
+        if key in DEFAULT_SETTINGS:
+            return 'setting', _as_number(DEFAULT_SETTINGS[key])
+        raise ValueError(f"Unknown setting reference: {operand}")
+    if isinstance(operand, str):
+        if operand not in FEATURES:
+            raise ValueError(f"Unknown feature: {operand}")
+        return 'feature', operand
+    if isinstance(operand, (bool, int, float)):
+        return 'literal', _as_number(operand)
+    raise ValueError(f"Invalid operand: {operand!r}")
+
+
+def _compile_outcome(spec: Dict, conditions=()) -> CompiledRule:
+    action = spec.get('action')
+    if action not in ACTIONS:
+        raise ValueError(f"Invalid action for rule {spec.get('name')}: {action}")
+    return CompiledRule(
+        name=spec.get('name') or action,
+        action=action,
+        can_auto_resolve=action != 'manual_review',
+        reason=spec.get('reason', ''),
+        conditions=tuple(conditions)
+    )
+
+
+def compile_rules(spec: Dict, settings: Dict[str, Any]) -> CompiledRuleSet:
+    """
+    Compile a rule set against settings
+
+    Raises:
+        ValueError: If the rule set references unknown features, settings,
+            operators or actions
+    """
+    condition_index: Dict[Tuple[str, str, float], int] = {}
+    rules = []
+
+    for rule_spec in spec.get('rules', []):
+        conditions = []
+        never_matches = False
+
+        for clause in rule_spec.get('when', []):
+            if len(clause) != 3 or clause[1] not in OPERATORS:
+                raise ValueError(f"Invalid clause in rule {rule_spec.get('name')}: {clause}")
+            left, op, right = clause
+            left_kind, left_value = _resolve(left, settings)
+            right_kind, right_value = _resolve(right, settings)
+
+            if right_kind == 'feature':
+                raise ValueError(f"Right side must be a literal or setting: {clause}")
+            if left_kind == 'literal':
+                raise ValueError(f"Left side must be a feature or setting: {clause}")
+
+            if left_kind == 'setting':
+                # Known at compile time
+                if not OPERATORS[op](left_value, right_value):
+                    never_matches = True
+                continue
+
+            conditions.append((left_value, op, right_value))
+
+        # Validate the action even when the rule is folded away
+        _compile_outcome(rule_spec)
+        if never_matches:
+            continue
+
+        indexes = []
+        for key in conditions:
+            if key not in condition_index:
+                condition_index[key] = len(condition_index)
+            indexes.append(condition_index[key])
+        rules.append(_compile_outcome(rule_spec, indexes))
+
+    default = _compile_outcome(spec.get('default', DEFAULT_RULES['default']))
+    typed_settings = {
+        key: _as_number(value)
+        for key, value in {**DEFAULT_SETTINGS, **settings}.items()
+        if isinstance(value, (bool, int, float)) or value is None
+    }
+
+    return CompiledRuleSet(
+        conditions=list(condition_index),
+        rules=rules,
+        default=default,
+        settings=typed_settings
+    )
+
+
+def _structure(rules: CompiledRuleSet):
+    """Rule set shape without threshold values; equal shapes can share one evaluation"""
+    return (
+        tuple((feature, op) for feature, op, _ in rules.conditions),
+        tuple((rule.name, rule.action, rule.conditions) for rule in rules.rules),
+        rules.default.name
+    )
+
+
+def evaluate_many(
+    rule_sets: List[CompiledRuleSet],
+    columns: Dict[str, np.ndarray],
+    chunk_size: int = 200_000
+):
+    """
+    Evaluate many compiled rule sets over the same feature columns
+
+    Rule sets that differ only in threshold values are evaluated together
+    by broadcasting a (candidates x rows) comparison per condition. Rows
+    are processed in chunks to bound memory.
+
+    Yields:
+        (rule set indexes, row slice, outcome matrix) per group and chunk,
+        where outcome[k, i] indexes rule_sets[indexes[k]].outcomes
+    """
+    groups: Dict[Any, List[int]] = {}
+    for index, rules in enumerate(rule_sets):
+        groups.setdefault(_structure(rules), []).append(index)
+
+    size = len(next(iter(columns.values())))
+
+    for indexes in groups.values():
+        template = rule_sets[indexes[0]]
+        thresholds = np.array(
+            [[value for _, _, value in rule_sets[i].conditions] for i in indexes],
+            dtype=np.float64
+        ).reshape(len(indexes), len(template.conditions))
+        n_rules = len(template.rules)
+
+        for start in range(0, size, chunk_size):
+            rows = slice(start, min(start + chunk_size, size))
+            shape = (len(indexes), rows.stop - rows.start)
+
+            with np.errstate(invalid='ignore'):
+                masks = [
+                    compare(columns[feature][rows][np.newaxis, :], thresholds[:, c][:, np.newaxis])
+                    for c, (feature, compare, _) in enumerate(template._condition_funcs)
+                ]
+
+            rule_masks = []
+            for rule in template.rules:
+                mask = np.ones(shape, dtype=bool)
+                for condition in rule.conditions:
+                    mask &= masks[condition]
+                rule_masks.append(mask)
+
+            if rule_masks:
+                outcome = np.select(rule_masks, np.arange(n_rules), default=n_rules)
+            else:
+                outcome = np.full(shape, n_rules)
+
+            yield indexes, rows, outcome
+
+
+def severity_rank(max_severity: Optional[str]) -> int:
+    return SEVERITY_RANKS.get(max_severity, 0)
+
+
+def damage_score(has_damage: bool, damage_count: int, images_received: int) -> float:
+    """Detections per image, capped at 1.0"""
+    if has_damage and damage_count and images_received:
+        return min(1.0, damage_count / images_received)
+    return 0.0
+
+
+def build_features(
+    inspection,
+    supplier_damage_rate: Optional[float] = None,
+    unit_value: Optional[float] = None
+) -> Dict[str, float]:
+    """Feature values for one inspection"""
+    has_damage = bool(inspection.has_damage)
+    damage_count = inspection.damage_count or 0
+    images_received = inspection.images_received or 0
+
+    return {
+        'has_damage': float(has_damage),
+        'damage_count': float(damage_count),
+        'overall_confidence': _as_number(inspection.overall_confidence),
+        'images_received': float(images_received),
+        'damage_score': damage_score(has_damage, damage_count, images_received),
+        'severity_rank': float(severity_rank(getattr(inspection, 'max_severity', None))),
+        'supplier_damage_rate': _as_number(supplier_damage_rate),
+        'unit_value': _as_number(unit_value),
+    }
+
+
+def build_feature_columns(
+    has_damage,
+    damage_count,
+    overall_confidence,
+    images_received,
+    max_severity=None,
+    supplier_damage_rate=None,
+    unit_value=None
+) -> Dict[str, np.ndarray]:
+    """
+    Feature columns for many inspections (None becomes NaN)
+
+    Sequences are converted column-wise; ndarray inputs (as streamed by
+    replay) are used as they are.
+    """
+    has_damage = np.asarray(has_damage, dtype=bool)
+    size = len(has_damage)
+
+    def column(values):
+        if values is None:
+            return np.full(size, np.nan)
+        return np.asarray(values, dtype=np.float64)
+
+    damage_count = np.nan_to_num(column(damage_count))
+    images = np.nan_to_num(column(images_received))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.where(
+            has_damage & (damage_count > 0) & (images > 0),
+            np.minimum(1.0, damage_count / np.where(images > 0, images, 1.0)),
+            0.0
+        )
+
+    return {
+        'has_damage': has_damage.astype(np.float64),
+        'damage_count': damage_count,
+        'overall_confidence': column(overall_confidence),
+        'images_received': images,
+        'damage_score': score,
+        'severity_rank': np.zeros(size) if max_severity is None else severity_ranks(max_severity),
+        'supplier_damage_rate': column(supplier_damage_rate),
+        'unit_value': column(unit_value),
+    }
+
+
+def severity_ranks(max_severity) -> np.ndarray:
+    """severity_rank for many inspections, looked up once per distinct label"""
+    labels = np.asarray(max_severity)
+    if labels.dtype.kind != 'U':
+        labels = np.asarray(max_severity, dtype=object)
+        labels = np.where(np.equal(labels, None), '', labels).astype(str)
+    keys, inverse = np.unique(labels, return_inverse=True)
+    ranks = np.array([severity_rank(key) for key in keys], dtype=np.float64)
+    return ranks[inverse]
+
+
+# Last compiled rule set per settings snapshot version
+_compiled_cache: Dict[str, Tuple[int, CompiledRuleSet]] = {}
+
+
+def rules_for_snapshot(snapshot) -> CompiledRuleSet:
+    """
+    Compiled rules for a settings snapshot, compiled once per version
+
+    Uses the auto_resolution_rules setting when present and valid, the
+    built-in DEFAULT_RULES otherwise.
+    """
+    cached = _compiled_cache.get(snapshot.category)
+    if cached is not None and cached[0] == snapshot.version:
+        return cached[1]
+
+    spec = snapshot.get('auto_resolution_rules') or DEFAULT_RULES
+    try:
+        compiled = compile_rules(spec, snapshot.values)
+    except ValueError as e:
+        logger.error(f"Invalid auto_resolution_rules, using built-in rules: {e}")
+        compiled = compile_rules(DEFAULT_RULES, snapshot.values)
+
+    _compiled_cache[snapshot.category] = (snapshot.version, compiled)
+    return compiled
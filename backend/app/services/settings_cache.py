@@ -0,0 +1,151 @@
+"""Process-wide cache of system settings
+
+Settings are loaded once per category and kept until a system_settings
+change is announced on the system_settings_changed channel (see
+database/migrations/add_system_settings_notify.sql) or the TTL expires.
+The TTL is the fallback for processes that are not listening, such as
+Celery workers, and for notifications missed while disconnected.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.system_setting import SystemSetting
+
+SETTINGS_CHANNEL = "system_settings_changed"
+
+
+def parse_setting_value(setting: SystemSetting) -> Any:
+    """Convert a system_settings row to its typed value"""
+    if setting.value_type == 'number':
+        return float(setting.setting_value)
+    if setting.value_type == 'boolean':
+        return setting.setting_value.lower() == 'true'
+    if setting.value_type == 'json':
+        return setting.json_value
+    return setting.setting_value
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Immutable set of typed settings for one category"""
+    category: str
+    values: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+    loaded_at: float = 0.0  # time.monotonic()
+    loaded_at_wall: float = 0.0  # time.time()
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+
+class SettingsCache:
+    """Cached settings for one category with notify and TTL invalidation"""
+
+    def __init__(self, category: str, ttl_seconds: int):
+        self.category = category
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._version = 0
+        self._stale = True
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        self.loads = 0
+        self.hits = 0
+
+    def invalidate(self):
+        """Force a reload on next access"""
+        self._stale = True
+
+    def on_notification(self, channel: str, payload: str):
+        """Listener callback; payload is the changed row's category, or empty"""
+        if not payload or payload == self.category:
+            self.invalidate()
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and not self._stale
+            and self._snapshot.age_seconds < self.ttl_seconds
+        )
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Celery tasks each run in a fresh event loop
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def get(self, db: AsyncSession) -> SettingsSnapshot:
+        """
+        Get the current settings, loading them if stale
+
+        Concurrent callers share a single reload.
+        """
+        if self._is_fresh():
+            self.hits += 1
+            return self._snapshot
+
+        async with self._get_lock():
+            if self._is_fresh():
+                self.hits += 1
+                return self._snapshot
+
+            # Clear before reading so a change during the load triggers another
+            self._stale = False
+            try:
+                result = await db.execute(
+                    select(SystemSetting).where(
+                        SystemSetting.category == self.category,
+                        SystemSetting.is_active == True
+                    )
+                )
+                values = {
+                    setting.setting_key: parse_setting_value(setting)
+                    for setting in result.scalars().all()
+                }
+            except Exception:
+                self._stale = True
+                raise
+
+            self._version += 1
+            self.loads += 1
+            self._snapshot = SettingsSnapshot(
+                category=self.category,
+                values=values,
+                version=self._version,
+                loaded_at=time.monotonic(),
+                loaded_at_wall=time.time()
+            )
+            return self._snapshot
+
+    def info(self) -> Dict:
+        """Cache state for diagnostics"""
+        snapshot = self._snapshot
+        return {
+            'category': self.category,
+            'version': snapshot.version if snapshot else 0,
+            'age_seconds': round(snapshot.age_seconds, 3) if snapshot else None,
+            'loaded_at': snapshot.loaded_at_wall if snapshot else None,
+            'ttl_seconds': self.ttl_seconds,
+            'stale': not self._is_fresh(),
+            'loads': self.loads,
+            'hits': self.hits
+        }
+
+
+# Singleton instance
+auto_resolution_settings_cache = SettingsCache(
+    category='auto_resolution',
+    ttl_seconds=settings.SETTINGS_CACHE_TTL
+)
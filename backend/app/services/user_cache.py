@@ -0,0 +1,150 @@
+"""Process-wide cache of authenticated users
+
+get_current_user runs on every authenticated request. Here decoded tokens
+are memoized by token string, and active users are kept by username (the
+token subject), so a repeat caller costs no signature check and no users
+query. Both maps are LRU-bounded.
+
+A cached user is returned as a new instance merged into the request's
+session without loading (no SQL), so endpoints can use it like a queried
+row. Inactive users are never cached: deactivation takes effect on the
+next request once the entry is dropped.
+
+Entries are dropped by invalidate() or when a change that matters for
+authorization (active flag, role, identity, password) is announced on the
+users_changed channel (see database/migrations/add_users_notify.sql); the
+TTL is the fallback for processes that are not listening.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.models.user import User
+from app.schemas.auth import TokenData
+
+USERS_CHANNEL = "users_changed"
+
+
+def _ratio(hits: int, misses: int) -> Optional[float]:
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+class UserCache:
+    """Memoized token decoding and cached active users with notify and TTL invalidation"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # username -> (expires at, column values)
+        self._users: OrderedDict = OrderedDict()
+        # token -> (expires at, TokenData)
+        self._tokens: OrderedDict = OrderedDict()
+        # Bumped by every invalidation; a load that started earlier is not stored
+        self._generation = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.token_hits = 0
+        self.token_misses = 0
+        self.invalidations = 0
+
+    def invalidate(self, username: Optional[str] = None):
+        """Drop one user (or every user) so the next request reloads it"""
+        self._generation += 1
+        self.invalidations += 1
+        if username:
+            self._users.pop(username, None)
+        else:
+            self._users.clear()
+
+    def on_notification(self, channel: str, payload: str):
+        """Listener callback; payload is the changed user's username, or empty"""
+        self.invalidate(payload or None)
+
+    def _put(self, entries: OrderedDict, key: str, expires_at: float, value):
+        entries[key] = (expires_at, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _get(self, entries: OrderedDict, key: str):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry[1]
+
+    def decode_token(self, token: str) -> Optional[TokenData]:
+        """
+        decode_access_token, memoized until the token expires (or the TTL)
+
+        Invalid tokens are not memoized.
+        """
+        token_data = self._get(self._tokens, token)
+        if token_data is not None:
+            self.token_hits += 1
+            return token_data
+
+        self.token_misses += 1
+        token_data = decode_access_token(token)
+        if token_data is not None:
+            lifetime = self.ttl_seconds
+            if token_data.expires_at is not None:
+                lifetime = min(lifetime, token_data.expires_at.timestamp() - time.time())
+            if lifetime > 0:
+                self._put(self._tokens, token, time.monotonic() + lifetime, token_data)
+        return token_data
+
+    async def get_user(self, db: AsyncSession, username: str) -> Optional[User]:
+        """User by username, from the cache when it is an active user"""
+        values = self._get(self._users, username)
+        if values is not None:
+            self.user_hits += 1
+            user = User(**values)
+            make_transient_to_detached(user)
+            return await db.merge(user, load=False)
+
+        self.user_misses += 1
+        generation = self._generation
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        if user is not None and user.is_active and generation == self._generation:
+            values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+            self._put(self._users, username, time.monotonic() + self.ttl_seconds, values)
+        return user
+
+    def info(self) -> Dict:
+        """Cache state and hit ratios for diagnostics"""
+        return {
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries': self.max_entries,
+            'users': {
+                'entries': len(self._users),
+                'hits': self.user_hits,
+                'misses': self.user_misses,
+                'hit_ratio': _ratio(self.user_hits, self.user_misses)
+            },
+            'tokens': {
+                'entries': len(self._tokens),
+                'hits': self.token_hits,
+                'misses': self.token_misses,
+                'hit_ratio': _ratio(self.token_hits, self.token_misses)
+            },
+            'invalidations': self.invalidations
+        }
+
+
+# Singleton instance
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES
+)
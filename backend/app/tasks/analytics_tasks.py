@@ -0,0 +1,70 @@
+"""
+Celery tasks for analytics maintenance
+
+refresh_materialized_views and materialize_heatmaps run on the beat
+schedule configured in app.core.celery_app (every
+MATVIEW_REFRESH_INTERVAL_MINUTES and hourly); backfill_rollups is queued
+on demand.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.core.celery_app import celery_app
+from app.db.session import worker_session
+from app.services.analytics_service import AnalyticsService, MATERIALIZED_VIEWS
+from app.services.heatmap_service import HeatmapService
+from app.services.rollup_service import RollupService
+
+logger = logging.getLogger(__name__)
+
+
+async def _refresh(views: List[str]) -> List[Dict]:
+    async with worker_session() as db:
+        return await AnalyticsService.refresh_materialized_views(db, views)
+
+
+@celery_app.task(name="analytics.refresh_materialized_views")
+def refresh_materialized_views(views: Optional[List[str]] = None) -> Dict:
+    """REFRESH ... CONCURRENTLY the analytics views and report durations"""
+    results = asyncio.run(_refresh(views or list(MATERIALIZED_VIEWS)))
+
+    for result in results:
+        result['started_at'] = result['started_at'].isoformat()
+
+    return {
+        'refreshed': [r['view'] for r in results if r['success']],
+        'failed': [r['view'] for r in results if not r['success']],
+        'total_duration_ms': sum(r['duration_ms'] for r in results),
+        'views': results
+    }
+
+
+async def _backfill(since: datetime, until: datetime) -> Dict:
+    async with worker_session() as db:
+        return await RollupService.backfill(db, since, until)
+
+
+@celery_app.task(name="analytics.backfill_rollups")
+def backfill_rollups(days: int = 30) -> Dict:
+    """Rebuild the inspection rollups for the last `days` days"""
+    until = datetime.utcnow()
+    result = asyncio.run(_backfill(until - timedelta(days=days), until))
+    result['since'] = result['since'].isoformat()
+    result['until'] = result['until'].isoformat()
+    return result
+
+
+async def _materialize_heatmaps(days: List) -> List:
+    async with worker_session() as db:
+        return await HeatmapService.refresh(db, days)
+
+
+@celery_app.task(name="analytics.materialize_heatmaps")
+def materialize_heatmaps(days: int = 2) -> Dict:
+    """Materialize the damage heatmap grids of the last `days` UTC days"""
+    today = datetime.utcnow().date()
+    window = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    computed = asyncio.run(_materialize_heatmaps(window))
+    return {'days': [day.isoformat() for day in computed]}
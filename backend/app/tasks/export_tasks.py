@@ -0,0 +1,45 @@
+"""
+Celery tasks for columnar exports
+
+export_dataset writes a Parquet/Arrow file to the storage backend and
+reports the running row count as PROGRESS.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.services.export_service import storage_export_path, write_export
+from app.services.ledger_verifier import sync_dsn
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="exports.export_dataset")
+def export_dataset(
+    self,
+    dataset: str,
+    fmt: str = 'parquet',
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict:
+    """Export a dataset (inspections or detections) to the storage backend"""
+    since_at = datetime.fromisoformat(since) if since else None
+    until_at = datetime.fromisoformat(until) if until else None
+
+    def on_batch(rows: int):
+        self.update_state(
+            state="PROGRESS",
+            meta={'stage': 'export', 'dataset': dataset, 'rows': rows}
+        )
+
+    return write_export(
+        dsn=sync_dsn(settings.DATABASE_URL),
+        dataset=dataset,
+        path=storage_export_path(dataset, fmt, since_at, until_at),
+        fmt=fmt,
+        since=since_at,
+        until=until_at,
+        on_batch=on_batch
+    )
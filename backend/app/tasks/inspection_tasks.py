@@ -0,0 +1,170 @@
+"""Background tasks for the inspection pipeline
+
+Run a worker with:
+    celery -A app.core.celery_app worker --loglevel=info
+
+ML throughput scales with the number of worker processes.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import worker_session
+from app.services.event_bus import event_bus
+from app.services.audit_ledger import audit_ledger, finalized_inspection_events
+from app.services.inspection_service import InspectionService
+
+logger = logging.getLogger(__name__)
+
+
+async def _process_image(image_id: UUID) -> Optional[List[Dict]]:
+    """Run ML on one stored image; None if it was already processed"""
+    async with worker_session() as db:
+        return await InspectionService.process_image_with_ml(
+            db=db,
+            image_id=image_id
+        )
+
+
+async def _report_progress(
+    inspection_id: UUID,
+    image_id: UUID,
+    detections: Optional[List[Dict]]
+) -> Optional[Dict]:
+    """Inspection progress, published when this run wrote the detections"""
+    async with worker_session() as db:
+        progress = await InspectionService.get_processing_progress(
+            db=db,
+            inspection_id=inspection_id
+        )
+
+    if progress is not None and detections is not None:
+        event_bus.publish_sync(
+            "detections_written",
+            inspection_id,
+            {
+                'image_id': str(image_id),
+                'detections_found': len(detections),
+                'images_processed': progress['images_processed'],
+                'images_expected': progress['images_expected']
+            },
+            warehouse_id=progress['warehouse_id']
+        )
+
+    return progress
+
+
+async def _finalize(inspection_id: UUID) -> Dict:
+    """
+    Complete an inspection and apply auto-resolution
+
+    Only the call whose UPDATE completed the inspection records ledger
+    events and announces it; concurrent or repeated calls are no-ops.
+    """
+    async with worker_session() as db:
+        results = await InspectionService.finalize_inspections(
+            db=db,
+            inspection_ids=[inspection_id]
+        )
+
+    if not results or not results[0]['newly_completed']:
+        return {
+            'inspection_id': str(inspection_id),
+            'finalized': False,
+            'reason': 'Inspection is not in progress'
+        }
+    result = results[0]
+
+    await audit_ledger.record_many(
+        finalized_inspection_events(result),
+        session_factory=worker_session
+    )
+
+    decision = result['auto_resolution']
+    event_bus.publish_sync(
+        "inspection_finalized",
+        inspection_id,
+        {
+            'overall_status': result['inspection'].overall_status,
+            'parcel_status': result['parcel_status'],
+            'action': decision['action']
+        },
+        warehouse_id=result['warehouse_id']
+    )
+
+    return {
+        'inspection_id': str(inspection_id),
+        'finalized': True,
+        'parcel_id': str(result['parcel_id']),
+        'parcel_status': result['parcel_status'],
+        'action': decision['action'],
+        'can_auto_resolve': decision['can_auto_resolve'],
+        'reason': decision['reason']
+    }
+
+
+@celery_app.task(bind=True, name="inspections.process_image", max_retries=3, default_retry_delay=10)
+def process_inspection_image(self, inspection_id: str, image_id: str) -> Dict:
+    """
+    Run damage detection for an uploaded inspection image
+
+    Idempotent: a redelivered task for a processed image writes nothing.
+    Queues finalization once every expected image has been processed.
+    """
+    self.update_state(
+        state="PROGRESS",
+        meta={'stage': 'inference', 'inspection_id': inspection_id, 'image_id': image_id}
+    )
+
+    try:
+        detections = asyncio.run(_process_image(UUID(image_id)))
+    except Exception as exc:
+        logger.exception(f"Processing failed for image {image_id}")
+        raise self.retry(exc=exc)
+
+    # Detections are committed from here on; a retry would find the image
+    # processed, so later failures are logged rather than retried
+    try:
+        progress = asyncio.run(_report_progress(UUID(inspection_id), UUID(image_id), detections))
+    except Exception:
+        logger.exception(f"Progress report failed for image {image_id}")
+        progress = None
+
+    result = {
+        'inspection_id': inspection_id,
+        'image_id': image_id,
+        'already_processed': detections is None,
+        'detections_found': len(detections or []),
+        'progress': progress
+    }
+
+    # Also checked for an already processed image: the run that processed
+    # it may have been lost before queueing finalization
+    if (
+        settings.AUTO_FINALIZE_INSPECTIONS
+        and progress is not None
+        and progress['overall_status'] == 'in_progress'
+        and progress['images_processed'] >= progress['images_expected']
+    ):
+        finalize = finalize_inspection.delay(inspection_id)
+        result['finalize_job_id'] = finalize.id
+
+    return result
+
+
+@celery_app.task(bind=True, name="inspections.finalize", max_retries=3, default_retry_delay=10)
+def finalize_inspection(self, inspection_id: str) -> Dict:
+    """Complete an inspection and apply the auto-resolution decision"""
+    self.update_state(
+        state="PROGRESS",
+        meta={'stage': 'finalize', 'inspection_id': inspection_id}
+    )
+
+    try:
+        return asyncio.run(_finalize(UUID(inspection_id)))
+    except Exception as exc:
+        logger.exception(f"Finalization failed for inspection {inspection_id}")
+        raise self.retry(exc=exc)
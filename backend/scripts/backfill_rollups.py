@@ -0,0 +1,38 @@
+"""
+Rebuild the hourly and daily inspection rollups
+
+Re-aggregates whole UTC days from inspections, one transaction per day.
+Safe to run while inspections are being completed.
+
+Usage (from backend/):
+    python -m scripts.backfill_rollups --days 365
+    python -m scripts.backfill_rollups --since 2024-01-01 --until 2024-02-01
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.db.session import async_session, engine
+from app.services.rollup_service import RollupService
+
+
+async def main(args):
+    until = datetime.fromisoformat(args.until) if args.until else datetime.utcnow()
+    since = datetime.fromisoformat(args.since) if args.since else until - timedelta(days=args.days)
+
+    started = time.perf_counter()
+    async with async_session() as db:
+        result = await RollupService.backfill(db, since, until)
+    await engine.dispose()
+
+    print(f"Rebuilt {result['days']} days ({result['since']:%Y-%m-%d} to {result['until']:%Y-%m-%d}), "
+          f"{result['hourly_rows']:,} hourly rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30, help="Days to rebuild when --since is omitted")
+    parser.add_argument("--since", help="First day (ISO date)")
+    parser.add_argument("--until", help="End (ISO date, exclusive)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+"""
+Benchmark damage detection inserts: ORM per-row vs executemany vs COPY
+
+Writes synthetic detections against a scratch parcel/inspection/image and
+prints rows/sec for each path. Scratch rows are deleted afterwards.
+
+Usage (from backend/):
+    python -m scripts.benchmark_detection_writer --rows 20000 --batch 200
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.db.session import async_session, engine
+from app.models.damage_detection import DamageDetection
+from app.models.inspection import Inspection
+from app.models.inspection_image import InspectionImage
+from app.models.parcel import Parcel
+from app.services.detection_writer import DetectionWriter, build_detection_rows
+
+
+def _fake_ml_result(count: int) -> dict:
+    detections = []
+    for _ in range(count):
+        x1, y1 = random.uniform(0, 600), random.uniform(0, 400)
+        detections.append({
+            'class_id': random.randint(0, 79),
+            'class_name': random.choice(['dent', 'tear', 'crush', 'water', 'puncture']),
+            'confidence': random.uniform(0.25, 0.99),
+            'bbox': {'x1': x1, 'y1': y1, 'x2': x1 + 120, 'y2': y1 + 80}
+        })
+    return {'detections': detections}
+
+
+async def _orm_path(inspection_id, image_id, ml_result):
+    """Previous path: one ORM object per detection, full dict as metadata"""
+    async with async_session() as db:
+        for detection_data in ml_result['detections']:
+            db.add(DamageDetection(
+                inspection_id=inspection_id,
+                image_id=image_id,
+                damage_type=detection_data['class_name'],
+                confidence=detection_data['confidence'],
+                severity="moderate",
+                bbox_x1=detection_data['bbox']['x1'],
+                bbox_y1=detection_data['bbox']['y1'],
+                bbox_x2=detection_data['bbox']['x2'],
+                bbox_y2=detection_data['bbox']['y2'],
+                model_name="YOLOv8n",
+                model_version="8.0",
+                detection_metadata=detection_data
+            ))
+        await db.commit()
+
+
+async def _writer_path(inspection_id, image_id, ml_result, method):
+    async with async_session() as db:
+        rows = build_detection_rows(inspection_id, image_id, ml_result)
+        await DetectionWriter.write(db, rows, method=method)
+        await db.commit()
+
+
+async def main(total_rows: int, batch_size: int):
+    parcel_id, inspection_id, image_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    async with async_session() as db:
+        db.add(Parcel(parcel_id=parcel_id, tracking_number=f"BENCH-{parcel_id.hex[:12]}"))
+        db.add(Inspection(inspection_id=inspection_id, parcel_id=parcel_id))
+        db.add(InspectionImage(image_id=image_id, inspection_id=inspection_id, file_path="/tmp/bench.jpg"))
+        await db.commit()
+
+    batches = [_fake_ml_result(batch_size) for _ in range(max(1, total_rows // batch_size))]
+    rows_written = batch_size * len(batches)
+
+    paths = {
+        'orm (per-row add)': lambda r: _orm_path(inspection_id, image_id, r),
+        'executemany': lambda r: _writer_path(inspection_id, image_id, r, "executemany"),
+        'copy': lambda r: _writer_path(inspection_id, image_id, r, "copy"),
+    }
+
+    try:
+        print(f"{rows_written} rows in batches of {batch_size}")
+        for name, run in paths.items():
+            started = time.perf_counter()
+            for ml_result in batches:
+                await run(ml_result)
+            elapsed = time.perf_counter() - started
+            print(f"{name:20s} {rows_written / elapsed:>12,.0f} rows/sec ({elapsed:.2f}s)")
+
+            async with async_session() as db:
+                await db.execute(delete(DamageDetection).where(DamageDetection.inspection_id == inspection_id))
+                await db.commit()
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(DamageDetection).where(DamageDetection.inspection_id == inspection_id))
+            await db.execute(delete(InspectionImage).where(InspectionImage.inspection_id == inspection_id))
+            await db.execute(delete(Inspection).where(Inspection.inspection_id == inspection_id))
+            await db.execute(delete(Parcel).where(Parcel.parcel_id == parcel_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Total detections per path")
+    parser.add_argument("--batch", type=int, default=200, help="Detections per image (per transaction)")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch))
@@ -0,0 +1,190 @@
+"""
+Benchmark parcel updates: row-level supplier metrics trigger vs delta counters
+
+Creates a scratch supplier with --history parcels spread over older
+shipments plus one shipment of --parcels parcels, then bulk-flips
+has_damage on that shipment --rounds times under each trigger setup:
+
+    legacy       the original trigger_update_supplier_metrics (three COUNT
+                 scans of the supplier's parcels per updated row)
+    incremental  the statement-level delta triggers from
+                 replace_supplier_metrics_trigger.sql
+
+After the incremental run the counters are compared with
+recompute_supplier_metrics(). Everything runs in one transaction that is
+rolled back, but swapping triggers takes ACCESS EXCLUSIVE locks on parcels
+and shipments: do not run this against a live database.
+
+Usage (from backend/):
+    python -m scripts.benchmark_supplier_metrics --parcels 2000 --history 20000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+INCREMENTAL_TRIGGERS = (
+    ('parcels', 'parcels_supplier_metrics_insert'),
+    ('parcels', 'parcels_supplier_metrics_update'),
+    ('parcels', 'parcels_supplier_metrics_delete'),
+    ('shipments', 'shipments_supplier_metrics_insert'),
+    ('shipments', 'shipments_supplier_metrics_update'),
+    ('shipments', 'shipments_supplier_metrics_delete'),
+)
+
+# Verbatim from schema.sql, under a scratch name
+LEGACY_TRIGGER_SQL = (
+    """
+    CREATE FUNCTION benchmark_legacy_supplier_metrics()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        UPDATE suppliers s
+        SET
+            total_shipments = (
+                SELECT COUNT(*) FROM shipments WHERE supplier_id = s.supplier_id
+            ),
+            total_damaged_parcels = (
+                SELECT COUNT(*)
+                FROM parcels p
+                JOIN shipments sh ON p.shipment_id = sh.shipment_id
+                WHERE sh.supplier_id = s.supplier_id AND p.has_damage = TRUE
+            ),
+            damage_rate = (
+                SELECT COALESCE(
+                    CAST(COUNT(*) FILTER (WHERE p.has_damage) AS DECIMAL) /
+                    NULLIF(COUNT(*), 0),
+                    0
+                )
+                FROM parcels p
+                JOIN shipments sh ON p.shipment_id = sh.shipment_id
+                WHERE sh.supplier_id = s.supplier_id
+            )
+        WHERE s.supplier_id = (
+            SELECT supplier_id FROM shipments WHERE shipment_id = NEW.shipment_id
+        );
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER benchmark_legacy_supplier_metrics
+    AFTER INSERT OR UPDATE ON parcels
+    FOR EACH ROW
+    WHEN (NEW.has_damage IS NOT NULL)
+    EXECUTE FUNCTION benchmark_legacy_supplier_metrics()
+    """,
+)
+
+METRIC_COLUMNS = "total_shipments, total_parcels_received, total_damaged_parcels, damage_rate"
+
+
+async def _set_incremental(conn, enabled: bool):
+    action = "ENABLE" if enabled else "DISABLE"
+    for table_name, trigger in INCREMENTAL_TRIGGERS:
+        await conn.execute(text(f"ALTER TABLE {table_name} {action} TRIGGER {trigger}"))
+
+
+async def _seed(conn, supplier_id, shipment_id, parcels: int, history: int):
+    await conn.execute(
+        text("INSERT INTO suppliers (supplier_id, supplier_code, name) VALUES (:id, :code, 'Benchmark supplier')"),
+        {'id': supplier_id, 'code': f"BENCH-{supplier_id.hex[:8]}"}
+    )
+    await conn.execute(
+        text("""
+            INSERT INTO shipments (shipment_id, shipment_number, supplier_id)
+            SELECT CASE WHEN g = 0 THEN CAST(:shipment_id AS UUID) ELSE gen_random_uuid() END,
+                   :prefix || g, :supplier_id
+            FROM generate_series(0, GREATEST(:history / 500, 1)) g
+        """),
+        {'shipment_id': shipment_id, 'supplier_id': supplier_id, 'history': history,
+         'prefix': f"BENCH-{supplier_id.hex[:8]}-"}
+    )
+    # The benchmarked shipment, then history spread over the older shipments
+    await conn.execute(
+        text("""
+            INSERT INTO parcels (tracking_number, shipment_id, has_damage)
+            SELECT :prefix || 'P' || g, :shipment_id, g % 20 = 0
+            FROM generate_series(1, :parcels) g
+        """),
+        {'shipment_id': shipment_id, 'parcels': parcels, 'prefix': f"BENCH-{supplier_id.hex[:8]}-"}
+    )
+    await conn.execute(
+        text("""
+            INSERT INTO parcels (tracking_number, shipment_id, has_damage)
+            SELECT :prefix || 'H' || g, sh.shipment_id, g % 20 = 0
+            FROM generate_series(1, :history) g
+            JOIN LATERAL (
+                SELECT shipment_id FROM shipments
+                WHERE supplier_id = :supplier_id AND shipment_id <> :shipment_id
+                ORDER BY shipment_id OFFSET g % GREATEST(:history / 500, 1) LIMIT 1
+            ) sh ON TRUE
+        """),
+        {'shipment_id': shipment_id, 'supplier_id': supplier_id, 'history': history,
+         'prefix': f"BENCH-{supplier_id.hex[:8]}-"}
+    )
+
+
+async def _run_updates(conn, shipment_id, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await conn.execute(
+            text("UPDATE parcels SET has_damage = NOT has_damage WHERE shipment_id = :id"),
+            {'id': shipment_id}
+        )
+    return time.perf_counter() - started
+
+
+async def main(parcels: int, history: int, rounds: int):
+    supplier_id, shipment_id = uuid.uuid4(), uuid.uuid4()
+    rows_updated = parcels * rounds
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            await _seed(conn, supplier_id, shipment_id, parcels, history)
+            await conn.execute(text("SELECT recompute_supplier_metrics(:id)"), {'id': supplier_id})
+            await conn.execute(text("ANALYZE parcels"))
+            print(f"{rows_updated} parcel updates ({rounds} x {parcels}-parcel shipment), "
+                  f"supplier with {parcels + history} parcels")
+
+            savepoint = await conn.begin_nested()
+            await _set_incremental(conn, False)
+            for statement in LEGACY_TRIGGER_SQL:
+                await conn.execute(text(statement))
+            elapsed = await _run_updates(conn, shipment_id, rounds)
+            print(f"{'legacy (row trigger)':24s} {rows_updated / elapsed:>12,.0f} rows/sec ({elapsed:.2f}s)")
+            await savepoint.rollback()
+
+            savepoint = await conn.begin_nested()
+            elapsed = await _run_updates(conn, shipment_id, rounds)
+            print(f"{'incremental (deltas)':24s} {rows_updated / elapsed:>12,.0f} rows/sec ({elapsed:.2f}s)")
+
+            counters = (await conn.execute(
+                text(f"SELECT {METRIC_COLUMNS} FROM suppliers WHERE supplier_id = :id"),
+                {'id': supplier_id}
+            )).one()
+            await conn.execute(text("SELECT recompute_supplier_metrics(:id)"), {'id': supplier_id})
+            expected = (await conn.execute(
+                text(f"SELECT {METRIC_COLUMNS} FROM suppliers WHERE supplier_id = :id"),
+                {'id': supplier_id}
+            )).one()
+            status = "match" if tuple(counters) == tuple(expected) else f"MISMATCH (expected {tuple(expected)})"
+            print(f"counters after incremental run: {tuple(counters)} {status}")
+            await savepoint.rollback()
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parcels", type=int, default=2000, help="Parcels in the bulk-updated shipment")
+    parser.add_argument("--history", type=int, default=20000, help="Other parcels already on the supplier")
+    parser.add_argument("--rounds", type=int, default=5, help="Bulk updates per trigger setup")
+    args = parser.parse_args()
+    asyncio.run(main(args.parcels, args.history, args.rounds))
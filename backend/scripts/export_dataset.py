@@ -0,0 +1,60 @@
+"""
+Export inspection history as Parquet or an Arrow IPC stream
+
+Reads through a server-side cursor and writes one row group per batch, so
+memory stays flat for any range. Without --output the file goes to the
+storage backend (LOCAL_STORAGE_PATH/exports).
+
+Usage (from backend/):
+    python -m scripts.export_dataset inspections --since 2024-01-01
+    python -m scripts.export_dataset detections --format arrow --output detections.arrows
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.export_service import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_DATASETS,
+    EXPORT_FORMATS,
+    storage_export_path,
+    write_export
+)
+from app.services.ledger_verifier import sync_dsn
+
+
+def main(args) -> int:
+    since = datetime.fromisoformat(args.since) if args.since else None
+    until = datetime.fromisoformat(args.until) if args.until else None
+    path = args.output or storage_export_path(args.dataset, args.format, since, until)
+
+    def on_batch(rows: int):
+        print(f"\r{rows:,} rows", end="", file=sys.stderr, flush=True)
+
+    result = write_export(
+        dsn=sync_dsn(settings.DATABASE_URL),
+        dataset=args.dataset,
+        path=path,
+        fmt=args.format,
+        since=since,
+        until=until,
+        batch_size=args.batch_size,
+        on_batch=on_batch
+    )
+    print(file=sys.stderr)
+
+    print(f"Wrote {result['rows']:,} rows in {result['batches']} batches to {result['path']} "
+          f"({result['bytes'] / 1e6:.1f} MB, {result['seconds']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=list(EXPORT_DATASETS))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--since", help="First inspection start (ISO date)")
+    parser.add_argument("--until", help="End (ISO date, exclusive)")
+    parser.add_argument("--output", help="File to write (default: the storage backend)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows per batch / row group")
+    sys.exit(main(parser.parse_args()))
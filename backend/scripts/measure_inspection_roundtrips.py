@@ -0,0 +1,135 @@
+"""
+Measure database round-trips for the inspection write path
+
+Creates a scratch parcel, runs an inspection through create -> upload x6
+(concurrently, one session each) -> complete -> apply decision, prints the
+statements issued per call and checks images_received wasn't raced.
+The scratch rows, and their counts in the inspection rollups, are removed
+afterwards.
+
+Usage (from backend/):
+    python -m scripts.measure_inspection_roundtrips
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, select, text
+
+from app.db.instrumentation import count_queries
+from app.db.session import async_session, engine
+from app.models.inspection import Inspection
+from app.models.inspection_image import InspectionImage
+from app.models.parcel import Parcel
+from app.services.auto_resolution_service import AutoResolutionService
+from app.services.inspection_service import InspectionService
+from app.services.rollup_service import RollupService, day_bucket
+
+ANGLES = ["front", "back", "left", "right", "top", "bottom"]
+
+
+async def _upload(inspection_id, angle, sequence_number):
+    async with async_session() as db:
+        await InspectionService.add_inspection_image(
+            db=db,
+            inspection_id=inspection_id,
+            file_path=f"/tmp/roundtrip/{angle}.jpg",
+            angle=angle,
+            sequence_number=sequence_number,
+            width=800,
+            height=600,
+            file_size=1024
+        )
+
+
+async def main():
+    parcel_id = uuid.uuid4()
+    started_at = datetime.utcnow()
+
+    async with async_session() as db:
+        db.add(Parcel(parcel_id=parcel_id, tracking_number=f"RTT-{parcel_id.hex[:12]}"))
+        await db.commit()
+
+    try:
+        async with async_session() as db:
+            with count_queries(engine) as counter:
+                inspection = await InspectionService.create_inspection(db=db, parcel_id=parcel_id)
+            print(f"create_inspection:      {counter.count} statements")
+
+        with count_queries(engine) as counter:
+            await asyncio.gather(*(
+                _upload(inspection.inspection_id, angle, i)
+                for i, angle in enumerate(ANGLES, start=1)
+            ))
+        print(f"add_inspection_image:   {counter.count / len(ANGLES):.0f} statements per image")
+
+        async with async_session() as db:
+            with count_queries(engine) as counter:
+                inspection = await InspectionService.complete_inspection(
+                    db=db,
+                    inspection_id=inspection.inspection_id
+                )
+            print(f"complete_inspection:    {counter.count} statements")
+
+            service = AutoResolutionService(db)
+            with count_queries(engine) as counter:
+                await service.apply_decision(
+                    parcel_id=parcel_id,
+                    decision={'can_auto_resolve': True, 'action': 'approved'}
+                )
+            print(f"apply_decision:         {counter.count} statements")
+
+            result = await db.execute(
+                select(Inspection.images_received)
+                .where(Inspection.inspection_id == inspection.inspection_id)
+            )
+            images_received = result.scalar_one()
+            status = "OK" if images_received == len(ANGLES) else "RACE DETECTED"
+            print(f"images_received after concurrent uploads: {images_received}/{len(ANGLES)} ({status})")
+
+    finally:
+        async with async_session() as db:
+            # The inspection is counted under the parcel's current resolution
+            result = await db.execute(
+                select(
+                    Inspection,
+                    Parcel.current_warehouse_id,
+                    Parcel.auto_resolved,
+                    Parcel.resolution_action
+                )
+                .join(Parcel, Parcel.parcel_id == Inspection.parcel_id)
+                .where(
+                    Inspection.parcel_id == parcel_id,
+                    Inspection.overall_status == "completed"
+                )
+            )
+            await RollupService.apply(
+                db,
+                [
+                    {
+                        'inspection': inspection,
+                        'warehouse_id': warehouse_id,
+                        'supplier_id': None,
+                        'auto_resolved': auto_resolved,
+                        'action': resolution_action
+                    }
+                    for inspection, warehouse_id, auto_resolved, resolution_action in result.all()
+                ],
+                sign=-1
+            )
+            # Buckets that only held the scratch inspection are now all zero
+            for rollup_table in ("inspection_rollups_hourly", "inspection_rollups_daily"):
+                await db.execute(
+                    text(f"DELETE FROM {rollup_table} WHERE inspections = 0 AND bucket_start >= :since"),
+                    {'since': day_bucket(started_at)}
+                )
+            inspection_ids = select(Inspection.inspection_id).where(Inspection.parcel_id == parcel_id)
+            await db.execute(delete(InspectionImage).where(InspectionImage.inspection_id.in_(inspection_ids)))
+            await db.execute(delete(Inspection).where(Inspection.parcel_id == parcel_id))
+            await db.execute(delete(Parcel).where(Parcel.parcel_id == parcel_id))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
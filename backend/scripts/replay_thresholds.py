@@ -0,0 +1,58 @@
+"""
+What-if replay of auto-resolution thresholds
+
+Replays completed inspections from the last N days under each candidate
+settings set and prints decision counts. Read-only.
+
+Usage (from backend/):
+    python -m scripts.replay_thresholds candidates.json --days 90
+
+candidates.json:
+    [
+        {"name": "strict", "settings": {"auto_approve_confidence_threshold": 0.98}},
+        {"name": "lenient", "settings": {"auto_approve_max_damage_score": 0.2}}
+    ]
+"""
+import argparse
+import asyncio
+import json
+
+from app.db.session import async_session, engine
+from app.services.replay_service import ReplayService, replay_window
+
+COLUMNS = ("approved", "quarantine", "rejected", "manual_review")
+
+
+def _row(name, counts, flipped=""):
+    return f"{name:<24}" + "".join(f"{counts[c]:>15,}" for c in COLUMNS) + f"{flipped:>12}"
+
+
+async def main(args):
+    with open(args.candidates) as f:
+        candidates = json.load(f)
+
+    since, until = replay_window(args.days)
+
+    async with async_session() as db:
+        result = await ReplayService.replay(
+            db=db,
+            candidates=candidates,
+            since=since,
+            until=until
+        )
+    await engine.dispose()
+
+    print(f"{result['inspections']:,} inspections from {since:%Y-%m-%d} to {until:%Y-%m-%d}")
+    print(f"load {result['load_seconds']}s, evaluate {result['evaluate_seconds']}s")
+    print()
+    print(f"{'':<24}" + "".join(f"{c:>15}" for c in COLUMNS) + f"{'flipped':>12}")
+    print(_row("current", result["baseline"]))
+    for candidate in result["candidates"]:
+        print(_row(candidate["name"], candidate["counts"], f"{candidate['flipped']:,}"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("candidates", help="JSON file with candidate settings")
+    parser.add_argument("--days", type=int, default=90, help="Days of history to replay")
+    asyncio.run(main(parser.parse_args()))
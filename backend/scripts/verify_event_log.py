@@ -0,0 +1,62 @@
+"""
+Verify the event_log hash chain
+
+Resumes after the newest checkpoint unless --full is given, verifies
+event_id ranges in parallel and records a checkpoint per verified range.
+Exits non-zero if any hash does not match.
+
+Without --full, events before the newest checkpoint are not re-hashed: only
+their stored hashes at checkpoints are compared, so content edits there
+are caught by a --full run alone.
+
+Usage (from backend/):
+    python -m scripts.verify_event_log --workers 8
+    python -m scripts.verify_event_log --full --no-checkpoint
+"""
+import argparse
+import json
+import os
+import sys
+
+from app.core.config import settings
+from app.services.ledger_verifier import VERIFY_RANGE_SIZE, sync_dsn, verify_event_log
+
+
+def main(args) -> int:
+    report = verify_event_log(
+        dsn=sync_dsn(settings.DATABASE_URL),
+        workers=args.workers,
+        range_size=args.range_size,
+        full=args.full,
+        write_checkpoints=not args.no_checkpoint
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        start = report['resumed_after_event_id']
+        print(f"Verified {report['events']:,} events in {report['ranges']} ranges"
+              + (f" after checkpoint {start}" if start is not None else " from the start"))
+        print(f"{report['seconds']}s, {report['events_per_second']:,} events/sec "
+              f"({report['per_worker_events_per_second']:,} per worker)")
+        print(f"Checkpoints written: {report['checkpoints_written']}")
+        if report['first_mismatch_event_id'] is not None:
+            print(f"MISMATCH at event_id {report['first_mismatch_event_id']}")
+        if report['checkpoint_mismatches']:
+            print(f"Checkpointed events changed: {report['checkpoint_mismatches']}")
+        print("OK" if report['ok'] else "FAILED")
+
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--range-size", type=int, default=VERIFY_RANGE_SIZE, help="Event IDs per range")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Re-hash from the first event (catches content edits before the newest checkpoint)"
+    )
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not record checkpoints")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    sys.exit(main(parser.parse_args()))
@@ -1,7 +1,9 @@
 """Test image upload endpoints"""
 import pytest
+import uuid
 from httpx import AsyncClient
 from app.main import app
+from app.db.session import get_db
 from PIL import Image
 import io
 
@@ -63,3 +65,36 @@ async def test_invalid_file_type():
         )
         
         assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_submit_inspection_unknown_parcel():
+    """Test submit returns 404 for a parcel that does not exist"""
+    class Result:
+        def scalar_one_or_none(self):
+            return None
+    
+    class Session:
+        async def execute(self, statement):
+            return Result()
+    
+    async def no_parcels():
+        yield Session()
+    
+    img = Image.new('RGB', (800, 600), color='blue')
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='JPEG')
+    img_bytes.seek(0)
+    
+    app.dependency_overrides[get_db] = no_parcels
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/inspections/submit",
+                data={"parcel_id": str(uuid.uuid4()), "angles": ["top"]},
+                files={"files": ("top.jpg", img_bytes, "image/jpeg")}
+            )
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Parcel not found"
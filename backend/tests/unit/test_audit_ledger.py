@@ -0,0 +1,212 @@
+"""Test audit ledger hashing and batching"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.services.audit_ledger import (
+    GENESIS_HASH,
+    AuditLedger,
+    AuditLedgerError,
+    _is_permanent,
+    build_event,
+    canonical_event,
+    chain_events,
+    compute_event_hash
+)
+
+def _events(count):
+    parcel_id = uuid4()
+    return [
+        build_event('SCAN', {'sequence': i}, parcel_id=parcel_id, ip_address='10.0.0.1')
+        for i in range(count)
+    ]
+
+def test_chain_is_deterministic_and_linked():
+    events = _events(3)
+    last = chain_events(GENESIS_HASH, events)
+
+    assert last == events[-1]['event_hash']
+    assert events[0]['event_hash'] == compute_event_hash(GENESIS_HASH, events[0])
+    assert events[2]['event_hash'] == compute_event_hash(events[1]['event_hash'], events[2])
+    assert chain_events(GENESIS_HASH, [dict(e) for e in events]) == last
+
+def test_tampering_changes_later_hashes():
+    events = _events(3)
+    chain_events(GENESIS_HASH, events)
+    original = [e['event_hash'] for e in events]
+
+    tampered = [dict(e) for e in events]
+    tampered[1]['event_data'] = {'sequence': 99}
+    chain_events(GENESIS_HASH, tampered)
+
+    assert tampered[0]['event_hash'] == original[0]
+    assert tampered[1]['event_hash'] != original[1]
+    assert tampered[2]['event_hash'] != original[2]
+
+def test_canonical_event_is_stable_across_round_trip():
+    event = build_event('LOGIN', {'username': 'admin'}, ip_address='192.168.1.5')
+    created_at = event['created_at']
+
+    # As read back from the database: another timezone, inet with a prefix
+    stored = dict(
+        event,
+        created_at=created_at.astimezone(timezone(timedelta(hours=2))),
+        ip_address='192.168.1.5/32'
+    )
+    naive = dict(event, created_at=created_at.astimezone(timezone.utc).replace(tzinfo=None))
+
+    assert canonical_event(stored) == canonical_event(event)
+    assert canonical_event(naive) == canonical_event(event)
+
+def test_build_event_normalizes_event_data():
+    inspection_id = uuid4()
+    event = build_event('INSPECT', {'inspection_id': inspection_id, 'at': datetime(2024, 1, 1)})
+
+    assert event['event_data'] == {'inspection_id': str(inspection_id), 'at': '2024-01-01 00:00:00'}
+    assert event['created_at'].tzinfo is not None
+
+async def test_commit_durability_groups_concurrent_records():
+    ledger = AuditLedger(durability="commit")
+    batches = []
+
+    async def write(events, session_factory=None):
+        batches.append(len(events))
+
+    ledger.write = write
+    await ledger.start()
+    await asyncio.gather(*(ledger.record('SCAN', {'n': i}) for i in range(5)))
+    await ledger.stop()
+
+    assert sum(batches) == 5
+    assert len(batches) < 5
+
+async def test_interval_durability_flushes_on_stop():
+    ledger = AuditLedger(durability="interval", flush_interval_ms=60000)
+    written = []
+
+    async def write(events, session_factory=None):
+        written.extend(events)
+
+    ledger.write = write
+    await ledger.start()
+    await ledger.record_many(_events(3))
+    assert written == []
+
+    await ledger.stop()
+    assert len(written) == 3
+
+async def test_commit_durability_rebuffers_failed_batches():
+    """Callers are not failed; the batch is retried on the next tick"""
+    ledger = AuditLedger(durability="commit", flush_interval_ms=10)
+    attempts = []
+
+    async def write(events, session_factory=None):
+        attempts.append(len(events))
+        if len(attempts) == 1:
+            raise AuditLedgerError("database unavailable")
+
+    ledger.write = write
+    await ledger.start()
+    await ledger.record_many(_events(2))
+    assert ledger.stats()['buffered'] == 2
+
+    for _ in range(100):
+        if len(attempts) > 1:
+            break
+        await asyncio.sleep(0.01)
+    await ledger.stop()
+
+    assert attempts == [2, 2]
+    assert ledger.stats()['buffered'] == 0
+
+async def test_failed_write_without_flusher_is_kept_for_the_next_write():
+    ledger = AuditLedger(durability="commit")
+    written = []
+
+    async def write(events, session_factory=None):
+        if not written:
+            written.append(None)
+            raise AuditLedgerError("database unavailable")
+        written.extend(events)
+
+    ledger.write = write
+    first, second = _events(1), _events(1)
+    await ledger.record_many(first)
+    await ledger.record_many(second)
+
+    assert written[1:] == first + second
+    assert ledger.stats()['buffered'] == 0
+
+async def test_buffer_drops_oldest_events_beyond_max_buffer():
+    ledger = AuditLedger(durability="interval", flush_interval_ms=60000, max_buffer=3)
+    failing = True
+
+    async def write(events, session_factory=None):
+        if failing:
+            raise AuditLedgerError("database unavailable")
+
+    ledger.write = write
+    await ledger.start()
+    events = _events(5)
+    await ledger.record_many(events)
+
+    assert [p.event for p in ledger._buffer] == events[2:]
+    assert ledger.stats()['events_dropped'] == 2
+
+    failing = False
+    await ledger.stop()
+    assert ledger.stats()['buffered'] == 0
+
+class _ForeignKeyViolation(Exception):
+    sqlstate = '23503'
+
+async def test_rejected_event_is_dead_lettered_and_the_rest_written():
+    """One event with a dangling foreign key does not hold back its batch or later ones"""
+    ledger = AuditLedger(durability="interval", flush_interval_ms=60000, max_batch=8)
+    dangling = uuid4()
+    written = []
+
+    async def write(events, session_factory=None):
+        if any(event['parcel_id'] == dangling for event in events):
+            try:
+                raise _ForeignKeyViolation('violates foreign key constraint "event_log_parcel_id_fkey"')
+            except _ForeignKeyViolation as e:
+                raise AuditLedgerError("rejected", permanent=_is_permanent(e)) from e
+        written.extend(events)
+
+    ledger.write = write
+    await ledger.start()
+    events = _events(12)
+    events[5]['parcel_id'] = dangling
+    await ledger.record_many(events)
+    await ledger.stop()
+
+    assert written == events[:5] + events[6:]
+    assert ledger.stats()['events_dead_lettered'] == 1
+    assert ledger.stats()['buffered'] == 0
+
+async def test_transient_failure_is_not_dead_lettered():
+    ledger = AuditLedger(durability="commit")
+    events = _events(3)
+
+    async def write(events, session_factory=None):
+        raise AuditLedgerError("connection refused", permanent=_is_permanent(ConnectionRefusedError()))
+
+    ledger.write = write
+    await ledger.record_many(events)
+
+    assert [p.event for p in ledger._buffer] == events
+    assert ledger.stats()['events_dead_lettered'] == 0
+
+def test_permanent_errors_are_data_and_constraint_failures():
+    class LockNotAvailable(Exception):
+        sqlstate = '55P03'
+
+    wrapped = RuntimeError("wrapped")
+    wrapped.orig = _ForeignKeyViolation()
+
+    assert _is_permanent(_ForeignKeyViolation())
+    assert _is_permanent(wrapped)
+    assert _is_permanent(TypeError("Object of type set is not JSON serializable"))
+    assert not _is_permanent(LockNotAvailable())
+    assert not _is_permanent(ConnectionResetError())
@@ -0,0 +1,141 @@
+"""Test the two-tier cache and the single-scan dashboard query"""
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.cache import TwoTierCache
+from app.services.analytics_service import AnalyticsService
+
+async def test_concurrent_misses_share_one_load():
+    cache = TwoTierCache('test', ttl_seconds=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {'total': 1}
+
+    results = await asyncio.gather(*(cache.get_or_load('stats', loader) for _ in range(50)))
+
+    assert calls == 1
+    assert all(r == {'total': 1} for r in results)
+    assert cache.coalesced == 49
+
+    await cache.get_or_load('stats', loader)
+    assert calls == 1
+    assert cache.hits['local'] == 1
+
+async def test_values_are_json_normalized_and_expire(monkeypatch):
+    from datetime import datetime
+    cache = TwoTierCache('test', ttl_seconds=60, local_ttl_seconds=5)
+    now = [1000.0]
+    monkeypatch.setattr('app.core.cache.time.monotonic', lambda: now[0])
+
+    async def loader():
+        return {'at': datetime(2024, 1, 1)}
+
+    assert await cache.get_or_load('k', loader) == {'at': '2024-01-01 00:00:00'}
+    now[0] += 6
+    await cache.get_or_load('k', loader)
+    assert cache.loads == 2
+
+async def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = TwoTierCache('test', ttl_seconds=60)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load('k', failing) for _ in range(3)),
+        return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def loader():
+        return 7
+
+    assert await cache.get_or_load('k', loader) == 7
+
+async def test_local_tier_is_lru_bounded_and_drops_expired_entries(monkeypatch):
+    cache = TwoTierCache('test', ttl_seconds=60, local_ttl_seconds=5, max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr('app.core.cache.time.monotonic', lambda: now[0])
+
+    async def loader():
+        return 1
+
+    for key in ('a', 'b', 'a', 'c'):
+        await cache.get_or_load(key, loader)
+    assert list(cache._local) == ['a', 'c']
+
+    now[0] += 6
+    assert cache._get_local('a') is None
+    assert list(cache._local) == ['c']
+
+class FakeRedis:
+    def __init__(self, locked=()):
+        self.values = {key: "1" for key in locked}
+        self.deleted = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def delete(self, key):
+        self.deleted.append(key)
+        self.values.pop(key, None)
+
+async def test_redis_lock_is_released_when_the_load_fails():
+    cache = TwoTierCache('test', ttl_seconds=60)
+    redis = FakeRedis()
+    cache._client = lambda: redis
+
+    async def failing():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load('k', failing)
+
+    assert redis.deleted == ['cache:test:k:lock']
+    assert redis.values == {}
+
+async def test_lock_held_elsewhere_is_not_released(monkeypatch):
+    monkeypatch.setattr('app.core.cache.LOCK_TIMEOUT_SECONDS', 0.01)
+    cache = TwoTierCache('test', ttl_seconds=60)
+    redis = FakeRedis(locked=['cache:test:k:lock'])
+    cache._client = lambda: redis
+
+    async def loader():
+        return 7
+
+    assert await cache.get_or_load('k', loader) == 7
+    assert redis.deleted == []
+    assert 'cache:test:k:lock' in redis.values
+
+async def test_dashboard_stats_is_one_statement():
+    statements = []
+
+    class Session:
+        async def execute(self, statement):
+            statements.append(statement)
+
+            class Result:
+                def one(self):
+                    return (10, 2, 5, 8)
+            return Result()
+
+    stats = await AnalyticsService._query_dashboard_stats(Session())
+
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.count('FILTER (WHERE') == 2
+    assert stats['damage_rate'] == 20.0
+    assert stats['auto_resolution_rate'] == 50.0
@@ -0,0 +1,105 @@
+"""Test bulk damage-claim generation"""
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services import claim_service
+from app.services.claim_service import ClaimService, claim_values, severity_rank
+
+def test_claim_value_scales_unit_value_by_severity():
+    values = claim_values(np.array([100.0, 100.0, 100.0, 100.0, np.nan]), np.array([0, 1, 2, 3, 3]))
+    assert values[:4].tolist() == [25.0, 25.0, 60.0, 100.0]
+    assert np.isnan(values[4])
+
+def test_severity_rank_ignores_case_and_unknowns():
+    assert [severity_rank(s) for s in ('Severe', 'moderate', 'minor', None, 'other')] == [3, 2, 1, 0, 0]
+
+def _candidate(has_damage=True, unit_value='80.00', max_severity='moderate', detection_rank=0):
+    return SimpleNamespace(
+        parcel_id=uuid4(),
+        inspection_id=uuid4(),
+        has_damage=has_damage,
+        max_severity=max_severity,
+        supplier_id=uuid4(),
+        unit_value=None if unit_value is None else Decimal(unit_value),
+        currency='EUR',
+        detections=2,
+        detection_severity_rank=detection_rank
+    )
+
+class FakeSession:
+    """First execute is the candidate read; later ones are claim INSERTs"""
+
+    def __init__(self, candidates, already_claimed=()):
+        self.candidates = candidates
+        self.already_claimed = set(already_claimed)
+        self.inserts = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        if params is None:
+            return SimpleNamespace(all=lambda: self.candidates)
+        self.inserts.append(params)
+        return [
+            SimpleNamespace(_mapping={
+                'claim_id': uuid4(),
+                'claim_number': f"CLM-{len(self.inserts)}-{i}",
+                'parcel_id': parcel_id,
+                'inspection_id': inspection_id,
+                'supplier_id': None,
+                'claimed_value': Decimal(str(value)),
+                'currency': 'EUR',
+            })
+            for i, (parcel_id, inspection_id, value) in enumerate(
+                zip(params['parcel_ids'], params['inspection_ids'], params['claimed_values'])
+            )
+            if parcel_id not in self.already_claimed
+        ]
+
+    async def commit(self):
+        self.commits += 1
+
+async def test_claims_are_written_in_one_insert_with_skip_reasons():
+    claimable = _candidate(max_severity='minor', detection_rank=3)
+    claimed = _candidate()
+    db = FakeSession(
+        [claimable, claimed, _candidate(has_damage=False), _candidate(unit_value=None)],
+        already_claimed=[claimed.parcel_id]
+    )
+    result = await ClaimService.generate_claims(db, shipment_id=uuid4())
+
+    assert len(db.inserts) == 1 and db.commits == 1
+    params = db.inserts[0]
+    assert params['parcel_ids'] == [claimable.parcel_id, claimed.parcel_id]
+    assert params['claimed_values'] == [80.0, 48.0]
+    assert params['currencies'] == ['EUR', 'EUR']
+    assert params['claim_type'] == 'supplier_damage'
+
+    assert result['evaluated'] == 4
+    assert result['created'] == 1
+    assert result['skipped'] == {'not_damaged': 1, 'no_unit_value': 1, 'already_claimed': 1}
+    assert result['total_claimed_value'] == 80.0
+    assert result['claims'][0]['detections'] == 2
+
+async def test_large_selections_insert_in_batches_and_report_progress(monkeypatch):
+    monkeypatch.setattr(claim_service, 'CLAIM_INSERT_BATCH', 2)
+    db = FakeSession([_candidate() for _ in range(5)])
+    progress = []
+    result = await ClaimService.generate_claims(db, parcel_ids=[uuid4()], on_progress=lambda *p: progress.append(p))
+
+    assert [len(params['parcel_ids']) for params in db.inserts] == [2, 2, 1]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert result['created'] == 5
+
+async def test_no_damaged_parcels_writes_nothing():
+    db = FakeSession([_candidate(has_damage=False)])
+    result = await ClaimService.generate_claims(db, parcel_ids=[uuid4()])
+    assert result['created'] == 0 and not db.inserts
+
+@pytest.mark.parametrize('kwargs', [{}, {'shipment_id': uuid4(), 'claim_type': 'bogus'}])
+async def test_invalid_requests_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        await ClaimService.generate_claims(FakeSession([]), **kwargs)
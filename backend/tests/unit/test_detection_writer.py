@@ -0,0 +1,71 @@
+"""Test detection row building"""
+import uuid
+
+from app.services.detection_writer import (
+    DETECTION_COLUMNS,
+    build_detection_rows,
+    summarize_detection_rows
+)
+
+def test_build_detection_rows_matches_copy_columns():
+    """Every row has exactly the columns used for COPY"""
+    ml_result = {
+        'detections': [
+            {
+                'class_id': 3,
+                'class_name': 'dent',
+                'confidence': 0.87,
+                'bbox': {'x1': 10.0, 'y1': 20.0, 'x2': 110.0, 'y2': 220.0}
+            },
+            {
+                'class_id': 5,
+                'class_name': 'tear',
+                'confidence': 0.42,
+                'bbox': {'x1': 0.0, 'y1': 0.0, 'x2': 5.0, 'y2': 5.0}
+            }
+        ]
+    }
+    inspection_id, image_id = uuid.uuid4(), uuid.uuid4()
+
+    rows = build_detection_rows(inspection_id, image_id, ml_result)
+
+    assert len(rows) == 2
+    for row in rows:
+        assert set(row) == set(DETECTION_COLUMNS)
+        assert row['inspection_id'] == inspection_id
+        assert row['image_id'] == image_id
+
+    assert rows[0]['damage_type'] == 'dent'
+    assert rows[0]['bbox_x2'] == 110.0
+    assert rows[0]['detection_id'] != rows[1]['detection_id']
+
+def test_detection_metadata_is_compact():
+    """Fields stored in their own columns are not repeated in metadata"""
+    ml_result = {
+        'detections': [
+            {'class_id': 7, 'class_name': 'crush', 'confidence': 0.9, 'bbox': {}}
+        ]
+    }
+
+    rows = build_detection_rows(uuid.uuid4(), uuid.uuid4(), ml_result)
+
+    assert rows[0]['detection_metadata'] == {'class_id': 7}
+
+def test_no_detections_builds_no_rows():
+    """Images without detections produce no rows"""
+    assert build_detection_rows(uuid.uuid4(), uuid.uuid4(), {'detections': []}) == []
+
+def test_summarize_detection_rows():
+    """Summary has count, confidence sum, max severity and type histogram"""
+    rows = [
+        {'damage_type': 'dent', 'confidence': 0.5, 'severity': 'minor'},
+        {'damage_type': 'dent', 'confidence': 0.25, 'severity': 'severe'},
+        {'damage_type': 'tear', 'confidence': 0.25, 'severity': 'moderate'},
+    ]
+
+    summary = summarize_detection_rows(rows)
+
+    assert summary['damage_count'] == 3
+    assert summary['confidence_sum'] == 1.0
+    assert summary['max_severity'] == 'severe'
+    assert summary['damage_types'] == {'dent': 2, 'tear': 1}
@@ -0,0 +1,40 @@
+"""Test in-process inspection event fan-out"""
+import uuid
+
+from app.services.event_bus import (
+    InspectionEventBus,
+    SUBSCRIBER_QUEUE_SIZE,
+    inspection_channel,
+    warehouse_channel
+)
+
+async def test_memory_backend_fans_out_to_inspection_and_warehouse():
+    """An event reaches both the inspection and the warehouse channel"""
+    bus = InspectionEventBus(backend="memory")
+    inspection_id, warehouse_id = uuid.uuid4(), uuid.uuid4()
+    inspection_queue = bus.subscribe(inspection_channel(inspection_id))
+    warehouse_queue = bus.subscribe(warehouse_channel(warehouse_id))
+
+    await bus.publish("image_stored", inspection_id, {'angle': 'top'}, warehouse_id=warehouse_id)
+
+    for queue in (inspection_queue, warehouse_queue):
+        event = queue.get_nowait()
+        assert event['type'] == 'image_stored'
+        assert event['inspection_id'] == str(inspection_id)
+        assert event['warehouse_id'] == str(warehouse_id)
+        assert event['data'] == {'angle': 'top'}
+
+async def test_slow_subscriber_drops_oldest_events():
+    """A full subscriber queue keeps the newest events"""
+    bus = InspectionEventBus(backend="memory")
+    inspection_id = uuid.uuid4()
+    queue = bus.subscribe(inspection_channel(inspection_id))
+
+    for i in range(SUBSCRIBER_QUEUE_SIZE + 5):
+        await bus.publish("detections_written", inspection_id, {'n': i})
+
+    assert queue.qsize() == SUBSCRIBER_QUEUE_SIZE
+    assert queue.get_nowait()['data'] == {'n': 5}
+
+    bus.unsubscribe(inspection_channel(inspection_id), queue)
+    assert inspection_channel(inspection_id) not in bus._subscribers
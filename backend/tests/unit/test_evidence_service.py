@@ -0,0 +1,207 @@
+"""Test claim evidence packages"""
+import json
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services import evidence_service
+from app.services.evidence_service import (
+    SEVERITY_COLORS,
+    annotation_cache_path,
+    build_evidence_package,
+    package_path,
+    render_annotation
+)
+
+CLAIM_ID = uuid4()
+INSPECTION_ID = uuid4()
+IMAGE_IDS = [uuid4(), uuid4(), uuid4()]
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.connection.statements.append(sql)
+        if 'FROM damage_claims' in sql:
+            self.rows = [self.connection.claim] if self.connection.claim else []
+        elif 'FROM inspection_images' in sql:
+            self.rows = self.connection.images
+        elif 'FROM damage_detections' in sql:
+            self.rows = self.connection.detections
+        else:
+            self.rows = []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+class FakeConnection:
+    def __init__(self, claim, images, detections):
+        self.claim = claim
+        self.images = images
+        self.detections = detections
+        self.statements = []
+        self.committed = False
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'STORAGE_BACKEND', 'local')
+    monkeypatch.setattr(settings, 'LOCAL_STORAGE_PATH', str(tmp_path / 'storage'))
+    return tmp_path
+
+def _source(path, size=(640, 480)):
+    Image.new('RGB', size, 'white').save(path, 'JPEG')
+    return str(path)
+
+def _claim():
+    return {
+        'claim_id': CLAIM_ID, 'claim_number': 'CLM-20240501-00000001', 'claim_type': 'supplier_damage',
+        'claimed_value': Decimal('63.00'), 'currency': 'USD', 'status': 'disputed',
+        'created_at': datetime(2024, 5, 1, 12), 'inspection_id': INSPECTION_ID,
+        'parcel_id': uuid4(), 'tracking_number': 'TRK1', 'warehouse_id': None,
+        'supplier_code': 'ACME', 'supplier_name': 'Acme', 'sku_code': 'MUG', 'sku_name': 'Mug',
+        'unit_value': Decimal('105.00'), 'inspection_type': 'inbound',
+        'started_at': datetime(2024, 5, 1, 9), 'completed_at': datetime(2024, 5, 1, 10),
+        'max_severity': 'moderate', 'damage_count': 2, 'overall_confidence': Decimal('0.85'),
+    }
+
+def _detection(image_id, severity='severe', model_version='8.0'):
+    return {
+        'detection_id': uuid4(), 'image_id': image_id, 'damage_type': 'dent',
+        'confidence': Decimal('0.9'), 'severity': severity,
+        'bbox_x1': 100.0, 'bbox_y1': 100.0, 'bbox_x2': 300.0, 'bbox_y2': 250.0,
+        'model_name': 'YOLOv8n', 'model_version': model_version, 'detected_at': datetime(2024, 5, 1, 9),
+    }
+
+@pytest.fixture
+def connection(storage, monkeypatch):
+    images = [
+        {'image_id': IMAGE_IDS[0], 'angle': 'top', 'file_path': _source(storage / 'top.jpg'), 'width': 640, 'height': 480},
+        {'image_id': IMAGE_IDS[1], 'angle': 'front', 'file_path': _source(storage / 'front.jpg'), 'width': 640, 'height': 480},
+        {'image_id': IMAGE_IDS[2], 'angle': 'back', 'file_path': str(storage / 'gone.jpg'), 'width': 640, 'height': 480},
+    ]
+    detections = [_detection(IMAGE_IDS[0]), _detection(IMAGE_IDS[0], 'minor')]
+    fake = FakeConnection(_claim(), images, detections)
+    # Fresh row dicts per build, like a real cursor
+    monkeypatch.setattr(
+        evidence_service.psycopg2, 'connect',
+        lambda dsn: FakeConnection(_claim(), [dict(image) for image in images], fake.detections)
+    )
+    return fake
+
+def test_render_annotation_draws_boxes_in_severity_colors(storage):
+    source = _source(storage / 'source.jpg')
+    target = storage / 'out' / 'annotated.jpg'
+
+    render_annotation(source, str(target), [(100, 100, 300, 250, 'dent 90%', 'severe')])
+
+    with Image.open(target) as image:
+        assert image.size == (640, 480)
+        red, green, blue = image.getpixel((100, 175))
+    expected = SEVERITY_COLORS['severe']
+    assert abs(red - expected[0]) < 40 and abs(green - expected[1]) < 40 and abs(blue - expected[2]) < 40
+    assert not list((storage / 'out').glob('*.partial'))
+
+def test_render_annotation_downscales_large_images(storage, monkeypatch):
+    monkeypatch.setattr(evidence_service, 'EVIDENCE_IMAGE_MAX_SIDE', 320)
+    source = _source(storage / 'source.jpg')
+    target = storage / 'annotated.jpg'
+
+    render_annotation(source, str(target), [(100, 100, 300, 250, 'dent', None)])
+
+    with Image.open(target) as image:
+        assert image.size == (320, 240)
+
+def test_annotation_cache_is_keyed_by_image_and_model_version(storage):
+    image_id = uuid4()
+    assert annotation_cache_path(image_id, '8.0') != annotation_cache_path(image_id, '8.1')
+    assert annotation_cache_path(image_id, '../v1').name == f"{image_id}_.._v1.jpg"
+    assert annotation_cache_path(image_id, None).name == f"{image_id}_none.jpg"
+
+def test_evidence_requires_local_storage(monkeypatch):
+    monkeypatch.setattr(settings, 'STORAGE_BACKEND', 's3')
+    with pytest.raises(ValueError):
+        package_path('CLM-1')
+
+def test_build_evidence_package(connection):
+    result = build_evidence_package('dsn', CLAIM_ID, workers=1)
+
+    assert result['images'] == 3
+    assert result['rendered'] == 2
+    assert result['cached'] == 0
+    assert result['missing'] == 1
+    with zipfile.ZipFile(result['path']) as archive:
+        names = archive.namelist()
+        manifest = json.loads(archive.read('claim.json'))
+        pdf = archive.read('evidence.pdf')
+        assert archive.getinfo(names[-1]).compress_type == zipfile.ZIP_STORED
+    assert names[:2] == ['claim.json', 'evidence.pdf']
+    assert sorted(names[2:]) == sorted([
+        f'images/top_{IMAGE_IDS[0]}.jpg', f'images/front_{IMAGE_IDS[1]}.jpg'
+    ])
+    assert manifest['claim']['claim_number'] == 'CLM-20240501-00000001'
+    assert manifest['claim']['claimed_value'] == 63.0
+    assert len(manifest['detections']) == 2
+    assert manifest['images'][2]['file'] is None
+    assert pdf.startswith(b'%PDF')
+    assert b'/Count 3' in pdf
+
+def test_rebuild_reuses_cached_annotations(connection, monkeypatch):
+    build_evidence_package('dsn', CLAIM_ID, workers=1)
+    monkeypatch.setattr(
+        evidence_service, 'render_annotation',
+        lambda *args: pytest.fail("cached annotation re-rendered")
+    )
+
+    result = build_evidence_package('dsn', CLAIM_ID, workers=1)
+
+    assert result['rendered'] == 0
+    assert result['cached'] == 2
+
+def test_new_model_version_renders_again(connection):
+    build_evidence_package('dsn', CLAIM_ID, workers=1)
+    connection.detections[:] = [_detection(IMAGE_IDS[0], model_version='8.1')]
+
+    result = build_evidence_package('dsn', CLAIM_ID, workers=1)
+
+    assert result['rendered'] == 1
+    assert result['cached'] == 1
+
+def test_model_version_is_that_of_the_latest_detection(connection):
+    newer = _detection(IMAGE_IDS[0], model_version='10')
+    newer['detected_at'] = datetime(2024, 5, 2, 9)
+    connection.detections[:] = [_detection(IMAGE_IDS[0], model_version='9'), newer]
+
+    build_evidence_package('dsn', CLAIM_ID, workers=1)
+
+    assert annotation_cache_path(IMAGE_IDS[0], '10').exists()
+    assert not annotation_cache_path(IMAGE_IDS[0], '9').exists()
+
+def test_unknown_claim(connection, monkeypatch):
+    monkeypatch.setattr(evidence_service.psycopg2, 'connect', lambda dsn: FakeConnection(None, [], []))
+    with pytest.raises(ValueError):
+        build_evidence_package('dsn', uuid4(), workers=1)
@@ -0,0 +1,81 @@
+"""Test columnar export encoding"""
+import io
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.core.config import settings
+from app.services import export_service
+from app.services.export_service import (
+    export_query,
+    export_schema,
+    rows_to_batch,
+    storage_export_path,
+    stream_export,
+    write_export
+)
+
+def _rows(start, count):
+    return [
+        (f'det-{i}', 'insp', None, 'parcel', 'dent', 0.9, 'minor', 1.0, 2.0, 3.0, 4.0,
+         'YOLOv8n', '8.0', datetime(2024, 5, 1, 10), datetime(2024, 5, 1, 9))
+        for i in range(start, start + count)
+    ]
+
+@pytest.fixture
+def batches(monkeypatch):
+    schema = export_schema('detections')
+
+    def fake_batches(dsn, dataset, since=None, until=None, batch_size=None):
+        for start in (0, 3, 6):
+            yield rows_to_batch(_rows(start, 3), schema)
+
+    monkeypatch.setattr(export_service, 'iter_record_batches', fake_batches)
+
+def test_rows_to_batch_uses_dataset_schema():
+    batch = rows_to_batch(_rows(0, 2), export_schema('detections'))
+    assert batch.num_rows == 2
+    assert batch.schema.field('detected_at').type == pa.timestamp('us', tz='UTC')
+    assert batch.column('image_id').null_count == 2
+
+def test_query_windows_on_inspection_start():
+    sql, params = export_query('inspections', datetime(2024, 1, 1), None)
+    assert 'i.started_at >= %(since)s' in sql and 'until' not in params
+    sql, params = export_query('detections', None, None)
+    assert 'WHERE' not in sql and params == {}
+
+def test_unknown_dataset_or_format_fails_before_streaming():
+    with pytest.raises(ValueError):
+        stream_export('dsn', 'users')
+    with pytest.raises(ValueError):
+        stream_export('dsn', 'detections', fmt='csv')
+
+def test_parquet_stream_has_a_row_group_per_batch(batches):
+    chunks = list(stream_export('dsn', 'detections', fmt='parquet'))
+    assert len(chunks) > 3
+    parquet = pq.ParquetFile(io.BytesIO(b''.join(chunks)))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column('detection_id').to_pylist() == [f'det-{i}' for i in range(9)]
+
+def test_arrow_stream_round_trips(batches):
+    table = pa.ipc.open_stream(b''.join(stream_export('dsn', 'detections', fmt='arrow'))).read_all()
+    assert table.num_rows == 9
+
+def test_write_export_replaces_file_when_complete(batches, tmp_path):
+    progress = []
+    path = tmp_path / 'exports' / 'detections.parquet'
+    result = write_export('dsn', 'detections', path, on_batch=progress.append)
+    assert progress == [3, 6, 9]
+    assert (result['rows'], result['batches']) == (9, 3)
+    assert pq.read_table(path).num_rows == 9
+    assert not list(path.parent.glob('*.partial'))
+
+def test_storage_path_requires_local_backend(monkeypatch):
+    monkeypatch.setattr(settings, 'LOCAL_STORAGE_PATH', '/data')
+    path = storage_export_path('inspections', 'arrow', datetime(2024, 1, 1), None)
+    assert str(path).startswith('/data/exports/inspections_20240101_all_') and path.suffix == '.arrows'
+    monkeypatch.setattr(settings, 'STORAGE_BACKEND', 's3')
+    with pytest.raises(ValueError):
+        storage_export_path('inspections', 'parquet')
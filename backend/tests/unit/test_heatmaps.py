@@ -0,0 +1,107 @@
+"""Test damage heatmap accumulation and materialization"""
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services import heatmap_service
+from app.services.heatmap_service import (
+    GROUP_COLUMNS, HeatmapService, _batches, _group_grids, accumulate, normalize_boxes
+)
+
+def _brute_force(boxes, grid_size):
+    grid = np.zeros((grid_size, grid_size), dtype=np.int64)
+    for x1, y1, x2, y2 in boxes:
+        c0, r0 = min(int(x1 * grid_size), grid_size - 1), min(int(y1 * grid_size), grid_size - 1)
+        c1 = max(int(np.ceil(x2 * grid_size)), c0 + 1)
+        r1 = max(int(np.ceil(y2 * grid_size)), r0 + 1)
+        grid[r0:r1, c0:c1] += 1
+    return grid
+
+def test_accumulate_counts_boxes_covering_each_cell():
+    rng = np.random.default_rng(7)
+    corners = rng.random((500, 2)) * 0.8
+    boxes = np.hstack([corners, corners + rng.random((500, 2)) * 0.3]).clip(0, 1)
+    grid = accumulate(boxes, grid_size=16)[0]
+    assert (grid == _brute_force(boxes, 16)).all()
+
+def test_accumulate_keeps_groups_apart():
+    boxes = np.array([[0.0, 0.0, 0.5, 0.5], [0.5, 0.5, 1.0, 1.0], [0.0, 0.0, 1.0, 1.0]])
+    grids = accumulate(boxes, np.array([0, 1, 1]), n_groups=2, grid_size=4)
+    assert grids[0].sum() == 4 and grids[0][:2, :2].all()
+    assert (grids[1] == np.array([[1, 1, 1, 1], [1, 1, 1, 1], [1, 1, 2, 2], [1, 1, 2, 2]])).all()
+
+def test_tiny_and_edge_boxes_cover_one_cell():
+    boxes = np.array([[0.3, 0.3, 0.3001, 0.3001], [1.0, 1.0, 1.0, 1.0]])
+    grid = accumulate(boxes, grid_size=10)[0]
+    assert grid[3, 3] == 1 and grid[9, 9] == 1 and grid.sum() == 2
+
+def test_boxes_are_normalized_by_image_size_and_clipped():
+    boxes = normalize_boxes(
+        np.array([64.0]), np.array([48.0]), np.array([700.0]), np.array([100.0]),
+        np.array([640.0]), np.array([480.0])
+    )
+    assert np.allclose(boxes, [[0.1, 0.1, 1.0, 100 / 480]])
+
+def test_grids_group_rows_and_skip_unusable_boxes():
+    packaging = uuid4()
+    day = date(2024, 5, 1)
+    rows = [
+        (day, 'front', packaging, 0, 0, 320, 240, 640, 480),
+        (day, 'front', packaging, 320, 240, 640, 480, 640, 480),
+        (day, 'top', None, 0, 0, 640, 480, 640, 480),
+        (day, 'top', None, 10, 10, 10, 50, 640, 480),
+        (day, 'left', None, 0, 0, 100, 100, None, None),
+    ]
+    grids = {key: (count, grid) for key, count, grid in _group_grids(rows, GROUP_COLUMNS, grid_size=2)}
+    assert set(grids) == {(day, 'front', packaging), (day, 'top', None)}
+    assert grids[(day, 'front', packaging)][0] == 2
+    assert (grids[(day, 'front', packaging)][1] == np.eye(2)).all()
+    assert grids[(day, 'top', None)][0] == 1
+
+def test_stale_days_are_batched_in_consecutive_runs(monkeypatch):
+    monkeypatch.setattr(heatmap_service, 'HEATMAP_MATERIALIZE_BATCH', 3)
+    days = [date(2024, 5, d) for d in (1, 2, 3, 4, 5, 8, 9)]
+    assert _batches(days) == [days[:3], days[3:5], days[5:]]
+
+class FakeSession:
+    def __init__(self, computed):
+        self.computed = computed
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        return [SimpleNamespace(day=day, computed_at=at) for day, at in self.computed.items()]
+
+    async def commit(self):
+        self.commits += 1
+
+async def test_refresh_recomputes_missing_and_unsettled_days(monkeypatch):
+    materialized = []
+
+    async def fake_materialize(db, days, grid_size=None):
+        materialized.append(list(days))
+        return 0
+
+    monkeypatch.setattr(HeatmapService, 'materialize_days', staticmethod(fake_materialize))
+    now = datetime(2024, 5, 4, 12, tzinfo=timezone.utc)
+    db = FakeSession({
+        date(2024, 5, 1): datetime(2024, 5, 3, tzinfo=timezone.utc),
+        date(2024, 5, 2): datetime(2024, 5, 3, 0, 30, tzinfo=timezone.utc),
+        date(2024, 5, 4): now - timedelta(minutes=5),
+    })
+    days = [date(2024, 5, d) for d in range(1, 7)]
+    stale = await HeatmapService.refresh(db, days, now=now)
+
+    assert stale == [date(2024, 5, 2), date(2024, 5, 3), date(2024, 5, 4)]
+    assert materialized == [stale]
+    assert db.commits == 1
+
+@pytest.mark.parametrize('since, until', [
+    (datetime(2024, 5, 2), datetime(2024, 5, 1)),
+    (datetime(2023, 1, 1), datetime(2024, 5, 1)),
+])
+async def test_invalid_windows_are_rejected(since, until):
+    with pytest.raises(ValueError):
+        await HeatmapService.get_heatmap(None, since=since, until=until)
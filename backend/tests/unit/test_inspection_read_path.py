@@ -0,0 +1,33 @@
+"""Test the column projection of the inspection read path"""
+from sqlalchemy.dialects import postgresql
+
+from app.schemas.inspection import (
+    DamageDetectionResponse,
+    InspectionImageResponse,
+    InspectionResponse
+)
+from app.services.inspection_service import (
+    DETECTION_DETAIL_COLUMNS,
+    IMAGE_DETAIL_COLUMNS,
+    INSPECTION_DETAIL_COLUMNS,
+    InspectionService
+)
+
+def _column_names(columns):
+    return {column.key for column in columns}
+
+def test_detail_columns_cover_response_schemas():
+    """Every scalar field of the response schemas is loaded"""
+    inspection_fields = set(InspectionResponse.model_fields) - {'images', 'detections'}
+
+    assert inspection_fields <= _column_names(INSPECTION_DETAIL_COLUMNS)
+    assert set(InspectionImageResponse.model_fields) <= _column_names(IMAGE_DETAIL_COLUMNS)
+    assert set(DamageDetectionResponse.model_fields) <= _column_names(DETECTION_DETAIL_COLUMNS)
+
+def test_detail_query_skips_unused_columns():
+    """Raw ML output is not selected"""
+    sql = str(InspectionService._detail_query().compile(dialect=postgresql.dialect()))
+
+    assert 'inspections.overall_status' in sql
+    assert 'ml_results' not in sql
+    assert 'damage_types' not in sql
@@ -0,0 +1,47 @@
+"""Test event_log chain verification"""
+from datetime import timedelta, timezone
+
+from app.services.audit_ledger import GENESIS_HASH, build_event, chain_events
+from app.services.ledger_verifier import VERIFY_COLUMNS, split_ranges, verify_rows
+
+def _stored_rows(count):
+    """Rows as psycopg2 returns them: string UUIDs, inet text, other timezone"""
+    events = [build_event('SCAN', {'n': i}, ip_address='10.1.2.3') for i in range(count)]
+    chain_events(GENESIS_HASH, events)
+    rows = []
+    for event_id, event in enumerate(events, start=1):
+        stored = dict(
+            event,
+            event_id=event_id,
+            created_at=event['created_at'].astimezone(timezone(timedelta(hours=-5)))
+        )
+        rows.append(tuple(stored.get(column) for column in VERIFY_COLUMNS))
+    return rows
+
+def test_verify_rows_accepts_intact_chain():
+    rows = _stored_rows(5)
+    count, last_id, last_hash, mismatch = verify_rows(GENESIS_HASH, rows)
+
+    assert (count, last_id, mismatch) == (5, 5, None)
+    assert last_hash == rows[-1][-1]
+
+def test_ranges_verify_independently():
+    rows = _stored_rows(6)
+    first = verify_rows(GENESIS_HASH, rows[:3])
+    second = verify_rows(rows[2][-1], rows[3:])
+
+    assert first[3] is None and second[3] is None
+    assert second[2] == rows[-1][-1]
+
+def test_verify_rows_reports_first_tampered_event():
+    rows = _stored_rows(5)
+    tampered = list(rows[2])
+    tampered[VERIFY_COLUMNS.index('event_data')] = {'n': 42}
+    rows[2] = tuple(tampered)
+
+    count, last_id, _, mismatch = verify_rows(GENESIS_HASH, rows)
+    assert (count, last_id, mismatch) == (2, 2, 3)
+
+def test_split_ranges_covers_bounds():
+    assert split_ranges(1, 10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert split_ranges(7, 7, 4) == [(7, 7)]
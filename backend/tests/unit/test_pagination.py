@@ -0,0 +1,73 @@
+"""Test keyset pagination"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.pagination import decode_cursor, encode_cursor, keyset_page
+from app.models.parcel import Parcel
+
+def test_cursor_round_trip():
+    key = uuid4()
+    cursor = encode_cursor(datetime(2024, 5, 1, 10, 30, 15, 123456), key)
+    assert decode_cursor(cursor) == (datetime(2024, 5, 1, 10, 30, 15, 123456), key)
+    assert '=' not in cursor
+
+def test_cursor_normalises_aware_datetimes_to_naive_utc():
+    key = uuid4()
+    aware = datetime(2024, 5, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    assert decode_cursor(encode_cursor(aware, key)) == (datetime(2024, 5, 1, 10), key)
+
+@pytest.mark.parametrize('cursor', ['garbage', '', encode_cursor(datetime(2024, 5, 1), uuid4())[:-6]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        limit = statement._limit_clause.value
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.rows[:limit]))
+
+def _parcels(n):
+    start = datetime(2024, 5, 1)
+    return [SimpleNamespace(created_at=start - timedelta(minutes=i), parcel_id=uuid4()) for i in range(n)]
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+async def test_page_fetches_one_extra_row_for_next_cursor():
+    rows = _parcels(3)
+    db = FakeSession(rows)
+    page = await keyset_page(db, select(Parcel), Parcel.created_at, Parcel.parcel_id, limit=2)
+
+    assert page['items'] == rows[:2]
+    assert decode_cursor(page['next_cursor']) == (rows[1].created_at, rows[1].parcel_id)
+    assert 'total_estimate' not in page
+    sql = _sql(db.statements[0])
+    assert 'ORDER BY parcels.created_at DESC, parcels.parcel_id DESC' in sql
+    assert 'OFFSET' not in sql
+
+async def test_last_page_has_no_next_cursor():
+    db = FakeSession(_parcels(2))
+    page = await keyset_page(db, select(Parcel), Parcel.created_at, Parcel.parcel_id, limit=2)
+    assert len(page['items']) == 2
+    assert page['next_cursor'] is None
+
+async def test_cursor_seeks_past_the_previous_page():
+    db = FakeSession([])
+    cursor = encode_cursor(datetime(2024, 5, 1), uuid4())
+    await keyset_page(db, select(Parcel), Parcel.created_at, Parcel.parcel_id, cursor=cursor)
+    assert '(parcels.created_at, parcels.parcel_id) < (' in _sql(db.statements[0])
+
+@pytest.mark.parametrize('limit', [0, 201])
+async def test_limit_is_bounded(limit):
+    with pytest.raises(ValueError):
+        await keyset_page(FakeSession([]), select(Parcel), Parcel.created_at, Parcel.parcel_id, limit=limit)
@@ -0,0 +1,119 @@
+"""Test multi-candidate rule evaluation used by threshold replay"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+
+from app.services.replay_service import ReplayService, replay_window
+from app.services.rule_engine import (
+    ACTIONS,
+    DEFAULT_RULES,
+    build_feature_columns,
+    compile_rules,
+    evaluate_many
+)
+
+def _columns(size=5000, seed=7):
+    rng = np.random.default_rng(seed)
+    has_damage = rng.random(size) < 0.4
+    return build_feature_columns(
+        has_damage=has_damage,
+        damage_count=np.where(has_damage, rng.integers(1, 8, size), 0),
+        overall_confidence=rng.random(size),
+        images_received=rng.integers(4, 9, size),
+        supplier_damage_rate=rng.random(size) * 0.3,
+        unit_value=rng.random(size) * 1000
+    )
+
+def test_evaluate_many_matches_individual_evaluation():
+    """Broadcast evaluation gives the same outcome as one rule set at a time"""
+    columns = _columns()
+    rule_sets = [
+        compile_rules(DEFAULT_RULES, {'auto_approve_confidence_threshold': threshold})
+        for threshold in (0.8, 0.9, 0.95, 0.99)
+    ] + [
+        compile_rules(DEFAULT_RULES, {'use_supplier_history': False}),
+        compile_rules(DEFAULT_RULES, {'auto_approve_enabled': False}),
+    ]
+
+    seen = set()
+    for indexes, rows, outcome in evaluate_many(rule_sets, columns, chunk_size=1200):
+        for k, index in enumerate(indexes):
+            expected = rule_sets[index].evaluate_batch(
+                {name: column[rows] for name, column in columns.items()}
+            )
+            np.testing.assert_array_equal(outcome[k], expected)
+            seen.add((index, rows.start))
+
+    assert {index for index, _ in seen} == set(range(len(rule_sets)))
+
+def test_threshold_sets_share_one_group():
+    """Candidates that only change thresholds are evaluated together"""
+    columns = _columns(size=100)
+    rule_sets = [
+        compile_rules(DEFAULT_RULES, {'auto_approve_confidence_threshold': t})
+        for t in (0.8, 0.9, 0.99)
+    ]
+
+    groups = [indexes for indexes, _, _ in evaluate_many(rule_sets, columns)]
+
+    assert groups == [[0, 1, 2]]
+
+def test_count_actions_per_candidate():
+    """Outcome indexes become per-candidate action counts"""
+    action_codes = np.array([
+        [ACTIONS.index('approved'), ACTIONS.index('manual_review')],
+        [ACTIONS.index('quarantine'), ACTIONS.index('manual_review')],
+    ])
+    outcome = np.array([
+        [0, 0, 1],
+        [1, 0, 0],
+    ])
+
+    counts, codes = ReplayService._count_actions(outcome, action_codes)
+
+    assert counts[0, ACTIONS.index('approved')] == 2
+    assert counts[0, ACTIONS.index('manual_review')] == 1
+    assert counts[1, ACTIONS.index('quarantine')] == 2
+    assert counts.sum() == 6
+    assert codes.shape == outcome.shape
+
+def test_reference_column_maps_distinct_ids():
+    """Reference values are looked up per distinct ID and spread back to rows"""
+    known, unrated, unknown = uuid4(), uuid4(), uuid4()
+    ids = np.array([str(known), '', str(unknown), str(known), str(unrated)])
+
+    values = ReplayService._reference_column(ids, {known: 0.25, unrated: None})
+
+    np.testing.assert_array_equal(values, [0.25, np.nan, np.nan, 0.25, np.nan])
+
+def test_streamed_text_columns_match_sequences():
+    """Text severity columns give the same features as per-row values"""
+    kwargs = dict(
+        has_damage=[True, None, False],
+        damage_count=[2, None, 0],
+        overall_confidence=[0.9, None, 0.99],
+        images_received=[4, 4, None]
+    )
+    rows = build_feature_columns(max_severity=['severe', None, 'minor'], **kwargs)
+    streamed = build_feature_columns(max_severity=np.array(['severe', '', 'minor']), **kwargs)
+
+    for name in rows:
+        np.testing.assert_array_equal(rows[name], streamed[name])
+    np.testing.assert_array_equal(rows['severity_rank'], [3, 0, 1])
+
+def test_replay_window_is_utc():
+    """Naive bounds are UTC, aware ones are converted, and the default ends on an hour"""
+    since, until = replay_window(
+        90,
+        since=datetime(2024, 5, 1),
+        until=datetime(2024, 5, 2, 2, tzinfo=timezone(timedelta(hours=2)))
+    )
+    assert since == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert until == datetime(2024, 5, 2, tzinfo=timezone.utc)
+    assert until.tzinfo is timezone.utc
+
+    since, until = replay_window(7)
+    assert until.tzinfo is timezone.utc
+    assert until.minute == until.second == until.microsecond == 0
+    assert until - since == timedelta(days=7)
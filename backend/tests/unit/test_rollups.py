@@ -0,0 +1,127 @@
+"""Test inspection rollup deltas"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.rollup_service import (
+    ALL_DAMAGE_TYPES,
+    ROLLUP_MEASURES,
+    RollupService,
+    daily_rollups,
+    hourly_rollups,
+    rollup_deltas
+)
+
+def _record(completed_at, has_damage=False, damage_types=None, confidence=0.9,
+            auto_resolved=True, action='approved', warehouse_id=None, supplier_id=None,
+            started_at=None):
+    inspection = SimpleNamespace(
+        started_at=started_at,
+        completed_at=completed_at,
+        has_damage=has_damage,
+        damage_count=sum((damage_types or {}).values()),
+        damage_types=damage_types,
+        overall_confidence=confidence
+    )
+    return {
+        'inspection': inspection,
+        'warehouse_id': warehouse_id,
+        'supplier_id': supplier_id,
+        'auto_resolved': auto_resolved,
+        'action': action
+    }
+
+def _counters(values):
+    return dict(zip(ROLLUP_MEASURES, values))
+
+def test_deltas_group_by_hour_and_dimensions():
+    warehouse_id, supplier_id = uuid4(), uuid4()
+    deltas = rollup_deltas([
+        _record(datetime(2024, 5, 1, 10, 5), warehouse_id=warehouse_id, supplier_id=supplier_id),
+        _record(datetime(2024, 5, 1, 10, 55), has_damage=True, damage_types={'dent': 2, 'tear': 1},
+                confidence=0.7, action='quarantine', warehouse_id=warehouse_id, supplier_id=supplier_id),
+        _record(datetime(2024, 5, 1, 11, 0), auto_resolved=False, action='manual_review',
+                warehouse_id=warehouse_id, supplier_id=supplier_id),
+    ])
+
+    hour = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+    totals = _counters(deltas[(hour, warehouse_id, supplier_id, ALL_DAMAGE_TYPES)])
+    assert totals['inspections'] == 2
+    assert totals['damaged'] == 1
+    assert totals['auto_resolved'] == 2
+    assert (totals['auto_approved'], totals['auto_quarantined']) == (1, 1)
+    assert round(totals['confidence_sum'], 6) == 1.6
+    assert totals['detections'] == 3
+
+    dent = _counters(deltas[(hour, warehouse_id, supplier_id, 'dent')])
+    assert (dent['inspections'], dent['detections'], dent['auto_resolved']) == (1, 2, 0)
+
+    next_hour = _counters(deltas[(datetime(2024, 5, 1, 11, tzinfo=timezone.utc), warehouse_id, supplier_id, '')])
+    assert (next_hour['inspections'], next_hour['auto_resolved']) == (1, 0)
+
+def test_deltas_sum_latency_of_timed_inspections():
+    deltas = rollup_deltas([
+        _record(datetime(2024, 5, 1, 10, 5), started_at=datetime(2024, 5, 1, 10, 4, 58)),
+        _record(datetime(2024, 5, 1, 10, 6), started_at=datetime(2024, 5, 1, 10, 5, 59, 500000)),
+        _record(datetime(2024, 5, 1, 10, 7)),
+    ])
+
+    totals = _counters(deltas[(datetime(2024, 5, 1, 10, tzinfo=timezone.utc), None, None, '')])
+    assert totals['latency_ms_sum'] == 2500
+    assert totals['latency_count'] == 2
+
+def test_deltas_normalize_aware_timestamps():
+    from datetime import timedelta
+    tz = timezone(timedelta(hours=2))
+    deltas = rollup_deltas([_record(datetime(2024, 5, 1, 12, 30, tzinfo=tz))])
+    assert list(deltas)[0][0] == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+async def test_apply_writes_both_grains_in_one_statement():
+    calls = []
+
+    class Session:
+        async def execute(self, statement, params):
+            calls.append((str(statement), params))
+
+    touched = await RollupService.apply(Session(), [
+        _record(datetime(2024, 5, 1, 10), damage_types={'dent': 1}),
+        _record(datetime(2024, 5, 1, 9)),
+    ])
+
+    assert touched == 3
+    assert len(calls) == 1
+    sql, params = calls[0]
+    assert 'inspection_rollups_hourly' in sql and 'inspection_rollups_daily' in sql
+    assert params['bucket_start'] == sorted(params['bucket_start'])
+    assert await RollupService.apply(Session(), []) == 0
+
+async def test_resolution_changes_move_counters_of_changed_parcels():
+    calls = []
+
+    class Session:
+        async def execute(self, statement, params):
+            calls.append((str(statement), params))
+
+    approved, rejected, unchanged = uuid4(), uuid4(), uuid4()
+    moved = await RollupService.apply_resolution_changes(Session(), [
+        {'parcel_id': approved, 'previous_auto_resolved': None, 'previous_action': None,
+         'auto_resolved': True, 'action': 'approved'},
+        {'parcel_id': rejected, 'previous_auto_resolved': True, 'previous_action': 'approved',
+         'auto_resolved': True, 'action': 'rejected'},
+        {'parcel_id': unchanged, 'previous_auto_resolved': False, 'previous_action': None,
+         'auto_resolved': False, 'action': None},
+    ])
+
+    assert moved == 2
+    sql, params = calls[0]
+    assert 'inspection_rollups_hourly' in sql and 'inspection_rollups_daily' in sql
+    changes = dict(zip(params['parcel_id'], zip(
+        params['auto_resolved'], params['auto_approved'], params['auto_rejected']
+    )))
+    assert changes == {approved: (1, 1, 0), rejected: (0, -1, 1)}
+    assert await RollupService.apply_resolution_changes(Session(), []) == 0
+    assert len(calls) == 1
+
+def test_source_for_uses_daily_rows_for_whole_days():
+    assert RollupService.source_for(datetime(2024, 5, 1), datetime(2024, 5, 8)) is daily_rollups
+    assert RollupService.source_for(datetime(2024, 5, 1, 6), datetime(2024, 5, 8)) is hourly_rollups
@@ -0,0 +1,118 @@
+"""Test auto-resolution rule compilation and evaluation"""
+import pytest
+
+from app.services.rule_engine import (
+    DEFAULT_RULES,
+    build_feature_columns,
+    compile_rules
+)
+
+def _features(**overrides):
+    features = {
+        'has_damage': 1.0,
+        'damage_count': 1.0,
+        'overall_confidence': 0.9,
+        'images_received': 6.0,
+        'damage_score': 1 / 6,
+        'severity_rank': 2.0,
+        'supplier_damage_rate': float('nan'),
+        'unit_value': float('nan'),
+    }
+    features.update(overrides)
+    return features
+
+def _rule_name(rules, features):
+    return rules.outcomes[rules.evaluate(features)].name
+
+def test_setting_only_clauses_are_folded():
+    """Rules that can never match are dropped and constant clauses removed"""
+    enabled = compile_rules(DEFAULT_RULES, {'auto_approve_enabled': True})
+    disabled = compile_rules(DEFAULT_RULES, {'auto_approve_enabled': False})
+
+    assert 'auto_resolution_disabled' not in [rule.name for rule in enabled.rules]
+    assert disabled.rules[0].name == 'auto_resolution_disabled'
+    assert disabled.rules[0].conditions == ()
+
+def test_identical_conditions_are_shared():
+    """A condition used by several rules is evaluated once"""
+    rules = compile_rules(DEFAULT_RULES, {})
+
+    assert len(rules.conditions) == len(set(rules.conditions))
+    used = [c for rule in rules.rules for c in rule.conditions]
+    assert len(used) > len(set(used))
+
+def test_high_value_damage_goes_to_manual_review():
+    """Damage on an item above high_value_threshold is never auto-resolved"""
+    rules = compile_rules(DEFAULT_RULES, {'high_value_threshold': 500.0})
+
+    assert _rule_name(rules, _features(unit_value=800.0)) == 'high_value_damage'
+    assert _rule_name(rules, _features(unit_value=100.0, damage_score=0.05)) == 'minor_damage_acceptable'
+    assert _rule_name(rules, _features(has_damage=0.0, overall_confidence=0.99, damage_score=0.0,
+                                       unit_value=800.0)) == 'no_damage_high_confidence'
+
+def test_supplier_history_blocks_minor_damage_approval():
+    """Minor damage from a high damage-rate supplier needs review, when enabled"""
+    features = _features(damage_score=0.05, supplier_damage_rate=0.3)
+
+    with_history = compile_rules(DEFAULT_RULES, {'use_supplier_history': True})
+    without_history = compile_rules(DEFAULT_RULES, {'use_supplier_history': False})
+
+    assert _rule_name(with_history, features) == 'supplier_history_review'
+    assert _rule_name(without_history, features) == 'minor_damage_acceptable'
+    assert not without_history.uses('supplier_damage_rate')
+
+def test_reason_placeholders_are_filled():
+    """Reasons can reference features and settings"""
+    rules = compile_rules(DEFAULT_RULES, {'min_images_for_auto_resolution': 6})
+    features = _features(images_received=4.0)
+
+    index = rules.evaluate(features)
+
+    assert rules.reason(index, features) == 'Insufficient images (4/6)'
+
+def test_reason_falls_back_to_template_for_missing_or_none_values():
+    """A reason never breaks the decision when a placeholder cannot be formatted"""
+    rules = compile_rules(DEFAULT_RULES, {'min_images_for_auto_resolution': 6})
+    index = rules.evaluate(_features(images_received=4.0))
+    template = 'Insufficient images ({images_received:.0f}/{min_images_for_auto_resolution:.0f})'
+
+    assert rules.reason(index, {'images_received': None}) == template
+    assert rules.reason(index, {}) == template
+    assert rules.reason(index, {'images_received': 'four'}) == template
+
+def test_batch_matches_scalar_with_context():
+    """Vectorized evaluation agrees with per-parcel evaluation"""
+    rules = compile_rules(DEFAULT_RULES, {})
+    columns = build_feature_columns(
+        has_damage=[True, True, False, True],
+        damage_count=[1, 1, 0, 4],
+        overall_confidence=[0.9, 0.9, 0.99, 0.8],
+        images_received=[12, 6, 6, 6],
+        supplier_damage_rate=[0.3, None, 0.3, 0.01],
+        unit_value=[None, 900, 900, 10]
+    )
+
+    batch = rules.evaluate_batch(columns)
+    scalar = [
+        rules.evaluate({name: column[i] for name, column in columns.items()})
+        for i in range(4)
+    ]
+
+    assert batch.tolist() == scalar
+    assert [rules.outcomes[i].name for i in scalar] == [
+        'supplier_history_review',
+        'high_value_damage',
+        'no_damage_high_confidence',
+        'damage_detected',
+    ]
+
+@pytest.mark.parametrize('spec', [
+    {'rules': [{'name': 'x', 'when': [['unknown_feature', '>', 1]], 'action': 'approved'}]},
+    {'rules': [{'name': 'x', 'when': [['damage_score', '~', 1]], 'action': 'approved'}]},
+    {'rules': [{'name': 'x', 'when': [['damage_score', '>', '$no_such_setting']], 'action': 'approved'}]},
+    {'rules': [{'name': 'x', 'when': [], 'action': 'destroy'}]},
+])
+def test_invalid_rule_sets_are_rejected(spec):
+    """Unknown features, operators, settings and actions fail compilation"""
+    with pytest.raises(ValueError):
+        compile_rules(spec, {})
@@ -0,0 +1,73 @@
+"""Test the system settings cache"""
+from types import SimpleNamespace
+
+from app.services.settings_cache import SettingsCache, parse_setting_value
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+class FakeSession:
+    """Counts queries and returns fixed system_settings rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.rows)
+
+def _setting(key, value, value_type, json_value=None):
+    return SimpleNamespace(
+        setting_key=key,
+        setting_value=value,
+        value_type=value_type,
+        json_value=json_value
+    )
+
+def test_parse_setting_value_types():
+    """Values are converted according to value_type"""
+    assert parse_setting_value(_setting('a', '0.95', 'number')) == 0.95
+    assert parse_setting_value(_setting('b', 'False', 'boolean')) is False
+    assert parse_setting_value(_setting('c', None, 'json', {'x': 1})) == {'x': 1}
+    assert parse_setting_value(_setting('d', 'text', 'string')) == 'text'
+
+async def test_cache_loads_once_until_invalidated():
+    """Repeated reads cost no queries until a notification arrives"""
+    db = FakeSession([_setting('auto_approve_confidence_threshold', '0.9', 'number')])
+    cache = SettingsCache(category='auto_resolution', ttl_seconds=300)
+
+    first = await cache.get(db)
+    second = await cache.get(db)
+
+    assert db.queries == 1
+    assert second is first
+    assert first.get('auto_approve_confidence_threshold') == 0.9
+    assert first.version == 1
+
+    cache.on_notification('system_settings_changed', 'ml')
+    await cache.get(db)
+    assert db.queries == 1
+
+    cache.on_notification('system_settings_changed', 'auto_resolution')
+    reloaded = await cache.get(db)
+    assert db.queries == 2
+    assert reloaded.version == 2
+
+async def test_cache_expires_after_ttl():
+    """The TTL forces a reload when no notification is received"""
+    db = FakeSession([])
+    cache = SettingsCache(category='auto_resolution', ttl_seconds=0)
+
+    await cache.get(db)
+    await cache.get(db)
+
+    assert db.queries == 2
+    assert cache.info()['version'] == 2
@@ -0,0 +1,76 @@
+"""Test windowed supplier scorecards and materialized view refreshes"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.analytics_service import (
+    MATERIALIZED_VIEWS,
+    SCORECARD_METRICS,
+    AnalyticsService,
+    _window_start
+)
+
+class RecordingSession:
+    """Records statements; fails REFRESH of the views in `failing`"""
+
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.statements = []
+        self.rollbacks = 0
+
+    async def execute(self, statement):
+        sql = str(statement)
+        self.statements.append(sql)
+        if any(f"CONCURRENTLY {view}" in sql for view in self.failing):
+            raise RuntimeError("could not refresh")
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+def test_window_includes_today():
+    today = datetime.utcnow().date()
+    assert _window_start(1) == today
+    assert _window_start(30) == today - timedelta(days=29)
+    with pytest.raises(ValueError):
+        _window_start(0)
+
+def test_format_metrics_converts_sums():
+    row = SimpleNamespace(**{name: None for name in SCORECARD_METRICS})
+    row.parcels = Decimal('120')
+    row.damaged_parcels = Decimal('6')
+    row.damage_rate = Decimal('0.05000000')
+    row.claimed_value = Decimal('1500.50')
+
+    metrics = AnalyticsService._format_metrics(row)
+
+    assert metrics['parcels'] == 120 and isinstance(metrics['parcels'], int)
+    assert metrics['damage_rate'] == 0.05
+    assert metrics['claimed_value'] == 1500.5
+    assert metrics['late_delivery_rate'] is None
+
+async def test_rankings_reject_unknown_sort():
+    with pytest.raises(ValueError):
+        await AnalyticsService.get_supplier_rankings(RecordingSession(), sort_by='name')
+    with pytest.raises(ValueError):
+        await AnalyticsService.get_supplier_rankings(RecordingSession(), limit=0)
+
+async def test_refresh_runs_in_dependency_order_and_records_failures():
+    db = RecordingSession(failing=('supplier_daily_metrics',))
+
+    results = await AnalyticsService.refresh_materialized_views(db)
+
+    assert [r['view'] for r in results] == list(MATERIALIZED_VIEWS)
+    assert [r['success'] for r in results] == [True, False, True]
+    assert db.rollbacks == 1
+    refreshes = [s for s in db.statements if s.startswith('REFRESH')]
+    assert refreshes == [f"REFRESH MATERIALIZED VIEW CONCURRENTLY {v}" for v in MATERIALIZED_VIEWS]
+    assert sum('INSERT INTO materialized_view_refreshes' in s for s in db.statements) == 3
+
+async def test_refresh_rejects_unknown_views():
+    with pytest.raises(ValueError):
+        await AnalyticsService.refresh_materialized_views(RecordingSession(), ['parcels; DROP TABLE x'])
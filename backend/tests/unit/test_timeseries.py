@@ -0,0 +1,73 @@
+"""Test damage time-series bucketing"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.analytics import _etag_matches
+from app.services import analytics_service
+from app.services.analytics_service import AnalyticsService, timeseries_bucket
+from app.services.rollup_service import daily_rollups, hourly_rollups
+
+def test_bucket_is_smallest_width_within_max_points():
+    assert timeseries_bucket(timedelta(days=1), 300) == timedelta(hours=1)
+    assert timeseries_bucket(timedelta(days=30), 300) == timedelta(hours=3)
+    assert timeseries_bucket(timedelta(days=365), 300) == timedelta(days=2)
+    assert timeseries_bucket(timedelta(days=365), 50) == timedelta(days=14)
+
+def test_bucket_falls_back_to_whole_days():
+    assert timeseries_bucket(timedelta(days=3650), 20) == timedelta(days=183)
+
+def test_bucket_rejects_invalid_max_points():
+    with pytest.raises(ValueError):
+        timeseries_bucket(timedelta(days=1), 0)
+
+@pytest.fixture
+def queries(monkeypatch):
+    calls = []
+
+    async def fake_query(db, r, since, until, width, warehouse_id, supplier_id):
+        calls.append((r, since, until, width))
+        return {'points': []}
+
+    async def no_cache(key, loader):
+        return await loader()
+
+    monkeypatch.setattr(AnalyticsService, '_query_damage_timeseries', staticmethod(fake_query))
+    monkeypatch.setattr(analytics_service.timeseries_cache, 'get_or_load', no_cache)
+    return calls
+
+async def test_short_windows_read_hourly_rollups_on_hour_boundaries(queries):
+    await AnalyticsService.get_damage_timeseries(
+        None, since=datetime(2024, 5, 1, 10, 30), until=datetime(2024, 5, 2, 9, 10)
+    )
+    r, since, until, width = queries[0]
+    assert r is hourly_rollups
+    assert since == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+    assert until == datetime(2024, 5, 2, 10, tzinfo=timezone.utc)
+    assert width == timedelta(hours=1)
+
+async def test_long_windows_read_daily_rollups_within_max_points(queries):
+    await AnalyticsService.get_damage_timeseries(
+        None, since=datetime(2023, 5, 1, 10, 30), until=datetime(2024, 5, 1, 6), max_points=300
+    )
+    r, since, until, width = queries[0]
+    assert r is daily_rollups
+    assert since == datetime(2023, 5, 1, tzinfo=timezone.utc)
+    assert until == datetime(2024, 5, 2, tzinfo=timezone.utc)
+    assert (until - since) / width <= 300
+
+async def test_empty_window_is_rejected(queries):
+    with pytest.raises(ValueError):
+        await AnalyticsService.get_damage_timeseries(
+            None, since=datetime(2024, 5, 2), until=datetime(2024, 5, 1)
+        )
+
+def test_if_none_match_compares_whole_etags():
+    etag = '"0123456789abcdef"'
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(etag, '"other", W/"0123456789abcdef"')
+    assert _etag_matches(etag, '*')
+    assert not _etag_matches(etag, '')
+    assert not _etag_matches(etag, '"0123456789abcdef0"')
+    assert not _etag_matches(etag, '0123456789abcdef')
+    assert not _etag_matches(etag, 'x' + etag)
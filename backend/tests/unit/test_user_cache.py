@@ -0,0 +1,151 @@
+"""Test the authenticated-user cache"""
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.security import create_access_token
+from app.models.user import User, UserRole
+from app.services.user_cache import UserCache
+
+class FakeResult:
+    def __init__(self, user):
+        self._user = user
+
+    def scalar_one_or_none(self):
+        return self._user
+
+class FakeSession:
+    """Counts queries and returns a copy of the stored user"""
+
+    def __init__(self, **values):
+        self.values = values
+        self.queries = 0
+        self.merged = []
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(User(**self.values) if self.values else None)
+
+    async def merge(self, instance, load=True):
+        assert load is False
+        self.merged.append(instance)
+        return instance
+
+def _session(**overrides):
+    values = {
+        'user_id': uuid.uuid4(),
+        'username': 'scanner1',
+        'email': 'scanner1@example.com',
+        'password_hash': 'x',
+        'full_name': 'Scanner One',
+        'role': UserRole.SCANNER,
+        'is_active': True,
+        'created_at': datetime(2024, 5, 1),
+        'updated_at': datetime(2024, 5, 1),
+    }
+    values.update(overrides)
+    return FakeSession(**values)
+
+async def test_active_user_is_cached_until_invalidated():
+    """Repeat lookups cost no queries until the user changes"""
+    db = _session()
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+
+    first = await cache.get_user(db, 'scanner1')
+    second = await cache.get_user(db, 'scanner1')
+
+    assert db.queries == 1
+    assert second is not first
+    assert second.user_id == first.user_id
+    assert second.role == UserRole.SCANNER
+    assert db.merged == [second]
+
+    cache.on_notification('users_changed', 'someone_else')
+    await cache.get_user(db, 'scanner1')
+    assert db.queries == 1
+
+    db.values['role'] = UserRole.SUPERVISOR
+    cache.on_notification('users_changed', 'scanner1')
+    reloaded = await cache.get_user(db, 'scanner1')
+    assert db.queries == 2
+    assert reloaded.role == UserRole.SUPERVISOR
+
+    info = cache.info()
+    assert info['users']['hits'] == 2
+    assert info['users']['misses'] == 2
+    assert info['users']['hit_ratio'] == 0.5
+
+async def test_inactive_and_unknown_users_are_not_cached():
+    """Deactivated users are re-read on every request"""
+    db = _session(is_active=False)
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+
+    assert (await cache.get_user(db, 'scanner1')).is_active is False
+    await cache.get_user(db, 'scanner1')
+    assert db.queries == 2
+
+    missing = FakeSession()
+    assert await cache.get_user(missing, 'ghost') is None
+    assert cache.info()['users']['entries'] == 0
+
+async def test_invalidation_during_load_is_not_lost():
+    """A row read before a notification is not cached"""
+    db = _session()
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    execute = db.execute
+
+    async def execute_then_notify(statement):
+        result = await execute(statement)
+        cache.on_notification('users_changed', 'scanner1')
+        return result
+
+    db.execute = execute_then_notify
+    await cache.get_user(db, 'scanner1')
+
+    assert cache.info()['users']['entries'] == 0
+
+async def test_user_cache_expires_after_ttl():
+    """The TTL forces a reload when no notification is received"""
+    db = _session()
+    cache = UserCache(ttl_seconds=0, max_entries=10)
+
+    await cache.get_user(db, 'scanner1')
+    await cache.get_user(db, 'scanner1')
+
+    assert db.queries == 2
+
+async def test_user_cache_is_bounded():
+    """Least recently used users are evicted beyond max_entries"""
+    cache = UserCache(ttl_seconds=60, max_entries=2)
+    for username in ('a', 'b', 'a', 'c'):
+        await cache.get_user(_session(username=username), username)
+
+    assert list(cache._users) == ['a', 'c']
+
+def test_token_decode_is_memoized():
+    """Valid tokens are decoded once; invalid ones every time"""
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    token = create_access_token(data={'sub': 'scanner1', 'role': 'scanner'})
+
+    first = cache.decode_token(token)
+    second = cache.decode_token(token)
+
+    assert second is first
+    assert first.username == 'scanner1'
+    assert cache.decode_token('not-a-token') is None
+    assert cache.decode_token('not-a-token') is None
+
+    info = cache.info()['tokens']
+    assert info['hits'] == 1
+    assert info['misses'] == 3
+    assert info['entries'] == 1
+
+def test_expired_tokens_are_not_memoized():
+    """A token is never served from the memo past its expiry"""
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    token = create_access_token(
+        data={'sub': 'scanner1', 'role': 'scanner'},
+        expires_delta=timedelta(seconds=-1)
+    )
+
+    assert cache.decode_token(token) is None
+    assert cache.info()['tokens']['entries'] == 0
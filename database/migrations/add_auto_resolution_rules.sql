@@ -0,0 +1,148 @@
+-- Declarative auto-resolution rules, compiled by the API into a decision table
+-- Keeps an existing rule set; edit json_value to change the rules
+INSERT INTO system_settings (setting_key, setting_value, value_type, category, description, json_value)
+VALUES (
+    'auto_resolution_rules', '', 'json', 'auto_resolution', 'Ordered auto-resolution decision rules',
+    '{
+  "rules": [
+    {
+      "name": "auto_resolution_disabled",
+      "when": [
+        [
+          "$auto_approve_enabled",
+          "==",
+          false
+        ]
+      ],
+      "action": "manual_review",
+      "reason": "Auto-resolution disabled"
+    },
+    {
+      "name": "insufficient_images",
+      "when": [
+        [
+          "images_received",
+          "<",
+          "$min_images_for_auto_resolution"
+        ]
+      ],
+      "action": "manual_review",
+      "reason": "Insufficient images ({images_received:.0f}/{min_images_for_auto_resolution:.0f})"
+    },
+    {
+      "name": "high_value_damage",
+      "when": [
+        [
+          "has_damage",
+          "==",
+          true
+        ],
+        [
+          "unit_value",
+          ">=",
+          "$high_value_threshold"
+        ]
+      ],
+      "action": "manual_review",
+      "reason": "Damage on high-value item"
+    },
+    {
+      "name": "no_damage_high_confidence",
+      "when": [
+        [
+          "has_damage",
+          "==",
+          false
+        ],
+        [
+          "overall_confidence",
+          ">=",
+          "$auto_approve_confidence_threshold"
+        ]
+      ],
+      "action": "approved",
+      "reason": "No damage detected with high confidence"
+    },
+    {
+      "name": "supplier_history_review",
+      "when": [
+        [
+          "$use_supplier_history",
+          "==",
+          true
+        ],
+        [
+          "has_damage",
+          "==",
+          true
+        ],
+        [
+          "supplier_damage_rate",
+          ">=",
+          "$supplier_damage_rate_threshold"
+        ],
+        [
+          "damage_score",
+          "<=",
+          "$auto_approve_max_damage_score"
+        ]
+      ],
+      "action": "manual_review",
+      "reason": "Minor damage from supplier with high damage rate"
+    },
+    {
+      "name": "minor_damage_acceptable",
+      "when": [
+        [
+          "damage_score",
+          "<=",
+          "$auto_approve_max_damage_score"
+        ]
+      ],
+      "action": "approved",
+      "reason": "Damage score below threshold for approval"
+    },
+    {
+      "name": "damage_detected",
+      "when": [
+        [
+          "$auto_quarantine_enabled",
+          "==",
+          true
+        ],
+        [
+          "damage_score",
+          ">=",
+          "$auto_quarantine_min_damage_score"
+        ],
+        [
+          "overall_confidence",
+          ">=",
+          "$auto_quarantine_confidence_threshold"
+        ]
+      ],
+      "action": "quarantine",
+      "reason": "Significant damage detected"
+    },
+    {
+      "name": "low_confidence",
+      "when": [
+        [
+          "overall_confidence",
+          "<",
+          "$auto_quarantine_confidence_threshold"
+        ]
+      ],
+      "action": "manual_review",
+      "reason": "Low detection confidence"
+    }
+  ],
+  "default": {
+    "name": "edge_case",
+    "action": "manual_review",
+    "reason": "Edge case - requires human judgment"
+  }
+}
+'
+)
+ON CONFLICT (setting_key) DO NOTHING;
@@ -0,0 +1,10 @@
+-- Bulk damage-claim generation
+-- Claim numbers (CLM-YYYYMMDD-00000001) are drawn from a sequence inside
+-- the bulk INSERT, and at most one claim is filed per parcel inspection so
+-- ClaimService.generate_claims can be re-run with ON CONFLICT DO NOTHING.
+-- Resolve any duplicate (parcel_id, inspection_id) claims before applying.
+
+CREATE SEQUENCE IF NOT EXISTS damage_claim_number_seq;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_claims_parcel_inspection
+    ON damage_claims(parcel_id, inspection_id);
@@ -0,0 +1,29 @@
+-- Damage heatmap grids
+-- Coverage counts of detection bounding boxes per UTC day x image angle x
+-- packaging type, on a grid_size x grid_size grid of the normalized image
+-- (cells: little-endian int32, row-major, row = y). Maintained on read by
+-- HeatmapService; damage_heatmap_days records when each day was computed,
+-- so days without detections are not recomputed.
+
+CREATE TABLE IF NOT EXISTS damage_heatmap_daily (
+    day DATE NOT NULL,
+    angle VARCHAR(20) NOT NULL,
+    packaging_type_id UUID REFERENCES packaging_types(packaging_type_id) ON DELETE CASCADE,
+    grid_size SMALLINT NOT NULL,
+    detections BIGINT NOT NULL DEFAULT 0,
+    cells BYTEA NOT NULL
+);
+
+-- Upsert key; packaging type may be unknown (NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_damage_heatmap_daily_key
+    ON damage_heatmap_daily(day, angle, packaging_type_id) NULLS NOT DISTINCT;
+
+CREATE TABLE IF NOT EXISTS damage_heatmap_days (
+    day DATE PRIMARY KEY,
+    detections BIGINT NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Detection window scans for materialization
+CREATE INDEX IF NOT EXISTS idx_damage_detections_detected_at
+    ON damage_detections(detected_at);
@@ -0,0 +1,17 @@
+-- Chain checkpoints for event_log verification
+-- Each row records an event verified by scripts/verify_event_log.py and
+-- its hash; later runs resume after the newest checkpoint and re-check
+-- that every checkpointed event still carries the recorded hash
+CREATE TABLE IF NOT EXISTS event_log_checkpoints (
+    checkpoint_id BIGSERIAL PRIMARY KEY,
+    last_event_id BIGINT NOT NULL UNIQUE,
+    last_event_hash VARCHAR(64) NOT NULL,
+    events_verified BIGINT NOT NULL,
+    duration_ms INTEGER,
+    verified_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+CREATE OR REPLACE RULE event_log_checkpoints_no_update AS ON UPDATE TO event_log_checkpoints DO INSTEAD NOTHING;
+CREATE OR REPLACE RULE event_log_checkpoints_no_delete AS ON DELETE TO event_log_checkpoints DO INSTEAD NOTHING;
+
+COMMENT ON TABLE event_log_checkpoints IS 'Verified event_log chain positions. Append-only.';
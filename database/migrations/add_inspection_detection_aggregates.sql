@@ -0,0 +1,39 @@
+-- Running detection aggregates on inspections
+-- Updated as each image's detections are written so completing an
+-- inspection no longer re-reads every damage_detections row
+ALTER TABLE inspections ADD COLUMN IF NOT EXISTS damage_count INTEGER DEFAULT 0;
+ALTER TABLE inspections ADD COLUMN IF NOT EXISTS damage_types JSONB;
+ALTER TABLE inspections ADD COLUMN IF NOT EXISTS detection_confidence_sum DOUBLE PRECISION DEFAULT 0;
+ALTER TABLE inspections ADD COLUMN IF NOT EXISTS max_severity VARCHAR(20);
+
+-- damage_types is now a {damage_type: count} histogram
+UPDATE inspections SET damage_types = NULL
+WHERE damage_types IS NOT NULL AND jsonb_typeof(damage_types) <> 'object';
+
+-- Backfill from existing detections
+UPDATE inspections i
+SET damage_count = agg.damage_count,
+    detection_confidence_sum = agg.confidence_sum,
+    max_severity = agg.max_severity,
+    damage_types = agg.damage_types
+FROM (
+    SELECT
+        d.inspection_id,
+        COUNT(*) AS damage_count,
+        COALESCE(SUM(d.confidence), 0) AS confidence_sum,
+        (ARRAY['minor', 'moderate', 'severe'])[
+            MAX(array_position(ARRAY['minor', 'moderate', 'severe'], d.severity::text))
+        ] AS max_severity,
+        (
+            SELECT jsonb_object_agg(t.damage_type, t.type_count)
+            FROM (
+                SELECT damage_type, COUNT(*) AS type_count
+                FROM damage_detections
+                WHERE inspection_id = d.inspection_id
+                GROUP BY damage_type
+            ) t
+        ) AS damage_types
+    FROM damage_detections d
+    GROUP BY d.inspection_id
+) agg
+WHERE i.inspection_id = agg.inspection_id;
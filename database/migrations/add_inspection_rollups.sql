@@ -0,0 +1,64 @@
+-- Hourly and daily inspection rollups
+-- Counters per time bucket x warehouse x supplier x damage_type, maintained
+-- by RollupService in the transaction that completes inspections.
+-- damage_type '' rows count all inspections; per-type rows count the
+-- inspections in which that type was detected and its detections.
+-- Populate existing history with:
+--   python -m scripts.backfill_rollups --days 365
+
+CREATE TABLE IF NOT EXISTS inspection_rollups_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    warehouse_id UUID,
+    supplier_id UUID,
+    damage_type VARCHAR(50) NOT NULL DEFAULT '', -- '' = all inspections
+
+    inspections BIGINT NOT NULL DEFAULT 0,
+    damaged BIGINT NOT NULL DEFAULT 0,
+    auto_resolved BIGINT NOT NULL DEFAULT 0,
+    auto_approved BIGINT NOT NULL DEFAULT 0,
+    auto_quarantined BIGINT NOT NULL DEFAULT 0,
+    auto_rejected BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    confidence_count BIGINT NOT NULL DEFAULT 0,
+    detections BIGINT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Upsert key; warehouse/supplier may be unknown (NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_inspection_rollups_hourly_key
+    ON inspection_rollups_hourly(bucket_start, warehouse_id, supplier_id, damage_type) NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS idx_inspection_rollups_hourly_warehouse
+    ON inspection_rollups_hourly(warehouse_id, bucket_start);
+CREATE INDEX IF NOT EXISTS idx_inspection_rollups_hourly_supplier
+    ON inspection_rollups_hourly(supplier_id, bucket_start);
+
+CREATE TABLE IF NOT EXISTS inspection_rollups_daily (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    warehouse_id UUID,
+    supplier_id UUID,
+    damage_type VARCHAR(50) NOT NULL DEFAULT '', -- '' = all inspections
+
+    inspections BIGINT NOT NULL DEFAULT 0,
+    damaged BIGINT NOT NULL DEFAULT 0,
+    auto_resolved BIGINT NOT NULL DEFAULT 0,
+    auto_approved BIGINT NOT NULL DEFAULT 0,
+    auto_quarantined BIGINT NOT NULL DEFAULT 0,
+    auto_rejected BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    confidence_count BIGINT NOT NULL DEFAULT 0,
+    detections BIGINT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Upsert key; warehouse/supplier may be unknown (NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_inspection_rollups_daily_key
+    ON inspection_rollups_daily(bucket_start, warehouse_id, supplier_id, damage_type) NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS idx_inspection_rollups_daily_warehouse
+    ON inspection_rollups_daily(warehouse_id, bucket_start);
+CREATE INDEX IF NOT EXISTS idx_inspection_rollups_daily_supplier
+    ON inspection_rollups_daily(supplier_id, bucket_start);
+
+COMMENT ON TABLE inspection_rollups_hourly IS 'Inspection counters per UTC hour x warehouse x supplier x damage_type.';
+COMMENT ON TABLE inspection_rollups_daily IS 'Inspection counters per UTC day x warehouse x supplier x damage_type.';
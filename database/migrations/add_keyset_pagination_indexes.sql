@@ -0,0 +1,30 @@
+-- Indexes for keyset-paginated listings (app/db/pagination.py)
+-- Each listing orders by (sort column, primary key) DESC and seeks past the
+-- previous page's last pair; with a matching index every page is a single
+-- backward range scan of limit + 1 entries. Filtered listings lead with
+-- the filter column so the scan stays inside the filtered range.
+-- CONCURRENTLY: run outside a transaction (psql -f does).
+
+-- Parcels: GET /parcels
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parcels_created_keyset
+    ON parcels(created_at, parcel_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parcels_status_created_keyset
+    ON parcels(status, created_at, parcel_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parcels_warehouse_created_keyset
+    ON parcels(current_warehouse_id, created_at, parcel_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parcels_damaged_created_keyset
+    ON parcels(created_at, parcel_id) WHERE has_damage;
+
+-- Inspections: GET /inspections
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_inspections_started_keyset
+    ON inspections(started_at, inspection_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_inspections_status_started_keyset
+    ON inspections(overall_status, started_at, inspection_id);
+
+-- Claims: GET /claims (supersedes idx_claims_created for listings)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_claims_created_keyset
+    ON damage_claims(created_at, claim_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_claims_status_created_keyset
+    ON damage_claims(status, created_at, claim_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_claims_supplier_created_keyset
+    ON damage_claims(supplier_id, created_at, claim_id);
@@ -0,0 +1,12 @@
+-- Inspection latency (completed_at - started_at) in the inspection rollups
+-- Sum and count per bucket, so any coarser bucket averages exactly.
+-- Existing buckets read 0 until rebuilt:
+--   python -m scripts.backfill_rollups --days 365
+
+ALTER TABLE inspection_rollups_hourly
+    ADD COLUMN IF NOT EXISTS latency_ms_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS latency_count BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE inspection_rollups_daily
+    ADD COLUMN IF NOT EXISTS latency_ms_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS latency_count BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,140 @@
+-- Daily per-supplier metric buckets
+-- Scorecards for any window are sums over these rows, so the API never
+-- joins shipments, parcels, violations and claims at request time.
+-- Each source is aggregated separately and combined with UNION ALL, so
+-- rows are not multiplied across joins.
+CREATE MATERIALIZED VIEW IF NOT EXISTS supplier_daily_metrics AS
+SELECT
+    supplier_id,
+    day,
+    SUM(shipments)::BIGINT AS shipments,
+    SUM(late_shipments)::BIGINT AS late_shipments,
+    SUM(parcels)::BIGINT AS parcels,
+    SUM(damaged_parcels)::BIGINT AS damaged_parcels,
+    SUM(packaged_parcels)::BIGINT AS packaged_parcels,
+    SUM(packaging_damage_rate_sum) AS packaging_damage_rate_sum,
+    SUM(violations)::BIGINT AS violations,
+    MAX(last_violation_at) AS last_violation_at,
+    SUM(claims)::BIGINT AS claims,
+    SUM(claimed_value) AS claimed_value,
+    SUM(approved_claim_value) AS approved_claim_value
+FROM (
+    SELECT
+        sh.supplier_id,
+        (COALESCE(sh.actual_arrival, sh.created_at) AT TIME ZONE 'UTC')::DATE AS day,
+        COUNT(*) AS shipments,
+        COUNT(*) FILTER (WHERE sh.is_late) AS late_shipments,
+        0::BIGINT AS parcels,
+        0::BIGINT AS damaged_parcels,
+        0::BIGINT AS packaged_parcels,
+        0::NUMERIC AS packaging_damage_rate_sum,
+        0::BIGINT AS violations,
+        NULL::TIMESTAMP WITH TIME ZONE AS last_violation_at,
+        0::BIGINT AS claims,
+        0::NUMERIC AS claimed_value,
+        0::NUMERIC AS approved_claim_value
+    FROM shipments sh
+    WHERE sh.supplier_id IS NOT NULL
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    SELECT
+        sh.supplier_id,
+        (COALESCE(p.received_at, p.created_at) AT TIME ZONE 'UTC')::DATE,
+        0, 0,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE p.has_damage),
+        COUNT(pt.damage_rate),
+        COALESCE(SUM(pt.damage_rate), 0),
+        0, NULL, 0, 0, 0
+    FROM parcels p
+    JOIN shipments sh ON sh.shipment_id = p.shipment_id
+    LEFT JOIN packaging_types pt ON pt.packaging_type_id = p.packaging_type_id
+    WHERE sh.supplier_id IS NOT NULL
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    SELECT
+        sv.supplier_id,
+        (sv.created_at AT TIME ZONE 'UTC')::DATE,
+        0, 0, 0, 0, 0, 0,
+        COUNT(*),
+        MAX(sv.created_at),
+        0, 0, 0
+    FROM supplier_violations sv
+    WHERE sv.supplier_id IS NOT NULL
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    SELECT
+        dc.supplier_id,
+        (dc.created_at AT TIME ZONE 'UTC')::DATE,
+        0, 0, 0, 0, 0, 0, 0, NULL,
+        COUNT(*),
+        COALESCE(SUM(dc.claimed_value), 0),
+        COALESCE(SUM(dc.approved_amount), 0)
+    FROM damage_claims dc
+    WHERE dc.supplier_id IS NOT NULL
+    GROUP BY 1, 2
+) buckets
+GROUP BY supplier_id, day;
+
+-- Required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_supplier_daily_metrics_supplier_day
+    ON supplier_daily_metrics(supplier_id, day);
+CREATE INDEX IF NOT EXISTS idx_supplier_daily_metrics_day
+    ON supplier_daily_metrics(day);
+
+-- All-time scorecards, now summed from the daily buckets (same columns;
+-- the original joined every source at once and over-counted)
+DROP MATERIALIZED VIEW IF EXISTS supplier_scorecards;
+CREATE MATERIALIZED VIEW supplier_scorecards AS
+SELECT
+    s.supplier_id,
+    s.supplier_code,
+    s.name,
+    s.damage_rate,
+    COALESCE(SUM(m.shipments), 0) AS total_shipments,
+    COALESCE(SUM(m.late_shipments), 0) AS late_deliveries,
+    ROUND(SUM(m.late_shipments)::NUMERIC / NULLIF(SUM(m.shipments), 0) * 100, 2) AS late_delivery_rate,
+    COALESCE(SUM(m.damaged_parcels), 0) AS damaged_parcels,
+    COALESCE(SUM(m.violations), 0) AS total_violations,
+    COALESCE(SUM(m.claims), 0) AS total_claims,
+    COALESCE(SUM(m.approved_claim_value), 0) AS total_claim_value,
+    SUM(m.packaging_damage_rate_sum) / NULLIF(SUM(m.packaged_parcels), 0) AS avg_packaging_damage_rate,
+    MAX(m.last_violation_at) AS last_violation_date,
+    CURRENT_TIMESTAMP AS last_updated
+FROM suppliers s
+LEFT JOIN supplier_daily_metrics m ON m.supplier_id = s.supplier_id
+GROUP BY s.supplier_id, s.supplier_code, s.name, s.damage_rate;
+
+CREATE UNIQUE INDEX idx_scorecard_supplier ON supplier_scorecards(supplier_id);
+
+COMMENT ON MATERIALIZED VIEW supplier_daily_metrics IS 'Per-supplier daily metric buckets for windowed scorecards. Refreshed by the analytics.refresh_materialized_views beat task.';
+COMMENT ON MATERIALIZED VIEW supplier_scorecards IS 'All-time supplier performance metrics, summed from supplier_daily_metrics.';
+
+-- Refresh history (duration and outcome of every refresh)
+CREATE TABLE IF NOT EXISTS materialized_view_refreshes (
+    refresh_id BIGSERIAL PRIMARY KEY,
+    view_name VARCHAR(100) NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    success BOOLEAN NOT NULL,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_matview_refreshes_view_started
+    ON materialized_view_refreshes(view_name, started_at DESC);
+
+-- Dependency order: scorecards are built from the daily buckets
+CREATE OR REPLACE FUNCTION refresh_all_materialized_views()
+RETURNS void AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY parcel_dwell_times;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY supplier_daily_metrics;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY supplier_scorecards;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,39 @@
+-- Announce system_settings changes so API processes can drop cached settings
+-- Payload is the category of the changed row
+CREATE OR REPLACE FUNCTION notify_system_settings_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify(
+        'system_settings_changed',
+        COALESCE(
+            CASE WHEN TG_OP = 'DELETE' THEN OLD.category ELSE NEW.category END,
+            ''
+        )
+    );
+    IF TG_OP = 'UPDATE' AND OLD.category IS DISTINCT FROM NEW.category THEN
+        PERFORM pg_notify('system_settings_changed', COALESCE(OLD.category, ''));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_system_settings_changed ON system_settings;
+CREATE TRIGGER trigger_notify_system_settings_changed
+    AFTER INSERT OR UPDATE OR DELETE ON system_settings
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_system_settings_changed();
+
+-- TRUNCATE has no rows; notify every listener
+CREATE OR REPLACE FUNCTION notify_system_settings_truncated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('system_settings_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_system_settings_truncated ON system_settings;
+CREATE TRIGGER trigger_notify_system_settings_truncated
+    AFTER TRUNCATE ON system_settings
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_system_settings_truncated();
@@ -0,0 +1,42 @@
+-- Announce user changes so API processes can drop cached users
+-- Payload is the username of the changed row. last_login and updated_at
+-- alone do not notify: every login writes them.
+CREATE OR REPLACE FUNCTION notify_users_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND (
+        OLD.username, OLD.email, OLD.password_hash, OLD.full_name, OLD.role, OLD.phone, OLD.is_active
+    ) IS NOT DISTINCT FROM (
+        NEW.username, NEW.email, NEW.password_hash, NEW.full_name, NEW.role, NEW.phone, NEW.is_active
+    ) THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('users_changed', COALESCE(OLD.username, ''));
+    IF TG_OP = 'UPDATE' AND OLD.username IS DISTINCT FROM NEW.username THEN
+        PERFORM pg_notify('users_changed', COALESCE(NEW.username, ''));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_users_changed ON users;
+CREATE TRIGGER trigger_notify_users_changed
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_users_changed();
+
+-- TRUNCATE has no rows; notify every listener
+CREATE OR REPLACE FUNCTION notify_users_truncated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('users_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_users_truncated ON users;
+CREATE TRIGGER trigger_notify_users_truncated
+    AFTER TRUNCATE ON users
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_users_truncated();
@@ -0,0 +1,272 @@
+-- Incremental supplier metrics
+-- Replaces trigger_update_supplier_metrics, which ran three full COUNT
+-- scans of the supplier's parcels for every parcel row written. Statement-
+-- level triggers now read the transition tables once per statement and
+-- apply per-supplier deltas to counters on suppliers; a 2,000-parcel bulk
+-- update costs one grouped join instead of 2,000 supplier scans.
+
+ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS total_parcels_received INTEGER DEFAULT 0;
+
+DROP TRIGGER IF EXISTS trigger_update_supplier_metrics ON parcels;
+DROP FUNCTION IF EXISTS update_supplier_metrics();
+
+-- Apply per-supplier deltas (arrays sorted by supplier_id)
+-- Rows are locked in supplier_id order so concurrent statements touching
+-- the same suppliers cannot deadlock
+CREATE OR REPLACE FUNCTION apply_supplier_metric_deltas(
+    supplier_ids UUID[],
+    shipment_deltas BIGINT[],
+    parcel_deltas BIGINT[],
+    damaged_deltas BIGINT[]
+)
+RETURNS void AS $$
+BEGIN
+    IF supplier_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    PERFORM 1
+    FROM suppliers
+    WHERE supplier_id = ANY(supplier_ids)
+    ORDER BY supplier_id
+    FOR UPDATE;
+
+    UPDATE suppliers s
+    SET
+        total_shipments = COALESCE(s.total_shipments, 0) + d.shipments,
+        total_parcels_received = COALESCE(s.total_parcels_received, 0) + d.parcels,
+        total_damaged_parcels = COALESCE(s.total_damaged_parcels, 0) + d.damaged,
+        damage_rate = COALESCE(
+            CAST(COALESCE(s.total_damaged_parcels, 0) + d.damaged AS DECIMAL) /
+            NULLIF(COALESCE(s.total_parcels_received, 0) + d.parcels, 0),
+            0
+        )
+    FROM unnest(supplier_ids, shipment_deltas, parcel_deltas, damaged_deltas)
+        AS d(supplier_id, shipments, parcels, damaged)
+    WHERE s.supplier_id = d.supplier_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Parcels: +1 per inserted row, -1 per deleted row, and for updates only
+-- the rows whose damage flag or shipment changed (moved between suppliers)
+CREATE OR REPLACE FUNCTION parcels_supplier_metric_deltas()
+RETURNS TRIGGER AS $$
+DECLARE
+    supplier_ids UUID[];
+    parcel_deltas BIGINT[];
+    damaged_deltas BIGINT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(parcels ORDER BY supplier_id),
+               array_agg(damaged ORDER BY supplier_id)
+        INTO supplier_ids, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT sh.supplier_id, COUNT(*) AS parcels,
+                   COUNT(*) FILTER (WHERE n.has_damage) AS damaged
+            FROM new_rows n
+            JOIN shipments sh ON sh.shipment_id = n.shipment_id
+            WHERE sh.supplier_id IS NOT NULL
+            GROUP BY sh.supplier_id
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(-parcels ORDER BY supplier_id),
+               array_agg(-damaged ORDER BY supplier_id)
+        INTO supplier_ids, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT sh.supplier_id, COUNT(*) AS parcels,
+                   COUNT(*) FILTER (WHERE o.has_damage) AS damaged
+            FROM old_rows o
+            JOIN shipments sh ON sh.shipment_id = o.shipment_id
+            WHERE sh.supplier_id IS NOT NULL
+            GROUP BY sh.supplier_id
+        ) d;
+    ELSE
+        WITH changed AS (
+            SELECT o.shipment_id AS old_shipment_id, o.has_damage AS old_damage,
+                   n.shipment_id AS new_shipment_id, n.has_damage AS new_damage
+            FROM new_rows n
+            JOIN old_rows o ON o.parcel_id = n.parcel_id
+            WHERE n.has_damage IS DISTINCT FROM o.has_damage
+               OR n.shipment_id IS DISTINCT FROM o.shipment_id
+        ),
+        deltas AS (
+            SELECT sh.supplier_id, 1 AS parcels, CASE WHEN c.new_damage THEN 1 ELSE 0 END AS damaged
+            FROM changed c
+            JOIN shipments sh ON sh.shipment_id = c.new_shipment_id
+            UNION ALL
+            SELECT sh.supplier_id, -1, CASE WHEN c.old_damage THEN -1 ELSE 0 END
+            FROM changed c
+            JOIN shipments sh ON sh.shipment_id = c.old_shipment_id
+        )
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(parcels ORDER BY supplier_id),
+               array_agg(damaged ORDER BY supplier_id)
+        INTO supplier_ids, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT supplier_id, SUM(parcels) AS parcels, SUM(damaged) AS damaged
+            FROM deltas
+            WHERE supplier_id IS NOT NULL
+            GROUP BY supplier_id
+            HAVING SUM(parcels) <> 0 OR SUM(damaged) <> 0
+        ) d;
+    END IF;
+
+    IF supplier_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM apply_supplier_metric_deltas(
+        supplier_ids,
+        array_fill(0::BIGINT, ARRAY[cardinality(supplier_ids)]),
+        parcel_deltas,
+        damaged_deltas
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Shipments: count per supplier; a shipment moved to another supplier
+-- takes its parcels with it
+CREATE OR REPLACE FUNCTION shipments_supplier_metric_deltas()
+RETURNS TRIGGER AS $$
+DECLARE
+    supplier_ids UUID[];
+    shipment_deltas BIGINT[];
+    parcel_deltas BIGINT[];
+    damaged_deltas BIGINT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(shipments ORDER BY supplier_id),
+               array_agg(0::BIGINT),
+               array_agg(0::BIGINT)
+        INTO supplier_ids, shipment_deltas, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT supplier_id, COUNT(*) AS shipments
+            FROM new_rows
+            WHERE supplier_id IS NOT NULL
+            GROUP BY supplier_id
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(-shipments ORDER BY supplier_id),
+               array_agg(0::BIGINT),
+               array_agg(0::BIGINT)
+        INTO supplier_ids, shipment_deltas, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT supplier_id, COUNT(*) AS shipments
+            FROM old_rows
+            WHERE supplier_id IS NOT NULL
+            GROUP BY supplier_id
+        ) d;
+    ELSE
+        WITH moved AS (
+            SELECT o.shipment_id, o.supplier_id AS old_supplier_id, n.supplier_id AS new_supplier_id
+            FROM new_rows n
+            JOIN old_rows o ON o.shipment_id = n.shipment_id
+            WHERE n.supplier_id IS DISTINCT FROM o.supplier_id
+        ),
+        moved_parcels AS (
+            SELECT m.shipment_id, m.old_supplier_id, m.new_supplier_id,
+                   COUNT(p.parcel_id) AS parcels,
+                   COUNT(p.parcel_id) FILTER (WHERE p.has_damage) AS damaged
+            FROM moved m
+            LEFT JOIN parcels p ON p.shipment_id = m.shipment_id
+            GROUP BY m.shipment_id, m.old_supplier_id, m.new_supplier_id
+        ),
+        deltas AS (
+            SELECT new_supplier_id AS supplier_id, 1 AS shipments, parcels, damaged FROM moved_parcels
+            UNION ALL
+            SELECT old_supplier_id, -1, -parcels, -damaged FROM moved_parcels
+        )
+        SELECT array_agg(supplier_id ORDER BY supplier_id),
+               array_agg(shipments ORDER BY supplier_id),
+               array_agg(parcels ORDER BY supplier_id),
+               array_agg(damaged ORDER BY supplier_id)
+        INTO supplier_ids, shipment_deltas, parcel_deltas, damaged_deltas
+        FROM (
+            SELECT supplier_id, SUM(shipments) AS shipments, SUM(parcels) AS parcels, SUM(damaged) AS damaged
+            FROM deltas
+            WHERE supplier_id IS NOT NULL
+            GROUP BY supplier_id
+        ) d;
+    END IF;
+
+    PERFORM apply_supplier_metric_deltas(supplier_ids, shipment_deltas, parcel_deltas, damaged_deltas);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS parcels_supplier_metrics_insert ON parcels;
+DROP TRIGGER IF EXISTS parcels_supplier_metrics_update ON parcels;
+DROP TRIGGER IF EXISTS parcels_supplier_metrics_delete ON parcels;
+DROP TRIGGER IF EXISTS shipments_supplier_metrics_insert ON shipments;
+DROP TRIGGER IF EXISTS shipments_supplier_metrics_update ON shipments;
+DROP TRIGGER IF EXISTS shipments_supplier_metrics_delete ON shipments;
+
+CREATE TRIGGER parcels_supplier_metrics_insert
+AFTER INSERT ON parcels
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION parcels_supplier_metric_deltas();
+
+CREATE TRIGGER parcels_supplier_metrics_update
+AFTER UPDATE ON parcels
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION parcels_supplier_metric_deltas();
+
+CREATE TRIGGER parcels_supplier_metrics_delete
+AFTER DELETE ON parcels
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION parcels_supplier_metric_deltas();
+
+CREATE TRIGGER shipments_supplier_metrics_insert
+AFTER INSERT ON shipments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION shipments_supplier_metric_deltas();
+
+CREATE TRIGGER shipments_supplier_metrics_update
+AFTER UPDATE ON shipments
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION shipments_supplier_metric_deltas();
+
+CREATE TRIGGER shipments_supplier_metrics_delete
+AFTER DELETE ON shipments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION shipments_supplier_metric_deltas();
+
+-- Full recompute, for the initial load and to repair drift
+-- (SELECT recompute_supplier_metrics() for all suppliers)
+CREATE OR REPLACE FUNCTION recompute_supplier_metrics(target_supplier_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE suppliers s
+    SET
+        total_shipments = COALESCE(sh.shipments, 0),
+        total_parcels_received = COALESCE(p.parcels, 0),
+        total_damaged_parcels = COALESCE(p.damaged, 0),
+        damage_rate = COALESCE(CAST(p.damaged AS DECIMAL) / NULLIF(p.parcels, 0), 0)
+    FROM suppliers base
+    LEFT JOIN (
+        SELECT supplier_id, COUNT(*) AS shipments
+        FROM shipments
+        GROUP BY supplier_id
+    ) sh ON sh.supplier_id = base.supplier_id
+    LEFT JOIN (
+        SELECT sh.supplier_id, COUNT(*) AS parcels, COUNT(*) FILTER (WHERE p.has_damage) AS damaged
+        FROM parcels p
+        JOIN shipments sh ON sh.shipment_id = p.shipment_id
+        GROUP BY sh.supplier_id
+    ) p ON p.supplier_id = base.supplier_id
+    WHERE s.supplier_id = base.supplier_id
+      AND (target_supplier_id IS NULL OR base.supplier_id = target_supplier_id);
+
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT recompute_supplier_metrics();